@@ -0,0 +1,192 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+.. module:: bench
+   :synopsis: Benchmarks of the client against a FakeNodeos server: block
+              backfill, table scans and push batches, measuring requests per
+              second, p50/p99 latency, CPU per call and peak memory.
+.. author:: Merouane Benthameur <merouane.benth@gmail.com>
+
+Run from the root of the repository:
+
+    python benchmarks/bench.py
+    python benchmarks/bench.py --save baseline.json
+    python benchmarks/bench.py --compare baseline.json --tolerance 0.2
+
+With --compare, the exit status is 1 when a scenario lost more than
+`tolerance` of its requests per second or of its CPU per call.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+from pyeos_client.EOSChainApi import ChainAPI  # noqa: E402
+from pyeos_client.Instrumentation import Instrumentation  # noqa: E402
+from pyeos_client.NodeosConnect import RequestHandlerAPI  # noqa: E402
+
+
+def backfill(chain_api, args, run):
+    count = 0
+    for block in chain_api.get_blocks(1, args.blocks, concurrency=args.concurrency):
+        count += len(block['transactions'])
+    return count
+
+
+def table_scan(chain_api, args, run):
+    count = 0
+    for _ in chain_api.scan_table_rows('eosio.token', 'eosio.token', 'accounts',
+                                       partitions=args.concurrency, limit=args.page_size):
+        count += 1
+    return count
+
+
+def push_batch(chain_api, args, run):
+    # packed_trx only has to be unique, the fake node does not unpack it.
+    transactions = [{'signatures': [], 'compression': 'none', 'packed_context_free_data': '',
+                     'packed_trx': '%08x%08x' % (run, i) + '00' * 100}
+                    for i in range(args.transactions)]
+    results = chain_api.submit_transactions(transactions, concurrency=args.concurrency,
+                                            batch_size=args.batch_size)
+    return sum(1 for result in results if result.error is None)
+
+
+SCENARIOS = {
+    'backfill': backfill,
+    'table_scan': table_scan,
+    'push_batch': push_batch,
+}
+
+
+def start_server(args):
+    command = [sys.executable, '-m', 'pyeos_client.FakeNodeos', '--port', '0',
+               '--head', str(args.blocks + 1000),
+               '--transactions-per-block', str(args.transactions_per_block),
+               '--rows', str(args.rows),
+               '--latency', str(args.latency), '--jitter', str(args.jitter)]
+    # the server runs in its own process so its CPU is not counted.
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, universal_newlines=True,
+                               cwd=os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+    return process, process.stdout.readline().strip()
+
+
+def run_scenario(name, url, args, run):
+    instrumentation = Instrumentation()
+    chain_api = ChainAPI(RequestHandlerAPI(url, instrumentation=instrumentation))
+    cpu, start = time.process_time(), time.perf_counter()
+    items = SCENARIOS[name](chain_api, args, run)
+    elapsed, cpu = time.perf_counter() - start, time.process_time() - cpu
+    requests = 0
+    histograms = []
+    for metrics in instrumentation.paths.values():
+        requests += metrics.requests
+        histograms.append(metrics.histograms['total'])
+    # the scenarios mostly call a single endpoint, the busiest one is reported.
+    histogram = max(histograms, key=lambda h: h.count)
+    return {
+        'items': items,
+        'requests': requests,
+        'seconds': elapsed,
+        'requests_per_second': requests / elapsed,
+        'p50_ms': histogram.percentile(0.5) * 1000,
+        'p99_ms': histogram.percentile(0.99) * 1000,
+        'cpu_ms_per_call': cpu * 1000 / max(requests, 1),
+    }
+
+
+def peak_memory(name, url, args, run):
+    tracemalloc.start()
+    try:
+        SCENARIOS[name](ChainAPI(RequestHandlerAPI(url)), args, run)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def compare(results, baseline, tolerance):
+    regressions = []
+    for name, result in results.items():
+        previous = baseline.get(name)
+        if previous is None:
+            continue
+        if result['requests_per_second'] < previous['requests_per_second'] * (1 - tolerance):
+            regressions.append('%s: %.0f req/s, was %.0f' % (
+                name, result['requests_per_second'], previous['requests_per_second']))
+        if result['cpu_ms_per_call'] > previous['cpu_ms_per_call'] * (1 + tolerance):
+            regressions.append('%s: %.3f ms of CPU per call, was %.3f' % (
+                name, result['cpu_ms_per_call'], previous['cpu_ms_per_call']))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark pyeos_client against a fake nodeos.')
+    parser.add_argument('scenarios', nargs='*', help='among %s, all of them by default' % ', '.join(sorted(SCENARIOS)))
+    parser.add_argument('--blocks', type=int, default=5000, help='blocks of the backfill')
+    parser.add_argument('--transactions-per-block', type=int, default=10)
+    parser.add_argument('--rows', type=int, default=100000, help='rows of the scanned table')
+    parser.add_argument('--page-size', type=int, default=1000)
+    parser.add_argument('--transactions', type=int, default=5000, help='transactions of the push batch')
+    parser.add_argument('--batch-size', type=int, default=None,
+                        help='transactions per push_transactions call, one by one when omitted')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--latency', type=float, default=0.0, help='mean delay of the server, in seconds')
+    parser.add_argument('--jitter', type=float, default=0.0)
+    parser.add_argument('--repeat', type=int, default=3, help='runs per scenario, the best one is kept')
+    parser.add_argument('--no-memory', action='store_true', help='skip the peak memory runs')
+    parser.add_argument('--save', help='write the results to this json file')
+    parser.add_argument('--compare', help='json file of previous results')
+    parser.add_argument('--tolerance', type=float, default=0.2)
+    args = parser.parse_args(argv)
+    for name in args.scenarios:
+        if name not in SCENARIOS:
+            parser.error('unknown scenario %s' % name)
+    args.scenarios = args.scenarios or sorted(SCENARIOS)
+
+    process, url = start_server(args)
+    results = {}
+    try:
+        run = 0
+        for name in args.scenarios:
+            runs = []
+            for _ in range(args.repeat):
+                run += 1
+                runs.append(run_scenario(name, url, args, run))
+            result = max(runs, key=lambda r: r['requests_per_second'])
+            if not args.no_memory:
+                run += 1
+                result['peak_memory_kb'] = peak_memory(name, url, args, run) / 1024.0
+            results[name] = result
+    finally:
+        process.terminate()
+        process.wait()
+
+    print('%-12s %10s %10s %9s %9s %11s %12s' % (
+        'scenario', 'requests', 'req/s', 'p50 ms', 'p99 ms', 'cpu ms/call', 'peak mem KB'))
+    for name, result in results.items():
+        print('%-12s %10d %10.0f %9.2f %9.2f %11.3f %12s' % (
+            name, result['requests'], result['requests_per_second'], result['p50_ms'],
+            result['p99_ms'], result['cpu_ms_per_call'],
+            '%.0f' % result['peak_memory_kb'] if 'peak_memory_kb' in result else '-'))
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(results, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for regression in regressions:
+            print('regression: ' + regression)
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
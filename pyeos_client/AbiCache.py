@@ -0,0 +1,214 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+.. module:: AbiCache
+   :synopsis: An LRU cache of contract ABIs, invalidated when the code_hash
+              of the contract changes, with optional on-disk persistence.
+.. author:: Merouane Benthameur <merouane.benth@gmail.com>
+"""
+
+import asyncio
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+from pyeos_client.AbiSerializer import AbiError, AbiSerializer
+from pyeos_client.FastJson import decode_response
+
+
+class AbiCache:
+    """ a cache of contract ABIs and their serializers, shared by ChainAPI objects"""
+
+    def __init__(self, max_entries=128, max_bytes=64 * 1024 * 1024,
+                 check_interval=60, path=None, clock=time.monotonic):
+        """
+        constructor of the AbiCache
+
+        :param max_entries: (int) number of contracts kept in the cache
+        :param max_bytes: (int) total size of the cached ABIs, as json
+        :param check_interval: (float) seconds during which an entry is used
+        without checking the code_hash of the contract, 0 checks on every use
+        :param path: (str) json file the cache is loaded from and saved to
+        :param clock: callable returning the current time in seconds
+
+        Only the code_hash is checked, an ABI updated with setabi alone is
+        seen once `invalidate` is called for the contract.
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.check_interval = check_interval
+        self.path = path
+        self.clock = clock
+        self.entries = OrderedDict()
+        self.size = 0
+        self.lock = threading.RLock()
+        # saves are serialized so an older snapshot never replaces a newer one.
+        self.save_lock = threading.Lock()
+        if path and os.path.exists(path):
+            self.load()
+
+    def get_abi(self, chain_api, account_name):
+        """
+        Get the ABI of a contract, fetching it only when it is not cached
+        or when the contract was redeployed.
+
+        :param chain_api: ChainAPI object used on a miss
+        :param account_name: (str) account of the contract
+        :return: json: ABI of the contract
+        """
+        return self._get_entry(chain_api, account_name)['abi']
+
+    def get_serializer(self, chain_api, account_name):
+        """
+        Get the AbiSerializer of a contract.
+
+        :param chain_api: ChainAPI object used on a miss
+        :param account_name: (str) account of the contract
+        :return: AbiSerializer object
+        """
+        return self._serializer(self._get_entry(chain_api, account_name))
+
+    async def async_get_abi(self, chain_api, account_name):
+        """
+        Get the ABI of a contract with an AsyncChainAPI, like get_abi.
+
+        :param chain_api: AsyncChainAPI object used on a miss
+        :param account_name: (str) account of the contract
+        :return: json: ABI of the contract
+        """
+        return (await self._async_get_entry(chain_api, account_name))['abi']
+
+    async def async_get_serializer(self, chain_api, account_name):
+        """
+        Get the AbiSerializer of a contract with an AsyncChainAPI.
+
+        :param chain_api: AsyncChainAPI object used on a miss
+        :param account_name: (str) account of the contract
+        :return: AbiSerializer object
+        """
+        return self._serializer(await self._async_get_entry(chain_api, account_name))
+
+    def invalidate(self, account_name=None):
+        """
+        Drop the entry of a contract, or every entry when no name is given.
+        """
+        with self.lock:
+            if account_name is None:
+                self.entries.clear()
+                self.size = 0
+            elif account_name in self.entries:
+                self.size -= self.entries.pop(account_name)['size']
+
+    @staticmethod
+    def _serializer(entry):
+        if entry.get('serializer') is None:
+            entry['serializer'] = AbiSerializer(entry['abi'])
+        return entry['serializer']
+
+    def _get_entry(self, chain_api, account_name):
+        entry, fresh = self._lookup(account_name)
+        if fresh:
+            return entry
+        if entry is not None and self._checked(entry, chain_api.get_code_hash(account_name)):
+            return entry
+        entry = self._fetched(account_name, chain_api.get_code(account_name))
+        if self.path:
+            self.save()
+        return entry
+
+    async def _async_get_entry(self, chain_api, account_name):
+        entry, fresh = self._lookup(account_name)
+        if fresh:
+            return entry
+        if entry is not None and self._checked(entry, await chain_api.get_code_hash(account_name)):
+            return entry
+        entry = self._fetched(account_name, await chain_api.get_code(account_name))
+        if self.path:
+            # the file is written off the event loop.
+            await asyncio.get_running_loop().run_in_executor(None, self.save)
+        return entry
+
+    def _lookup(self, account_name):
+        """
+        :return: tuple: (entry or None, True when it is used without a check)
+        """
+        with self.lock:
+            entry = self.entries.get(account_name)
+            if entry is None:
+                return None, False
+            self.entries.move_to_end(account_name)
+            return entry, self.clock() - entry['checked_at'] < self.check_interval
+
+    def _checked(self, entry, response):
+        """
+        Tell whether a cached entry still matches the get_code_hash answer
+        of its contract.
+        """
+        response.raise_for_status()
+        if decode_response(response)['code_hash'] != entry['code_hash']:
+            return False
+        entry['checked_at'] = self.clock()
+        return True
+
+    def _fetched(self, account_name, response):
+        response.raise_for_status()
+        code = decode_response(response)
+        if not code.get('abi'):
+            raise AbiError('account %s has no ABI' % account_name)
+        return self._store(account_name, code['code_hash'], code['abi'])
+
+    def _store(self, account_name, code_hash, abi, checked_at=None):
+        entry = {
+            'code_hash': code_hash,
+            'abi': abi,
+            'size': len(json.dumps(abi)),
+            'checked_at': self.clock() if checked_at is None else checked_at,
+            'serializer': None,
+        }
+        with self.lock:
+            self.invalidate(account_name)
+            self.entries[account_name] = entry
+            self.size += entry['size']
+            while len(self.entries) > 1 and (len(self.entries) > self.max_entries
+                                             or self.size > self.max_bytes):
+                _, evicted = self.entries.popitem(last=False)
+                self.size -= evicted['size']
+        return entry
+
+    def save(self, path=None):
+        """
+        Write the cached ABIs to a json file, atomically.
+
+        :param path: (str) target file, defaults to the path of the cache
+        """
+        path = path or self.path
+        with self.save_lock:
+            with self.lock:
+                data = dict((name, {'code_hash': entry['code_hash'], 'abi': entry['abi']})
+                            for name, entry in self.entries.items())
+            # each save writes a file of its own, other processes may save
+            # to the same path.
+            with tempfile.NamedTemporaryFile('w', dir=os.path.dirname(os.path.abspath(path)),
+                                             suffix='.tmp', delete=False) as f:
+                json.dump(data, f)
+            try:
+                os.replace(f.name, path)
+            except OSError:
+                os.unlink(f.name)
+                raise
+
+    def load(self, path=None):
+        """
+        Load ABIs saved by `save`. They are checked against the code_hash of
+        their contract on first use.
+
+        :param path: (str) source file, defaults to the path of the cache
+        """
+        with open(path or self.path) as f:
+            data = json.load(f)
+        for name, entry in data.items():
+            self._store(name, entry['code_hash'], entry['abi'], checked_at=float('-inf'))
@@ -0,0 +1,728 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+.. module:: AbiSerializer
+   :synopsis: Pack and unpack contract data to and from the EOS binary
+              format, locally, from the ABI of the contract.
+.. author:: Merouane Benthameur <merouane.benth@gmail.com>
+"""
+
+import hashlib
+import struct
+
+from pyeos_client.Codec import (
+    AbiError, asset_to_string, name_to_string, string_to_asset, string_to_name, string_to_symbol,
+    string_to_symbol_code, string_to_time_point, symbol_code_to_string, symbol_to_string,
+    time_point_to_string)
+from pyeos_client.FastJson import decode_response
+
+BASE58_ALPHABET = '123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz'
+KEY_TYPES = ['K1', 'R1', 'WA']
+
+BLOCK_TIMESTAMP_EPOCH_MS = 946684800000
+BLOCK_INTERVAL_MS = 500
+
+
+def _ripemd160(data):
+    try:
+        return hashlib.new('ripemd160', data).digest()
+    except ValueError:
+        return _ripemd160_fallback(data)
+
+
+def base58_encode(data):
+    """
+    Encode bytes with the bitcoin base58 alphabet.
+    """
+    value = int.from_bytes(data, 'big')
+    chars = []
+    while value:
+        value, remainder = divmod(value, 58)
+        chars.append(BASE58_ALPHABET[remainder])
+    pad = len(data) - len(data.lstrip(b'\0'))
+    return BASE58_ALPHABET[0] * pad + ''.join(reversed(chars))
+
+
+def base58_decode(s):
+    """
+    Decode a base58 string to bytes.
+    """
+    value = 0
+    for c in s:
+        try:
+            value = value * 58 + BASE58_ALPHABET.index(c)
+        except ValueError:
+            raise AbiError('invalid base58 character %r' % c)
+    data = value.to_bytes((value.bit_length() + 7) // 8, 'big')
+    pad = len(s) - len(s.lstrip(BASE58_ALPHABET[0]))
+    return b'\0' * pad + data
+
+
+def key_to_string(data, key_type, prefix):
+    """
+    Format a binary key or signature as an EOS string.
+
+    :param data: (bytes) key or signature without its type
+    :param key_type: (int) index in KEY_TYPES
+    :param prefix: (str) PUB, PVT or SIG
+    :return: str: eg. PUB_K1_..., or the legacy EOS... form for a K1 public key
+    """
+    suffix = KEY_TYPES[key_type]
+    if prefix == 'EOS':
+        return 'EOS' + base58_encode(data + _ripemd160(data)[:4])
+    digest = _ripemd160(data + suffix.encode())
+    return '%s_%s_%s' % (prefix, suffix, base58_encode(data + digest[:4]))
+
+
+def string_to_key(s):
+    """
+    Parse an EOS key or signature string.
+
+    :param s: (str) EOS..., PUB_K1_..., PVT_K1_... or SIG_K1_... string
+    :return: tuple: (int key type, bytes data)
+    """
+    if s.startswith('EOS'):
+        raw = base58_decode(s[3:])
+        data, checksum = raw[:-4], raw[-4:]
+        if _ripemd160(data)[:4] != checksum:
+            raise AbiError('invalid checksum in key %r' % s)
+        return 0, data
+    try:
+        _, suffix, encoded = s.split('_', 2)
+        key_type = KEY_TYPES.index(suffix)
+    except ValueError:
+        raise AbiError('invalid key %r' % s)
+    raw = base58_decode(encoded)
+    data, checksum = raw[:-4], raw[-4:]
+    if _ripemd160(data + suffix.encode())[:4] != checksum:
+        raise AbiError('invalid checksum in key %r' % s)
+    return key_type, data
+
+
+class Writer:
+    """ an append only binary buffer"""
+
+    def __init__(self):
+        self.buffer = bytearray()
+
+    def write(self, data):
+        self.buffer += data
+
+    def write_varuint32(self, value):
+        if not 0 <= value <= 0xffffffff:
+            raise AbiError('varuint32 out of range: %s' % value)
+        while True:
+            byte = value & 0x7f
+            value >>= 7
+            if value:
+                self.buffer.append(byte | 0x80)
+            else:
+                self.buffer.append(byte)
+                return
+
+    def getvalue(self):
+        return bytes(self.buffer)
+
+
+class Reader:
+    """ a cursor over binary data"""
+
+    def __init__(self, data):
+        self.data = memoryview(data)
+        self.pos = 0
+
+    def read(self, size):
+        if self.pos + size > len(self.data):
+            raise AbiError('read past the end of the data')
+        chunk = self.data[self.pos:self.pos + size]
+        self.pos += size
+        return chunk.tobytes()
+
+    def unpack(self, fmt):
+        size = struct.calcsize(fmt)
+        if self.pos + size > len(self.data):
+            raise AbiError('read past the end of the data')
+        value = struct.unpack_from(fmt, self.data, self.pos)[0]
+        self.pos += size
+        return value
+
+    def read_varuint32(self):
+        value = shift = 0
+        while True:
+            byte = self.unpack('B')
+            value |= (byte & 0x7f) << shift
+            shift += 7
+            if not byte & 0x80:
+                return value
+            if shift > 35:
+                raise AbiError('varuint32 is too long')
+
+    def at_end(self):
+        return self.pos >= len(self.data)
+
+
+def _int_codec(fmt, low, high):
+    size = struct.calcsize(fmt)
+
+    def pack(writer, value):
+        value = int(value)
+        if not low <= value <= high:
+            raise AbiError('%s out of range' % value)
+        writer.write(struct.pack(fmt, value))
+
+    def unpack(reader):
+        value = reader.unpack(fmt)
+        # mirror fc::json which quotes integers that do not fit in 32 bits.
+        if size == 8 and not -0xffffffff <= value <= 0xffffffff:
+            return str(value)
+        return value
+    return pack, unpack
+
+
+def _int128_codec(signed):
+    def pack(writer, value):
+        writer.write(int(value).to_bytes(16, 'little', signed=signed))
+
+    def unpack(reader):
+        return str(int.from_bytes(reader.read(16), 'little', signed=signed))
+    return pack, unpack
+
+
+def _pack_bool(writer, value):
+    writer.write(b'\1' if value else b'\0')
+
+
+def _unpack_bool(reader):
+    return reader.unpack('B') != 0
+
+
+def _pack_varint32(writer, value):
+    value = int(value)
+    writer.write_varuint32(((value << 1) ^ (value >> 31)) & 0xffffffff)
+
+
+def _unpack_varint32(reader):
+    value = reader.read_varuint32()
+    return (value >> 1) ^ -(value & 1)
+
+
+def _pack_varuint32(writer, value):
+    writer.write_varuint32(int(value))
+
+
+def _unpack_varuint32(reader):
+    return reader.read_varuint32()
+
+
+def _float_codec(fmt):
+    def pack(writer, value):
+        writer.write(struct.pack(fmt, float(value)))
+
+    def unpack(reader):
+        return reader.unpack(fmt)
+    return pack, unpack
+
+
+def _fixed_hex_codec(size):
+    def pack(writer, value):
+        data = bytes.fromhex(value[2:] if value.startswith('0x') else value)
+        if len(data) != size:
+            raise AbiError('expected %d bytes, got %d' % (size, len(data)))
+        writer.write(data)
+
+    def unpack(reader):
+        return reader.read(size).hex()
+    return pack, unpack
+
+
+def _pack_float128(writer, value):
+    _fixed_hex_codec(16)[0](writer, value)
+
+
+def _unpack_float128(reader):
+    return '0x' + reader.read(16).hex()
+
+
+def _pack_bytes(writer, value):
+    data = bytes.fromhex(value) if isinstance(value, str) else bytes(value)
+    writer.write_varuint32(len(data))
+    writer.write(data)
+
+
+def _unpack_bytes(reader):
+    return reader.read(reader.read_varuint32()).hex()
+
+
+def _pack_string(writer, value):
+    data = value.encode('utf-8')
+    writer.write_varuint32(len(data))
+    writer.write(data)
+
+
+def _unpack_string(reader):
+    return reader.read(reader.read_varuint32()).decode('utf-8')
+
+
+def _pack_name(writer, value):
+    writer.write(struct.pack('<Q', string_to_name(value)))
+
+
+def _unpack_name(reader):
+    return name_to_string(reader.unpack('<Q'))
+
+
+def _pack_symbol(writer, value):
+    writer.write(struct.pack('<Q', string_to_symbol(value)))
+
+
+def _unpack_symbol(reader):
+    return symbol_to_string(reader.unpack('<Q'))
+
+
+def _pack_symbol_code(writer, value):
+    writer.write(struct.pack('<Q', string_to_symbol_code(value)))
+
+
+def _unpack_symbol_code(reader):
+    return symbol_code_to_string(reader.unpack('<Q'))
+
+
+def _pack_asset(writer, value):
+    amount, symbol = string_to_asset(value)
+    writer.write(struct.pack('<qQ', amount, symbol))
+
+
+def _unpack_asset(reader):
+    amount = reader.unpack('<q')
+    return asset_to_string(amount, reader.unpack('<Q'))
+
+
+def _pack_extended_asset(writer, value):
+    _pack_asset(writer, value['quantity'])
+    _pack_name(writer, value['contract'])
+
+
+def _unpack_extended_asset(reader):
+    quantity = _unpack_asset(reader)
+    return {'quantity': quantity, 'contract': _unpack_name(reader)}
+
+
+def _pack_time_point(writer, value):
+    writer.write(struct.pack('<q', string_to_time_point(value)))
+
+
+def _unpack_time_point(reader):
+    return time_point_to_string(reader.unpack('<q'))
+
+
+def _pack_time_point_sec(writer, value):
+    writer.write(struct.pack('<I', string_to_time_point(value) // 1000000))
+
+
+def _unpack_time_point_sec(reader):
+    return time_point_to_string(reader.unpack('<I') * 1000000, with_millis=False)
+
+
+def _pack_block_timestamp(writer, value):
+    slot = (string_to_time_point(value) // 1000 - BLOCK_TIMESTAMP_EPOCH_MS) // BLOCK_INTERVAL_MS
+    writer.write(struct.pack('<I', slot))
+
+
+def _unpack_block_timestamp(reader):
+    millis = reader.unpack('<I') * BLOCK_INTERVAL_MS + BLOCK_TIMESTAMP_EPOCH_MS
+    return time_point_to_string(millis * 1000)
+
+
+def _key_codec(prefix, size):
+    def pack(writer, value):
+        key_type, data = string_to_key(value)
+        if len(data) != size:
+            raise AbiError('invalid %s size' % prefix)
+        writer.write(bytes([key_type]) + data)
+
+    def unpack(reader):
+        key_type = reader.unpack('B')
+        data = reader.read(size)
+        if key_type == 0 and prefix == 'PUB':
+            return key_to_string(data, key_type, 'EOS')
+        return key_to_string(data, key_type, prefix)
+    return pack, unpack
+
+
+BUILTIN_TYPES = {
+    'bool': (_pack_bool, _unpack_bool),
+    'int8': _int_codec('<b', -2 ** 7, 2 ** 7 - 1),
+    'uint8': _int_codec('<B', 0, 2 ** 8 - 1),
+    'int16': _int_codec('<h', -2 ** 15, 2 ** 15 - 1),
+    'uint16': _int_codec('<H', 0, 2 ** 16 - 1),
+    'int32': _int_codec('<i', -2 ** 31, 2 ** 31 - 1),
+    'uint32': _int_codec('<I', 0, 2 ** 32 - 1),
+    'int64': _int_codec('<q', -2 ** 63, 2 ** 63 - 1),
+    'uint64': _int_codec('<Q', 0, 2 ** 64 - 1),
+    'int128': _int128_codec(True),
+    'uint128': _int128_codec(False),
+    'varint32': (_pack_varint32, _unpack_varint32),
+    'varuint32': (_pack_varuint32, _unpack_varuint32),
+    'float32': _float_codec('<f'),
+    'float64': _float_codec('<d'),
+    'float128': (_pack_float128, _unpack_float128),
+    'time_point': (_pack_time_point, _unpack_time_point),
+    'time_point_sec': (_pack_time_point_sec, _unpack_time_point_sec),
+    'block_timestamp_type': (_pack_block_timestamp, _unpack_block_timestamp),
+    'name': (_pack_name, _unpack_name),
+    'bytes': (_pack_bytes, _unpack_bytes),
+    'string': (_pack_string, _unpack_string),
+    'checksum160': _fixed_hex_codec(20),
+    'checksum256': _fixed_hex_codec(32),
+    'checksum512': _fixed_hex_codec(64),
+    'public_key': _key_codec('PUB', 33),
+    'signature': _key_codec('SIG', 65),
+    'symbol': (_pack_symbol, _unpack_symbol),
+    'symbol_code': (_pack_symbol_code, _unpack_symbol_code),
+    'asset': (_pack_asset, _unpack_asset),
+    'extended_asset': (_pack_extended_asset, _unpack_extended_asset),
+}
+
+# the structures of the chain itself, used to pack transactions.
+TRANSACTION_ABI = {
+    'structs': [
+        {'name': 'permission_level', 'base': '', 'fields': [
+            {'name': 'actor', 'type': 'name'},
+            {'name': 'permission', 'type': 'name'}]},
+        {'name': 'action', 'base': '', 'fields': [
+            {'name': 'account', 'type': 'name'},
+            {'name': 'name', 'type': 'name'},
+            {'name': 'authorization', 'type': 'permission_level[]'},
+            {'name': 'data', 'type': 'bytes'}]},
+        {'name': 'extension', 'base': '', 'fields': [
+            {'name': 'type', 'type': 'uint16'},
+            {'name': 'data', 'type': 'bytes'}]},
+        {'name': 'transaction_header', 'base': '', 'fields': [
+            {'name': 'expiration', 'type': 'time_point_sec'},
+            {'name': 'ref_block_num', 'type': 'uint16'},
+            {'name': 'ref_block_prefix', 'type': 'uint32'},
+            {'name': 'max_net_usage_words', 'type': 'varuint32'},
+            {'name': 'max_cpu_usage_ms', 'type': 'uint8'},
+            {'name': 'delay_sec', 'type': 'varuint32'}]},
+        {'name': 'transaction', 'base': 'transaction_header', 'fields': [
+            {'name': 'context_free_actions', 'type': 'action[]'},
+            {'name': 'actions', 'type': 'action[]'},
+            {'name': 'transaction_extensions', 'type': 'extension[]'}]},
+    ],
+}
+
+# values of the optional transaction fields left out of a json transaction.
+TRANSACTION_DEFAULTS = {
+    'max_net_usage_words': 0,
+    'max_cpu_usage_ms': 0,
+    'delay_sec': 0,
+    'context_free_actions': [],
+    'transaction_extensions': [],
+}
+
+
+class AbiSerializer:
+    """ a local replacement of abi_json_to_bin and abi_bin_to_json"""
+
+    def __init__(self, abi):
+        """
+        constructor of the AbiSerializer
+
+        :param abi: json: ABI of the contract, as returned by get_code
+        """
+        self.abi = abi
+        self.typedefs = dict((t['new_type_name'], t['type']) for t in abi.get('types', []))
+        self.structs = dict((s['name'], s) for s in abi.get('structs', []))
+        self.variants = dict((v['name'], v['types']) for v in abi.get('variants', []))
+        self.actions = dict((a['name'], a['type']) for a in abi.get('actions', []))
+        self.tables = dict((t['name'], t['type']) for t in abi.get('tables', []))
+        self._packers = {}
+        self._unpackers = {}
+
+    @classmethod
+    def from_chain(cls, chain_api, account_name):
+        """
+        Build the serializer of a contract from its ABI fetched with get_code.
+
+        :param chain_api: ChainAPI object
+        :param account_name: (str) account of the contract
+        :return: AbiSerializer object
+        """
+        return cls.from_code_response(chain_api.get_code(account_name), account_name)
+
+    @classmethod
+    def from_code_response(cls, response, account_name):
+        """
+        Build the serializer of a contract from a get_code response.
+
+        :param response: response object of get_code
+        :param account_name: (str) account of the contract
+        :return: AbiSerializer object
+        """
+        response.raise_for_status()
+        abi = decode_response(response).get('abi')
+        if not abi:
+            raise AbiError('account %s has no ABI' % account_name)
+        return cls(abi)
+
+    def resolve_type(self, type_name):
+        """
+        Follow the typedefs of the ABI down to the underlying type.
+        """
+        seen = set()
+        while type_name in self.typedefs:
+            if type_name in seen:
+                raise AbiError('circular typedef %s' % type_name)
+            seen.add(type_name)
+            type_name = self.typedefs[type_name]
+        return type_name
+
+    def pack(self, type_name, value):
+        """
+        Serialize a value of the given ABI type.
+
+        :param type_name: (str) name of a builtin type, struct, variant or typedef
+        :param value: json value
+        :return: bytes
+        """
+        writer = Writer()
+        self._packer(type_name)(writer, value)
+        return writer.getvalue()
+
+    def unpack(self, type_name, data):
+        """
+        Deserialize a value of the given ABI type.
+
+        :param type_name: (str) name of a builtin type, struct, variant or typedef
+        :param data: (bytes) binary value
+        :return: json value
+        """
+        reader = Reader(data)
+        value = self._unpacker(type_name)(reader)
+        if not reader.at_end():
+            raise AbiError('%d bytes left after unpacking %s'
+                           % (len(reader.data) - reader.pos, type_name))
+        return value
+
+    def pack_action_data(self, action, args):
+        """
+        Serialize the arguments of an action, like abi_json_to_bin.
+
+        :param action: (str) name of the action
+        :param args: json: arguments of the action
+        :return: str: hex encoded binargs
+        """
+        return self.pack(self.action_type(action), args).hex()
+
+    def unpack_action_data(self, action, binargs):
+        """
+        Deserialize the arguments of an action, like abi_bin_to_json.
+
+        :param action: (str) name of the action
+        :param binargs: (str) hex encoded binary arguments
+        :return: json: arguments of the action
+        """
+        return self.unpack(self.action_type(action), bytes.fromhex(binargs))
+
+    def action_type(self, action):
+        """
+        Get the type of the arguments of an action.
+        """
+        try:
+            return self.actions[action]
+        except KeyError:
+            raise AbiError('unknown action %s' % action)
+
+    def table_type(self, table):
+        """
+        Get the type of the rows of a table.
+        """
+        try:
+            return self.tables[table]
+        except KeyError:
+            raise AbiError('unknown table %s' % table)
+
+    def _packer(self, type_name):
+        packer = self._packers.get(type_name)
+        if packer is None:
+            packer = self._packers[type_name] = self._build_packer(type_name)
+        return packer
+
+    def _unpacker(self, type_name):
+        unpacker = self._unpackers.get(type_name)
+        if unpacker is None:
+            unpacker = self._unpackers[type_name] = self._build_unpacker(type_name)
+        return unpacker
+
+    def _build_packer(self, type_name):
+        if type_name.endswith('$'):
+            return self._packer(type_name[:-1])
+        if type_name.endswith('?'):
+            inner = type_name[:-1]
+
+            def pack_optional(writer, value):
+                if value is None:
+                    writer.write(b'\0')
+                else:
+                    writer.write(b'\1')
+                    self._packer(inner)(writer, value)
+            return pack_optional
+        if type_name.endswith('[]'):
+            inner = type_name[:-2]
+
+            def pack_array(writer, value):
+                pack_item = self._packer(inner)
+                writer.write_varuint32(len(value))
+                for item in value:
+                    pack_item(writer, item)
+            return pack_array
+        resolved = self.resolve_type(type_name)
+        if resolved != type_name:
+            return self._packer(resolved)
+        if type_name in BUILTIN_TYPES:
+            return BUILTIN_TYPES[type_name][0]
+        if type_name in self.variants:
+            types = self.variants[type_name]
+
+            def pack_variant(writer, value):
+                variant_type, variant_value = value
+                try:
+                    index = types.index(variant_type)
+                except ValueError:
+                    raise AbiError('type %s is not part of variant %s' % (variant_type, type_name))
+                writer.write_varuint32(index)
+                self._packer(variant_type)(writer, variant_value)
+            return pack_variant
+        if type_name in self.structs:
+            fields = self._struct_fields(type_name)
+
+            def pack_struct(writer, value):
+                for field_name, field_type in fields:
+                    if field_name not in value:
+                        if field_type.endswith('$'):
+                            return
+                        raise AbiError('missing field %s in %s' % (field_name, type_name))
+                    self._packer(field_type)(writer, value[field_name])
+            return pack_struct
+        raise AbiError('unknown type %s' % type_name)
+
+    def _build_unpacker(self, type_name):
+        if type_name.endswith('$'):
+            return self._unpacker(type_name[:-1])
+        if type_name.endswith('?'):
+            inner = type_name[:-1]
+
+            def unpack_optional(reader):
+                if reader.unpack('B'):
+                    return self._unpacker(inner)(reader)
+                return None
+            return unpack_optional
+        if type_name.endswith('[]'):
+            inner = type_name[:-2]
+
+            def unpack_array(reader):
+                unpack_item = self._unpacker(inner)
+                return [unpack_item(reader) for _ in range(reader.read_varuint32())]
+            return unpack_array
+        resolved = self.resolve_type(type_name)
+        if resolved != type_name:
+            return self._unpacker(resolved)
+        if type_name in BUILTIN_TYPES:
+            return BUILTIN_TYPES[type_name][1]
+        if type_name in self.variants:
+            types = self.variants[type_name]
+
+            def unpack_variant(reader):
+                index = reader.read_varuint32()
+                if index >= len(types):
+                    raise AbiError('invalid index %d for variant %s' % (index, type_name))
+                return [types[index], self._unpacker(types[index])(reader)]
+            return unpack_variant
+        if type_name in self.structs:
+            fields = self._struct_fields(type_name)
+
+            def unpack_struct(reader):
+                value = {}
+                for field_name, field_type in fields:
+                    if field_type.endswith('$') and reader.at_end():
+                        break
+                    value[field_name] = self._unpacker(field_type)(reader)
+                return value
+            return unpack_struct
+        raise AbiError('unknown type %s' % type_name)
+
+    def _struct_fields(self, struct_name):
+        struct_def = self.structs[struct_name]
+        fields = []
+        if struct_def.get('base'):
+            base = self.resolve_type(struct_def['base'])
+            if base not in self.structs:
+                raise AbiError('unknown base %s of struct %s' % (base, struct_name))
+            fields.extend(self._struct_fields(base))
+        fields.extend((f['name'], f['type']) for f in struct_def['fields'])
+        return fields
+
+
+def _ripemd160_fallback(data):
+    """
+    Pure python RIPEMD-160, for the OpenSSL builds which no longer ship it.
+    """
+    def rol(x, n):
+        return ((x << n) | (x >> (32 - n))) & 0xffffffff
+
+    def f(j, x, y, z):
+        if j < 16:
+            return x ^ y ^ z
+        if j < 32:
+            return (x & y) | (~x & z)
+        if j < 48:
+            return (x | ~y) ^ z
+        if j < 64:
+            return (x & z) | (y & ~z)
+        return x ^ (y | ~z)
+
+    k_left = [0x00000000, 0x5a827999, 0x6ed9eba1, 0x8f1bbcdc, 0xa953fd4e]
+    k_right = [0x50a28be6, 0x5c4dd124, 0x6d703ef3, 0x7a6d76e9, 0x00000000]
+    r_left = [0, 1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 11, 12, 13, 14, 15,
+              7, 4, 13, 1, 10, 6, 15, 3, 12, 0, 9, 5, 2, 14, 11, 8,
+              3, 10, 14, 4, 9, 15, 8, 1, 2, 7, 0, 6, 13, 11, 5, 12,
+              1, 9, 11, 10, 0, 8, 12, 4, 13, 3, 7, 15, 14, 5, 6, 2,
+              4, 0, 5, 9, 7, 12, 2, 10, 14, 1, 3, 8, 11, 6, 15, 13]
+    r_right = [5, 14, 7, 0, 9, 2, 11, 4, 13, 6, 15, 8, 1, 10, 3, 12,
+               6, 11, 3, 7, 0, 13, 5, 10, 14, 15, 8, 12, 4, 9, 1, 2,
+               15, 5, 1, 3, 7, 14, 6, 9, 11, 8, 12, 2, 10, 0, 4, 13,
+               8, 6, 4, 1, 3, 11, 15, 0, 5, 12, 2, 13, 9, 7, 10, 14,
+               12, 15, 10, 4, 1, 5, 8, 7, 6, 2, 13, 14, 0, 3, 9, 11]
+    s_left = [11, 14, 15, 12, 5, 8, 7, 9, 11, 13, 14, 15, 6, 7, 9, 8,
+              7, 6, 8, 13, 11, 9, 7, 15, 7, 12, 15, 9, 11, 7, 13, 12,
+              11, 13, 6, 7, 14, 9, 13, 15, 14, 8, 13, 6, 5, 12, 7, 5,
+              11, 12, 14, 15, 14, 15, 9, 8, 9, 14, 5, 6, 8, 6, 5, 12,
+              9, 15, 5, 11, 6, 8, 13, 12, 5, 12, 13, 14, 11, 8, 5, 6]
+    s_right = [8, 9, 9, 11, 13, 15, 15, 5, 7, 7, 8, 11, 14, 14, 12, 6,
+               9, 13, 15, 7, 12, 8, 9, 11, 7, 7, 12, 7, 6, 15, 13, 11,
+               9, 7, 15, 11, 8, 6, 6, 14, 12, 13, 5, 14, 13, 13, 7, 5,
+               15, 5, 8, 11, 14, 14, 6, 14, 6, 9, 12, 9, 12, 5, 15, 8,
+               8, 5, 12, 9, 12, 5, 14, 6, 8, 13, 6, 5, 15, 13, 11, 11]
+
+    h = [0x67452301, 0xefcdab89, 0x98badcfe, 0x10325476, 0xc3d2e1f0]
+    message = bytes(data) + b'\x80'
+    message += b'\0' * ((56 - len(message)) % 64) + struct.pack('<Q', 8 * len(data))
+    for offset in range(0, len(message), 64):
+        x = struct.unpack('<16I', message[offset:offset + 64])
+        al, bl, cl, dl, el = h
+        ar, br, cr, dr, er = h
+        for j in range(80):
+            t = rol((al + f(j, bl, cl, dl) + x[r_left[j]] + k_left[j // 16]) & 0xffffffff,
+                    s_left[j]) + el
+            al, el, dl, cl, bl = el, dl, rol(cl, 10), bl, t & 0xffffffff
+            t = rol((ar + f(79 - j, br, cr, dr) + x[r_right[j]] + k_right[j // 16]) & 0xffffffff,
+                    s_right[j]) + er
+            ar, er, dr, cr, br = er, dr, rol(cr, 10), br, t & 0xffffffff
+        t = (h[1] + cl + dr) & 0xffffffff
+        h[1] = (h[2] + dl + er) & 0xffffffff
+        h[2] = (h[3] + el + ar) & 0xffffffff
+        h[3] = (h[4] + al + br) & 0xffffffff
+        h[4] = (h[0] + bl + cr) & 0xffffffff
+        h[0] = t
+    return struct.pack('<5I', *h)
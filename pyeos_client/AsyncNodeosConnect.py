@@ -0,0 +1,158 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+.. module:: AsyncNodeosConnect
+   :synopsis: asyncio counterpart of NodeosConnect, built on aiohttp.
+              Exposes the same GET and POST methods as RequestHandlerAPI.
+.. author: Merouane Benthameur <merouane.benth@gmail.com>
+"""
+
+try:
+    import aiohttp
+except ImportError:  # pragma: no cover - optional dependency
+    aiohttp = None
+
+from pyeos_client.NodeosConnect import BufferedResponse, encode_body
+
+
+class StreamedResponse(BufferedResponse):
+    """ an http response whose body is read by chunks, with `async for`
+    over iter_content, instead of being read at once. It has no content."""
+
+    def __init__(self, response):
+        super().__init__(status_code=response.status, content=None, headers=response.headers,
+                         url=str(response.url), reason=response.reason)
+        self.raw = response
+
+    async def iter_content(self, chunk_size=65536, decode_unicode=False):
+        """
+        Iterate over the body of the response by chunks, as they are received.
+
+        :param chunk_size: (int) maximum size of the chunks
+        :return: async generator of bytes
+        """
+        async for chunk in self.raw.content.iter_chunked(chunk_size):
+            yield chunk
+
+    def close(self):
+        """
+        Give the connection back to the pool, or close it when the body was
+        not read to its end.
+        """
+        if self.raw.content.at_eof():
+            self.raw.release()
+        else:
+            self.raw.close()
+
+    def __repr__(self):
+        return '<StreamedResponse [%s]>' % self.status_code
+
+
+class AsyncRequestHandlerAPI:
+    """ a class to handle the http connection with the EOS node from a coroutine."""
+
+    def __init__(self, base_url, verify=False, limit=100, limit_per_host=0,
+                 timeout=30, keepalive_timeout=15, instrumentation=None, **kwargs):
+        """
+        constructor of the AsyncRequestHandlerAPI
+
+        :param base_url: str: url of the node, eg. http://nodeos-server:8888
+        :param verify: bool: verify the ssl certificate of the node
+        :param limit: int: total number of simultaneous connections kept in the pool
+        :param limit_per_host: int: simultaneous connections to the same host, 0 means no limit
+        :param timeout: float: total timeout of a request in seconds, None to disable
+        :param keepalive_timeout: float: seconds an idle connection is kept open
+        :param instrumentation: Instrumentation object measuring the
+        requests, None to send them unmeasured
+        :param kwargs: extra arguments given to aiohttp.ClientSession (headers, auth ..etc.)
+        """
+        if aiohttp is None:
+            raise ImportError('AsyncRequestHandlerAPI requires aiohttp, '
+                              'install it with: pip install pyeos_client[async]')
+        self.base_url = base_url
+        self.ssl_verify = verify
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.timeout = timeout
+        self.keepalive_timeout = keepalive_timeout
+        self.instrumentation = instrumentation
+        self.session_kwargs = kwargs
+        self.session = None
+
+    def _get_session(self):
+        # the aiohttp session has to be created from within the running loop.
+        if self.session is None or self.session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.limit, limit_per_host=self.limit_per_host,
+                keepalive_timeout=self.keepalive_timeout,
+                ssl=None if self.ssl_verify else False)
+            session_kwargs = dict(self.session_kwargs)
+            if self.instrumentation is not None:
+                session_kwargs['trace_configs'] = list(session_kwargs.get('trace_configs', ())) + [
+                    self.instrumentation.aiohttp_trace_config()]
+            self.session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+                **session_kwargs)
+        return self.session
+
+    async def _request(self, method, path, **kwargs):
+        session = self._get_session()
+        if 'data' in kwargs:
+            kwargs['data'] = encode_body(kwargs['data'])
+        if self.instrumentation is not None:
+            return await self.instrumentation.async_request(session, method, self.base_url, path, **kwargs)
+        if kwargs.pop('stream', False):
+            return StreamedResponse(await session.request(method, self.base_url + path, **kwargs))
+        async with session.request(method, self.base_url + path, **kwargs) as response:
+            content = await response.read()
+            return BufferedResponse(status_code=response.status, content=content,
+                                    headers=response.headers, url=str(response.url),
+                                    reason=response.reason)
+
+    async def get(self, path, **kwargs):
+        """
+        A GET Http method.
+
+        :param path: str: path to  api endpoint
+        :param kwargs: json: arguments auth, headers, data ..etc. With
+        stream=True the body is left unread, see StreamedResponse.
+
+        :return: BufferedResponse object, or StreamedResponse object
+
+        """
+        try:
+            return await self._request('GET', path, **kwargs)
+        except aiohttp.ClientError as e:
+            raise e
+
+    async def post(self, path, **kwargs):
+        """
+        A POST Http method.
+
+        :param path: str: path to  api endpoint
+        :param kwargs: json: arguments auth, headers, data ..etc. With
+        stream=True the body is left unread, see StreamedResponse.
+
+        :return: BufferedResponse object, or StreamedResponse object
+
+        """
+        try:
+            return await self._request('POST', path, **kwargs)
+        except aiohttp.ClientError as e:
+            raise e
+
+    async def close(self):
+        """
+        Close the pooled connections.
+        """
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
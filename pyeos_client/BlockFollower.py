@@ -0,0 +1,194 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+.. module:: BlockFollower
+   :synopsis: Follow the head or the last irreversible block of a chain,
+              yielding every new block once and reporting forks.
+.. author:: Merouane Benthameur <merouane.benth@gmail.com>
+"""
+
+import asyncio
+import inspect
+import time
+from collections import deque, namedtuple
+
+from pyeos_client.FastJson import decode_response
+
+BlockEvent = namedtuple('BlockEvent', ['action', 'block_num', 'block_id', 'block'])
+BlockEvent.__doc__ = """ an event emitted by BlockFollower.
+
+action is 'block' when a new block is applied and 'rollback' when a
+previously yielded block was dropped by a fork, in which case block is None.
+"""
+
+BLOCK = 'block'
+ROLLBACK = 'rollback'
+
+
+class BlockFollower:
+    """ a generator of chain events built on get_info and get_block
+
+    It is iterated with `for` over a ChainAPI, and with `async for` over an
+    AsyncChainAPI.
+    """
+
+    def __init__(self, chain_api, start=None, end=None, irreversible=False,
+                 block_interval=0.5, max_interval=5.0, concurrency=8,
+                 prefetch_threshold=2, max_fork_depth=1024, sleep=None):
+        """
+        constructor of the BlockFollower
+
+        :param chain_api: ChainAPI or AsyncChainAPI object
+        :param start: (int) first block to yield, defaults to the current
+        head (or last irreversible) block
+        :param end: (int) stop after this block, follow forever when None
+        :param irreversible: (bool) follow last_irreversible_block_num
+        instead of head_block_num
+        :param block_interval: (float) expected time between two blocks
+        :param max_interval: (float) upper bound of the polling interval
+        when the node stops producing
+        :param concurrency: (int) requests kept in flight while catching up
+        :param prefetch_threshold: (int) number of missing blocks from which
+        the range is fetched concurrently through ChainAPI.get_blocks
+        :param max_fork_depth: (int) number of recent block ids remembered
+        to resolve forks
+        :param sleep: callable used to wait between polls, time.sleep by
+        default, asyncio.sleep when iterated with `async for`
+        """
+        self.chain_api = chain_api
+        self.next_block_num = start
+        self.end = end
+        self.irreversible = irreversible
+        self.block_interval = block_interval
+        self.max_interval = max_interval
+        self.concurrency = concurrency
+        self.prefetch_threshold = prefetch_threshold
+        self.sleep = sleep
+        self.recent = deque(maxlen=max_fork_depth)
+        self._interval = block_interval
+
+    def __iter__(self):
+        sleep = self.sleep or time.sleep
+        while self._following():
+            target = self._target_block_num(self.chain_api.get_info())
+            if target is None:
+                sleep(self._backoff())
+                continue
+            for event in self._apply_range(self.next_block_num, target):
+                yield event
+
+    async def __aiter__(self):
+        sleep = self.sleep or asyncio.sleep
+        while self._following():
+            target = self._target_block_num(await self.chain_api.get_info())
+            if target is None:
+                waited = sleep(self._backoff())
+                if inspect.isawaitable(waited):
+                    await waited
+                continue
+            async for event in self._async_apply_range(self.next_block_num, target):
+                yield event
+
+    def _following(self):
+        return self.end is None or self.next_block_num is None or self.next_block_num <= self.end
+
+    def _target_block_num(self, response):
+        """
+        Get the last block to apply from a get_info answer.
+
+        :return: int, None when there is no new block yet
+        """
+        response.raise_for_status()
+        info = decode_response(response)
+        if self.irreversible:
+            target = info['last_irreversible_block_num']
+        else:
+            target = info['head_block_num']
+        if self.next_block_num is None:
+            self.next_block_num = target
+        if self.end is not None:
+            target = min(target, self.end)
+        if self.next_block_num > target:
+            return None
+        self._interval = self.block_interval / 2
+        return target
+
+    def _backoff(self):
+        interval = self._interval
+        self._interval = min(self._interval * 2, self.max_interval)
+        return interval
+
+    def _apply_range(self, start, end):
+        if end - start + 1 >= self.prefetch_threshold:
+            blocks = self.chain_api.get_blocks(start, end, concurrency=self.concurrency)
+        else:
+            blocks = (self.chain_api._fetch_block(block_num) for block_num in range(start, end + 1))
+        try:
+            for block in blocks:
+                if self._forked(block):
+                    for event in self._rollback(block):
+                        yield event
+                    # blocks past the fork point are fetched again from the new branch.
+                    return
+                yield self._apply(block)
+        finally:
+            if hasattr(blocks, 'close'):
+                blocks.close()
+
+    async def _async_apply_range(self, start, end):
+        if end - start + 1 >= self.prefetch_threshold:
+            blocks = self.chain_api.get_blocks(start, end, concurrency=self.concurrency)
+        else:
+            blocks = _fetch_blocks(self.chain_api, start, end)
+        try:
+            async for block in blocks:
+                if self._forked(block):
+                    async for event in self._async_rollback(block):
+                        yield event
+                    return
+                yield self._apply(block)
+        finally:
+            await blocks.aclose()
+
+    def _forked(self, block):
+        return bool(self.recent) and block['previous'] != self.recent[-1][1]
+
+    def _apply(self, block):
+        self.recent.append((block['block_num'], block['id']))
+        self.next_block_num = block['block_num'] + 1
+        return BlockEvent(BLOCK, block['block_num'], block['id'], block)
+
+    def _rollback(self, block):
+        """
+        Walk back from `block` until its ancestor is a block already
+        yielded, emitting a rollback event for every orphaned block.
+        """
+        while self._forked(block):
+            event = self._pop()
+            yield event
+            if self.recent:
+                block = self.chain_api._fetch_block(event.block_num)
+        self._resume(block)
+
+    async def _async_rollback(self, block):
+        while self._forked(block):
+            event = self._pop()
+            yield event
+            if self.recent:
+                block = await self.chain_api._fetch_block(event.block_num)
+        self._resume(block)
+
+    def _pop(self):
+        block_num, block_id = self.recent.pop()
+        return BlockEvent(ROLLBACK, block_num, block_id, None)
+
+    def _resume(self, block):
+        if not self.recent:
+            raise RuntimeError('fork deeper than max_fork_depth at block %s' % block['block_num'])
+        self.next_block_num = self.recent[-1][0] + 1
+
+
+async def _fetch_blocks(chain_api, start, end):
+    for block_num in range(start, end + 1):
+        yield await chain_api._fetch_block(block_num)
@@ -0,0 +1,269 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+.. module:: BlockStore
+   :synopsis: A local, append-only store of irreversible blocks, indexed by
+              block number and read through a memory map.
+.. author:: Merouane Benthameur <merouane.benth@gmail.com>
+"""
+
+import asyncio
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+
+import requests
+
+from pyeos_client.FastJson import decode_response, loads
+from pyeos_client.NodeosConnect import BufferedResponse, is_json_text, request_body
+
+try:
+    import aiohttp
+except ImportError:  # pragma: no cover - optional dependency
+    aiohttp = None
+
+# errors of a get_info sent by an AsyncChainAPI.
+_ASYNC_ERRORS = (requests.exceptions.RequestException, ValueError, asyncio.TimeoutError)
+if aiohttp is not None:
+    _ASYNC_ERRORS += (aiohttp.ClientError,)
+
+# block number, offset in the segment and size of a stored block.
+INDEX_ENTRY = struct.Struct('<IQI')
+
+
+def block_num_of(block_id):
+    """
+    Get the number of a block from the argument of get_block.
+
+    :param block_id: (int or str) number or id of the block, or a string of a json
+    :return: tuple: (block number, block id or None)
+    """
+    if is_json_text(block_id):
+        block_id = json.loads(block_id)['block_num_or_id']
+    if isinstance(block_id, str) and len(block_id) == 64:
+        # the first 4 bytes of an id are the number of the block.
+        return int(block_id[:8], 16), block_id
+    return int(block_id), None
+
+
+class BlockStore:
+    """ an on-disk store of blocks, as returned by get_block
+
+    Blocks are appended to a segment file, `blocks.log`, and their offset
+    is recorded in `blocks.index`. Only irreversible blocks are written,
+    so a stored block never has to be replaced.
+
+    :Example:
+
+    >>> store = BlockStore('/var/lib/blocks')
+    >>> chainapi = ChainAPI(connection, block_store=store)
+    >>> for block in chainapi.get_blocks(start=1, end=1000000):
+    ...     apply(block)
+    """
+
+    def __init__(self, path, lib_interval=1.0, clock=time.monotonic):
+        """
+        constructor of the BlockStore
+
+        :param path: (str) directory of the store, created when missing
+        :param lib_interval: (float) minimum seconds between two get_info
+        calls checking whether a block became irreversible
+        :param clock: callable returning the current time in seconds
+        """
+        self.path = path
+        self.lib_interval = lib_interval
+        self.clock = clock
+        self.last_irreversible = 0
+        self._lib_checked_at = None
+        self.lock = threading.Lock()
+        self._lib_lock = threading.Lock()
+        self.index = {}
+        os.makedirs(path, exist_ok=True)
+        self._segment = open(os.path.join(path, 'blocks.log'), 'ab')
+        self._index_file = open(os.path.join(path, 'blocks.index'), 'ab')
+        self._map = None
+        self._load_index()
+
+    def _load_index(self):
+        size = self._segment.seek(0, os.SEEK_END)
+        with open(self._index_file.name, 'rb') as f:
+            data = f.read()
+        valid = len(data) - len(data) % INDEX_ENTRY.size
+        entries = list(INDEX_ENTRY.iter_unpack(data[:valid]))
+        for block_num, offset, length in entries:
+            # entries written without their block, after a crash, are ignored.
+            if offset + length <= size:
+                self.index[block_num] = (offset, length)
+        end = max([offset + length for offset, length in self.index.values()] or [0])
+        if end < size:
+            # a block written without its index entry, it is fetched again.
+            self._segment.truncate(end)
+        if valid != len(data) or len(self.index) != len(entries):
+            # the dropped entries would point into the blocks appended next.
+            self._index_file.truncate(0)
+            self._index_file.write(b''.join(
+                INDEX_ENTRY.pack(block_num, offset, length)
+                for block_num, (offset, length) in sorted(self.index.items(), key=lambda item: item[1])))
+            self._index_file.flush()
+
+    def __len__(self):
+        return len(self.index)
+
+    def __contains__(self, block_num):
+        return block_num in self.index
+
+    def put(self, block_num, content):
+        """
+        Append a block, unless it is already stored.
+
+        :param block_num: (int) number of the block
+        :param content: (bytes) json of the block, as returned by get_block
+        """
+        with self.lock:
+            if block_num in self.index:
+                return
+            offset = self._segment.seek(0, os.SEEK_END)
+            self._segment.write(content)
+            self._segment.flush()
+            self._index_file.write(INDEX_ENTRY.pack(block_num, offset, len(content)))
+            self._index_file.flush()
+            self.index[block_num] = (offset, len(content))
+
+    def get_raw(self, block_num):
+        """
+        Read the json of a stored block.
+
+        :param block_num: (int) number of the block
+        :return: bytes, None when the block is not stored
+        """
+        entry = self.index.get(block_num)
+        if entry is None:
+            return None
+        offset, length = entry
+        block_map = self._map
+        if block_map is None or offset + length > len(block_map):
+            block_map = self._remap()
+        return block_map[offset:offset + length]
+
+    def get(self, block_num):
+        """
+        Read a stored block.
+
+        :param block_num: (int) number of the block
+        :return: json: the block, None when it is not stored
+        """
+        content = self.get_raw(block_num)
+        return None if content is None else loads(content)
+
+    def _remap(self):
+        with self.lock:
+            self._segment.flush()
+            size = os.fstat(self._segment.fileno()).st_size
+            if self._map is None or len(self._map) < size:
+                # readers may still hold the previous map, it is left to the gc.
+                with open(self._segment.name, 'rb') as f:
+                    self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            return self._map
+
+    def get_block(self, chain_api, block_id):
+        """
+        Get a block from the store, or from the node when it is missing.
+        A block fetched from the node is stored once it is irreversible.
+
+        :param chain_api: ChainAPI object used on a miss
+        :param block_id: (int or str) number or id of the block, or a string of a json
+        :return: response object
+        """
+        block_num, expected_id = block_num_of(block_id)
+        response = self._stored(block_num, expected_id)
+        if response is not None:
+            return response
+        response = chain_api.session.post(path='/v1/chain/get_block',
+                                          data=request_body(block_id, 'block_num_or_id'))
+        # a block asked by id may belong to a fork, only blocks asked by number are stored.
+        if expected_id is None and response.ok and self._is_irreversible(chain_api, block_num):
+            self.put(block_num, response.content)
+        return response
+
+    async def async_get_block(self, chain_api, block_id):
+        """
+        Get a block from the store, or from the node with an AsyncChainAPI
+        when it is missing, like get_block.
+
+        :param chain_api: AsyncChainAPI object used on a miss
+        :param block_id: (int or str) number or id of the block, or a string of a json
+        :return: BufferedResponse object
+        """
+        block_num, expected_id = block_num_of(block_id)
+        response = self._stored(block_num, expected_id)
+        if response is not None:
+            return response
+        response = await chain_api.session.post(path='/v1/chain/get_block',
+                                                data=request_body(block_id, 'block_num_or_id'))
+        if expected_id is None and response.ok and await self._async_is_irreversible(chain_api, block_num):
+            self.put(block_num, response.content)
+        return response
+
+    def _stored(self, block_num, expected_id):
+        content = self.get_raw(block_num)
+        if content is not None:
+            if expected_id is None or loads(content)['id'] == expected_id:
+                return BufferedResponse(status_code=200, content=content, reason='OK')
+        return None
+
+    def _is_irreversible(self, chain_api, block_num):
+        if block_num <= self.last_irreversible:
+            return True
+        with self._lib_lock:
+            # concurrent callers wait for the get_info of the first one.
+            if self._lib_check_due(block_num):
+                try:
+                    self._set_last_irreversible(chain_api.get_info())
+                except (requests.exceptions.RequestException, ValueError):
+                    # the block was fetched, it is only not stored yet.
+                    return False
+            return block_num <= self.last_irreversible
+
+    async def _async_is_irreversible(self, chain_api, block_num):
+        if block_num <= self.last_irreversible:
+            return True
+        with self._lib_lock:
+            due = self._lib_check_due(block_num)
+        # concurrent coroutines do not wait, their block is stored later.
+        if due:
+            try:
+                self._set_last_irreversible(await chain_api.get_info())
+            except _ASYNC_ERRORS:
+                return False
+        return block_num <= self.last_irreversible
+
+    def _lib_check_due(self, block_num):
+        now = self.clock()
+        if block_num > self.last_irreversible and (
+                self._lib_checked_at is None or now - self._lib_checked_at >= self.lib_interval):
+            self._lib_checked_at = now
+            return True
+        return False
+
+    def _set_last_irreversible(self, response):
+        response.raise_for_status()
+        self.last_irreversible = decode_response(response)['last_irreversible_block_num']
+
+    def close(self):
+        """
+        Close the files of the store.
+        """
+        with self.lock:
+            self._segment.close()
+            self._index_file.close()
+            self._map = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
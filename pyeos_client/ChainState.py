@@ -0,0 +1,164 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+.. module:: ChainState
+   :synopsis: A shared cache of get_info, refreshed in the background, handing
+              out TAPOS references and the chain id without I/O.
+.. author:: Merouane Benthameur <merouane.benth@gmail.com>
+"""
+
+import calendar
+import struct
+import threading
+import time
+
+from pyeos_client.FastJson import decode_response
+
+
+def tapos_from_block_id(block_id):
+    """
+    Compute the TAPOS reference of a block from its id.
+
+    :param block_id: (str) hex id of the block
+    :return: dict: ref_block_num and ref_block_prefix
+    """
+    data = bytes.fromhex(block_id)
+    return {
+        'ref_block_num': struct.unpack_from('>I', data, 0)[0] & 0xffff,
+        'ref_block_prefix': struct.unpack_from('<I', data, 8)[0],
+    }
+
+
+class ChainStateCache:
+    """ a cache of the head and last irreversible block of a chain"""
+
+    def __init__(self, chain_api, refresh_interval=0.5, max_age=None,
+                 irreversible=False, clock=time.monotonic):
+        """
+        constructor of the ChainStateCache
+
+        :param chain_api: ChainAPI object
+        :param refresh_interval: (float) seconds between two background refreshes
+        :param max_age: (float) age from which a cached state is refreshed in the
+        caller's thread, defaults to 10 times the refresh interval
+        :param irreversible: (bool) reference the last irreversible block
+        instead of the head block in TAPOS
+        :param clock: callable returning the current time in seconds
+        """
+        self.chain_api = chain_api
+        self.refresh_interval = refresh_interval
+        self.max_age = max_age if max_age is not None else 10 * refresh_interval
+        self.irreversible = irreversible
+        self.clock = clock
+        self.info = None
+        self.tapos = None
+        self.updated_at = None
+        self.lock = threading.Lock()
+        self._in_flight = None
+        self._error = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """
+        Start refreshing the state in a background thread.
+        """
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        """
+        Stop the background refresh.
+        """
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.refresh()
+            except Exception:
+                # keep serving the last state, callers refresh it themselves past max_age.
+                pass
+            self._stop.wait(self.refresh_interval)
+
+    def refresh(self):
+        """
+        Fetch get_info. Concurrent callers share a single in-flight request.
+
+        :return: json: get_info result
+        """
+        with self.lock:
+            in_flight = self._in_flight
+            leader = in_flight is None
+            if leader:
+                in_flight = self._in_flight = threading.Event()
+        if not leader:
+            in_flight.wait()
+            if self._error is not None:
+                raise self._error
+            return self.info
+        try:
+            response = self.chain_api.get_info()
+            response.raise_for_status()
+            info = decode_response(response)
+            block_id = info.get('last_irreversible_block_id') if self.irreversible else None
+            tapos = tapos_from_block_id(block_id or info['head_block_id'])
+            self.info, self.tapos, self.updated_at = info, tapos, self.clock()
+            self._error = None
+            return info
+        except Exception as e:
+            self._error = e
+            raise
+        finally:
+            with self.lock:
+                self._in_flight = None
+            in_flight.set()
+
+    def get_info(self):
+        """
+        Get the cached get_info result, fetching it only when it is missing
+        or older than max_age.
+
+        :return: json: get_info result
+        """
+        if self.updated_at is None or self.clock() - self.updated_at > self.max_age:
+            return self.refresh()
+        return self.info
+
+    def get_tapos(self):
+        """
+        Get the TAPOS reference of the cached block.
+
+        :return: dict: ref_block_num and ref_block_prefix
+        """
+        self.get_info()
+        return dict(self.tapos)
+
+    @property
+    def chain_id(self):
+        """ id of the chain, as reported by get_info"""
+        return self.get_info()['chain_id']
+
+    def expiration(self, seconds=30):
+        """
+        Compute a transaction expiration relative to the head block time.
+
+        :param seconds: (int) lifetime of the transaction
+        :return: str: expiration, eg. 2018-06-01T12:00:30
+        """
+        head_time = self.get_info()['head_block_time'].split('.')[0]
+        expires = calendar.timegm(time.strptime(head_time, '%Y-%m-%dT%H:%M:%S')) + seconds
+        return time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime(expires))
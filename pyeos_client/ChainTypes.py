@@ -0,0 +1,176 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+.. module:: ChainTypes
+   :synopsis: Typed, lightweight views over the json answers of the chain
+              api, whose nested parts are wrapped on first access.
+.. author:: Merouane Benthameur <merouane.benth@gmail.com>
+"""
+
+from pyeos_client.FastJson import decode_response
+
+
+def _field(name, doc=None):
+    def getter(self):
+        return self.raw.get(name)
+    return property(getter, doc=doc or name)
+
+
+class ChainResult:
+    """ base of the typed results, a read-only view over decoded json"""
+
+    __slots__ = ('raw',)
+
+    def __init__(self, raw):
+        self.raw = raw
+
+    @classmethod
+    def from_response(cls, response):
+        """
+        Decode a response with the fast json backend.
+
+        :param response: response object
+        :return: typed result
+        """
+        response.raise_for_status()
+        return cls(decode_response(response))
+
+    def __getitem__(self, key):
+        return self.raw[key]
+
+    def get(self, key, default=None):
+        return self.raw.get(key, default)
+
+    def __repr__(self):
+        return '<%s %r>' % (type(self).__name__, dict(list(self.raw.items())[:3]))
+
+
+class ChainInfo(ChainResult):
+    """ result of get_info"""
+
+    __slots__ = ()
+
+    server_version = _field('server_version')
+    chain_id = _field('chain_id')
+    head_block_num = _field('head_block_num')
+    head_block_id = _field('head_block_id')
+    head_block_time = _field('head_block_time')
+    head_block_producer = _field('head_block_producer')
+    last_irreversible_block_num = _field('last_irreversible_block_num')
+    last_irreversible_block_id = _field('last_irreversible_block_id')
+
+
+class Action(ChainResult):
+    """ an action of a transaction"""
+
+    __slots__ = ()
+
+    account = _field('account')
+    name = _field('name')
+    authorization = _field('authorization')
+    data = _field('data', 'arguments of the action, decoded when the node knows the ABI')
+    hex_data = _field('hex_data')
+
+
+class BlockTransaction(ChainResult):
+    """ a transaction receipt of a block"""
+
+    __slots__ = ('_actions',)
+
+    status = _field('status')
+    cpu_usage_us = _field('cpu_usage_us')
+    net_usage_words = _field('net_usage_words')
+
+    def __init__(self, raw):
+        ChainResult.__init__(self, raw)
+        self._actions = None
+
+    @property
+    def trx(self):
+        """ the transaction, or its id for deferred transactions"""
+        return self.raw.get('trx')
+
+    @property
+    def id(self):
+        trx = self.trx
+        return trx if isinstance(trx, str) else trx.get('id')
+
+    @property
+    def actions(self):
+        """ list of Action, built on first access"""
+        if self._actions is None:
+            trx = self.trx
+            if isinstance(trx, dict):
+                actions = trx.get('transaction', {}).get('actions', [])
+            else:
+                actions = []
+            self._actions = [Action(action) for action in actions]
+        return self._actions
+
+
+class Block(ChainResult):
+    """ result of get_block"""
+
+    __slots__ = ('_transactions',)
+
+    id = _field('id')
+    block_num = _field('block_num')
+    previous = _field('previous')
+    timestamp = _field('timestamp')
+    producer = _field('producer')
+    ref_block_prefix = _field('ref_block_prefix')
+
+    def __init__(self, raw):
+        ChainResult.__init__(self, raw)
+        self._transactions = None
+
+    @property
+    def transactions(self):
+        """ list of BlockTransaction, built on first access"""
+        if self._transactions is None:
+            self._transactions = [BlockTransaction(trx) for trx in self.raw.get('transactions', [])]
+        return self._transactions
+
+    def iter_actions(self):
+        """
+        Iterate over the actions of every transaction of the block.
+
+        :return: generator of (BlockTransaction, Action) tuples
+        """
+        for trx in self.transactions:
+            for action in trx.actions:
+                yield trx, action
+
+
+class Account(ChainResult):
+    """ result of get_account"""
+
+    __slots__ = ()
+
+    account_name = _field('account_name')
+    head_block_num = _field('head_block_num')
+    created = _field('created')
+    privileged = _field('privileged')
+    core_liquid_balance = _field('core_liquid_balance')
+    ram_quota = _field('ram_quota')
+    ram_usage = _field('ram_usage')
+    net_limit = _field('net_limit')
+    cpu_limit = _field('cpu_limit')
+    permissions = _field('permissions')
+
+
+class TableRows(ChainResult):
+    """ result of get_table_rows"""
+
+    __slots__ = ()
+
+    rows = _field('rows')
+    more = _field('more')
+    next_key = _field('next_key')
+
+    def __iter__(self):
+        return iter(self.raw['rows'])
+
+    def __len__(self):
+        return len(self.raw['rows'])
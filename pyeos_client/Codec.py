@@ -0,0 +1,291 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+.. module:: Codec
+   :synopsis: Encoding of names, symbols, assets and times, one at a time with
+              memoized functions or by whole lists and numpy arrays.
+.. author:: Merouane Benthameur <merouane.benth@gmail.com>
+"""
+
+import calendar
+import time
+from array import array
+from functools import lru_cache
+
+try:
+    import numpy
+except ImportError:  # pragma: no cover - optional dependency
+    numpy = None
+
+NAME_CHARMAP = '.12345abcdefghijklmnopqrstuvwxyz'
+
+# number of values kept by each memoized function.
+CACHE_SIZE = 65536
+
+_NAME_VALUES = dict((c, i) for i, c in enumerate(NAME_CHARMAP))
+
+if numpy is not None:
+    # 0xff marks the bytes which are not name characters, 0 the padding.
+    _NAME_TABLE = numpy.full(256, 0xff, dtype=numpy.uint8)
+    _NAME_TABLE[0] = 0
+    for _i, _c in enumerate(NAME_CHARMAP.encode()):
+        _NAME_TABLE[_c] = _i
+    _NAME_CHARS = numpy.frombuffer(NAME_CHARMAP.encode(), dtype=numpy.uint8)
+    _NAME_SHIFTS = numpy.array([59 - 5 * i for i in range(12)] + [0], dtype=numpy.uint64)
+    _NAME_MASKS = numpy.array([0x1f] * 12 + [0x0f], dtype=numpy.uint64)
+
+
+class AbiError(Exception):
+    """ raised when a value does not match the ABI"""
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def string_to_name(s):
+    """
+    Encode an account or action name as uint64.
+
+    :param s: (str) name, up to 13 characters
+    :return: int
+    """
+    if len(s) > 13:
+        raise AbiError('name %r is longer than 13 characters' % s)
+    value = 0
+    for i, c in enumerate(s):
+        symbol = _NAME_VALUES.get(c)
+        if symbol is None:
+            raise AbiError('invalid character %r in name' % c)
+        if i < 12:
+            value |= symbol << (59 - 5 * i)
+        elif symbol > 0x0f:
+            raise AbiError('invalid 13th character in name %r' % s)
+        else:
+            value |= symbol
+    return value
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def name_to_string(value):
+    """
+    Decode an uint64 name.
+
+    :param value: (int) encoded name
+    :return: str
+    """
+    chars = ['.'] * 13
+    for i in range(13):
+        if i == 0:
+            chars[12] = NAME_CHARMAP[value & 0x0f]
+            value >>= 4
+        else:
+            chars[12 - i] = NAME_CHARMAP[value & 0x1f]
+            value >>= 5
+    return ''.join(chars).rstrip('.')
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def string_to_symbol_code(code):
+    """
+    Encode a symbol code (eg. EOS) as uint64.
+    """
+    if not code or len(code) > 7 or not all('A' <= c <= 'Z' for c in code):
+        raise AbiError('invalid symbol code %r' % code)
+    value = 0
+    for i, c in enumerate(code):
+        value |= ord(c) << (8 * i)
+    return value
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def symbol_code_to_string(value):
+    """
+    Decode an uint64 symbol code.
+    """
+    chars = []
+    while value:
+        chars.append(chr(value & 0xff))
+        value >>= 8
+    return ''.join(chars)
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def string_to_symbol(s):
+    """
+    Encode a symbol (eg. 4,EOS) as uint64.
+    """
+    try:
+        precision, code = s.split(',')
+        precision = int(precision)
+    except ValueError:
+        raise AbiError('invalid symbol %r' % s)
+    if not 0 <= precision <= 18:
+        raise AbiError('invalid precision in symbol %r' % s)
+    return (string_to_symbol_code(code) << 8) | precision
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def symbol_to_string(value):
+    """
+    Decode an uint64 symbol.
+    """
+    return '%d,%s' % (value & 0xff, symbol_code_to_string(value >> 8))
+
+
+def string_to_asset(s):
+    """
+    Parse an asset (eg. 1.0000 EOS) into its amount and symbol.
+
+    :param s: (str) asset
+    :return: tuple: (int amount, int symbol)
+    """
+    try:
+        amount, code = s.strip().split(' ')
+    except ValueError:
+        raise AbiError('invalid asset %r' % s)
+    integer, _, fraction = amount.partition('.')
+    negative = integer.startswith('-')
+    digits = integer.lstrip('-') + fraction
+    if not digits.isdigit():
+        raise AbiError('invalid amount in asset %r' % s)
+    value = int(digits)
+    if negative:
+        value = -value
+    return value, (string_to_symbol_code(code) << 8) | len(fraction)
+
+
+def asset_to_string(amount, symbol):
+    """
+    Format an amount and a symbol as an asset string.
+    """
+    precision = symbol & 0xff
+    sign = '-' if amount < 0 else ''
+    digits = str(abs(amount)).rjust(precision + 1, '0')
+    if precision:
+        digits = digits[:-precision] + '.' + digits[-precision:]
+    return '%s%s %s' % (sign, digits, symbol_code_to_string(symbol >> 8))
+
+
+def string_to_time_point(s):
+    """
+    Parse a time of the chain, eg. 2018-06-01T12:00:30.500, as UTC.
+
+    :param s: (str) time, with an optional fraction and Z suffix
+    :return: int: microseconds since the unix epoch
+    """
+    s = s.rstrip('Z')
+    if '.' in s:
+        base, fraction = s.split('.')
+    else:
+        base, fraction = s, ''
+    seconds = calendar.timegm(time.strptime(base, '%Y-%m-%dT%H:%M:%S'))
+    micros = int((fraction + '000000')[:6])
+    return seconds * 1000000 + micros
+
+
+def time_point_to_string(micros, with_millis=True):
+    """
+    Format microseconds since the unix epoch as a time of the chain.
+
+    :param micros: (int) microseconds since the unix epoch
+    :param with_millis: (bool) append the milliseconds
+    :return: str
+    """
+    seconds, micros = divmod(micros, 1000000)
+    text = time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime(seconds))
+    if with_millis:
+        text += '.%03d' % (micros // 1000)
+    return text
+
+
+def key_value(key):
+    """
+    Get the uint64 value of a table key given as a number, a decimal
+    string or a name.
+
+    :param key: (int or str) key
+    :return: int
+    """
+    if isinstance(key, int):
+        return key
+    if key.isdigit():
+        return int(key)
+    return string_to_name(key)
+
+
+def encode_names(names):
+    """
+    Encode many names at once. A numpy array of strings is encoded with
+    vectorized operations.
+
+    :param names: iterable or numpy array of names
+    :return: numpy array of uint64 for a numpy input, array.array('Q') otherwise
+    """
+    if numpy is None or not isinstance(names, numpy.ndarray):
+        return array('Q', map(string_to_name, names))
+    if names.dtype.kind == 'U':
+        width, unit = names.dtype.itemsize // 4, numpy.uint32
+    elif names.dtype.kind == 'S':
+        width, unit = names.dtype.itemsize, numpy.uint8
+    else:
+        raise AbiError('names must be strings, not %s' % names.dtype)
+    # the characters of the names as code points, one row per name.
+    chars = numpy.ascontiguousarray(names).reshape(-1).view(unit).reshape(-1, width)
+    if width > 13:
+        if chars[:, 13:].any():
+            raise AbiError('a name is longer than 13 characters')
+        chars = chars[:, :13]
+    symbols = _NAME_TABLE[numpy.minimum(chars, 255)]
+    if (symbols == 0xff).any():
+        raise AbiError('invalid character in names')
+    if width >= 13 and (symbols[:, 12] > 0x0f).any():
+        raise AbiError('invalid 13th character in names')
+    values = numpy.zeros(len(symbols), dtype=numpy.uint64)
+    for i in range(symbols.shape[1]):
+        values |= symbols[:, i].astype(numpy.uint64) << _NAME_SHIFTS[i]
+    return values.reshape(names.shape)
+
+
+def decode_names(values):
+    """
+    Decode many uint64 names at once. A numpy array is decoded with
+    vectorized operations.
+
+    :param values: iterable or numpy array of encoded names
+    :return: numpy array of str for a numpy input, list of str otherwise
+    """
+    if numpy is None or not isinstance(values, numpy.ndarray):
+        return [name_to_string(value) for value in values]
+    flat = values.astype(numpy.uint64).reshape(-1, 1)
+    symbols = ((flat >> _NAME_SHIFTS) & _NAME_MASKS).astype(numpy.uint8)
+    raw = numpy.ascontiguousarray(_NAME_CHARS[symbols]).view('S13').reshape(-1)
+    return numpy.char.rstrip(raw, b'.').astype('U13').reshape(values.shape)
+
+
+def encode_assets(assets):
+    """
+    Parse many assets at once.
+
+    :param assets: iterable or numpy array of assets (eg. 1.0000 EOS)
+    :return: tuple: amounts and symbols, as numpy int64 and uint64 arrays
+    for a numpy input, as array.array('q') and array.array('Q') otherwise
+    """
+    amounts, symbols = array('q'), array('Q')
+    for asset in assets:
+        amount, symbol = string_to_asset(str(asset))
+        amounts.append(amount)
+        symbols.append(symbol)
+    if numpy is not None and isinstance(assets, numpy.ndarray):
+        return (numpy.frombuffer(amounts, dtype=numpy.int64).reshape(assets.shape),
+                numpy.frombuffer(symbols, dtype=numpy.uint64).reshape(assets.shape))
+    return amounts, symbols
+
+
+def decode_assets(amounts, symbols):
+    """
+    Format many amounts and symbols as asset strings.
+
+    :param amounts: iterable of amounts
+    :param symbols: iterable of encoded symbols
+    :return: list of str
+    """
+    return [asset_to_string(int(amount), int(symbol)) for amount, symbol in zip(amounts, symbols)]
@@ -0,0 +1,222 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+.. module:: ColumnarExport
+   :synopsis: Flatten the actions of a range of blocks into typed columns,
+              saved as raw files which numpy can memory-map.
+.. author:: Merouane Benthameur <merouane.benth@gmail.com>
+"""
+
+import json
+import os
+import sys
+from array import array
+from collections import OrderedDict
+
+from pyeos_client.AbiSerializer import AbiSerializer
+from pyeos_client.Codec import string_to_asset, string_to_name, string_to_time_point
+
+try:
+    import numpy
+except ImportError:  # pragma: no cover - optional dependency
+    numpy = None
+
+# name and array typecode of the columns. Names are encoded as uint64,
+# timestamps as milliseconds since the unix epoch, quantities as the int64
+# amount of their symbol.
+ACTION_COLUMNS = (
+    ('block_num', 'I'),
+    ('timestamp', 'q'),
+    ('account', 'Q'),
+    ('name', 'Q'),
+    ('actor', 'Q'),
+    ('from', 'Q'),
+    ('to', 'Q'),
+    ('quantity', 'q'),
+    ('symbol', 'Q'),
+)
+
+MANIFEST = 'columns.json'
+
+# decodes transfers whose data the node returned as hex only.
+_TRANSFER_SERIALIZER = AbiSerializer({
+    'structs': [{'name': 'transfer', 'base': '', 'fields': [
+        {'name': 'from', 'type': 'name'},
+        {'name': 'to', 'type': 'name'},
+        {'name': 'quantity', 'type': 'asset'},
+        {'name': 'memo', 'type': 'string'},
+    ]}],
+    'actions': [{'name': 'transfer', 'type': 'transfer'}],
+})
+
+
+def _dtype(column):
+    kind = 'i' if column.typecode.islower() else 'u'
+    return '%s%s%d' % ('<' if sys.byteorder == 'little' else '>', kind, column.itemsize)
+
+
+class ActionColumns:
+    """ the actions of executed transactions, one typed array per column
+
+    actor is the first authorizer of the action. from, to, quantity and
+    symbol are only set for the transfers of the token contracts, they are
+    0 for the other actions.
+
+    :Example:
+
+    >>> columns = ActionColumns()
+    >>> for block in ChainAPI.get_blocks(start=1, end=100000):
+    ...     columns.add_block(block)
+    >>> columns.save('/data/actions')
+    >>> actions = load_columns('/data/actions')
+    >>> actions['quantity'][actions['to'] == string_to_name('eosio.stake')].sum()
+    """
+
+    def __init__(self, token_contracts=('eosio.token',)):
+        """
+        constructor of the ActionColumns
+
+        :param token_contracts: accounts whose transfer actions fill the
+        from, to, quantity and symbol columns
+        """
+        self.token_contracts = frozenset(token_contracts)
+        self.columns = OrderedDict((name, array(typecode)) for name, typecode in ACTION_COLUMNS)
+
+    def __len__(self):
+        return len(self.columns['block_num'])
+
+    def add_block(self, block):
+        """
+        Append the actions of a block, as returned by get_block.
+
+        :param block: json: the block
+        """
+        block_num = block['block_num']
+        timestamp = string_to_time_point(block['timestamp']) // 1000
+        for receipt in block.get('transactions', ()):
+            trx = receipt.get('trx')
+            # deferred transactions only carry their id.
+            if receipt.get('status') != 'executed' or not isinstance(trx, dict):
+                continue
+            for action in trx.get('transaction', {}).get('actions', ()):
+                self.add_action(block_num, timestamp, action)
+
+    def add_action(self, block_num, timestamp, action):
+        """
+        Append an action.
+
+        :param block_num: (int) number of the block
+        :param timestamp: (int) time of the block, in milliseconds
+        :param action: json: the action
+        """
+        columns = self.columns
+        account = action['account']
+        authorization = action.get('authorization')
+        columns['block_num'].append(block_num)
+        columns['timestamp'].append(timestamp)
+        columns['account'].append(string_to_name(account))
+        columns['name'].append(string_to_name(action['name']))
+        columns['actor'].append(string_to_name(authorization[0]['actor']) if authorization else 0)
+        sender = receiver = amount = symbol = 0
+        if action['name'] == 'transfer' and account in self.token_contracts:
+            data = action.get('data')
+            if isinstance(data, str):
+                data = _TRANSFER_SERIALIZER.unpack_action_data('transfer', data)
+            sender, receiver = string_to_name(data['from']), string_to_name(data['to'])
+            amount, symbol = string_to_asset(data['quantity'])
+        columns['from'].append(sender)
+        columns['to'].append(receiver)
+        columns['quantity'].append(amount)
+        columns['symbol'].append(symbol)
+
+    def to_numpy(self):
+        """
+        View the columns as numpy arrays, without copying them.
+
+        :return: dict of numpy arrays
+        """
+        if numpy is None:
+            raise ImportError('numpy is required by ActionColumns.to_numpy')
+        return OrderedDict((name, numpy.frombuffer(column, dtype=_dtype(column)))
+                           for name, column in self.columns.items())
+
+    def save(self, path):
+        """
+        Write one raw file per column, and their layout in columns.json.
+
+        :param path: (str) directory, created when missing
+        """
+        os.makedirs(path, exist_ok=True)
+        for name, column in self.columns.items():
+            with open(os.path.join(path, name + '.bin'), 'wb') as f:
+                column.tofile(f)
+        manifest = {
+            'length': len(self),
+            'columns': OrderedDict((name, _dtype(column)) for name, column in self.columns.items()),
+        }
+        with open(os.path.join(path, MANIFEST), 'w') as f:
+            json.dump(manifest, f)
+
+
+def load_columns(path, mmap=True):
+    """
+    Load columns saved by ActionColumns.save. With numpy, the files are
+    memory-mapped read-only, otherwise they are read into arrays.
+
+    :param path: (str) directory of the columns
+    :param mmap: (bool) map the files instead of reading them, needs numpy
+    :return: dict of numpy arrays, or of array.array without numpy
+    """
+    with open(os.path.join(path, MANIFEST)) as f:
+        manifest = json.load(f)
+    length = manifest['length']
+    columns = OrderedDict()
+    for name, dtype in manifest['columns'].items():
+        file_name = os.path.join(path, name + '.bin')
+        if numpy is not None:
+            if mmap and length:
+                columns[name] = numpy.memmap(file_name, dtype=dtype, mode='r', shape=(length,))
+            else:
+                columns[name] = numpy.fromfile(file_name, dtype=dtype, count=length)
+        else:
+            column = array(dict(ACTION_COLUMNS)[name])
+            with open(file_name, 'rb') as f:
+                column.fromfile(f, length)
+            columns[name] = column
+    return columns
+
+
+def extract_actions(chain_api, start, end, concurrency=8, **kwargs):
+    """
+    Fetch a range of blocks and flatten their actions into columns.
+
+    :param chain_api: ChainAPI object
+    :param start: (int) number of the first block
+    :param end: (int) number of the last block, inclusive
+    :param concurrency: (int) number of get_block requests kept in flight
+    :param kwargs: other ActionColumns arguments (token_contracts ..etc.)
+    :return: ActionColumns object
+    """
+    columns = ActionColumns(**kwargs)
+    for block in chain_api.get_blocks(start, end, concurrency=concurrency):
+        columns.add_block(block)
+    return columns
+
+
+async def async_extract_actions(chain_api, start, end, concurrency=8, **kwargs):
+    """
+    Fetch a range of blocks with an AsyncChainAPI and flatten their actions
+    into columns.
+
+    :param chain_api: AsyncChainAPI object
+    :param start: (int) number of the first block
+    :param end: (int) number of the last block, inclusive
+    :param concurrency: (int) number of get_block requests kept in flight
+    :param kwargs: other ActionColumns arguments (token_contracts ..etc.)
+    :return: ActionColumns object
+    """
+    columns = ActionColumns(**kwargs)
+    async for block in chain_api.get_blocks(start, end, concurrency=concurrency):
+        columns.add_block(block)
+    return columns
@@ -7,22 +7,56 @@
 .. author:: Merouane Benthameur <merouane.benth@gmail.com>
 """
 
+import json
+import time
+from collections import namedtuple
+
+from pyeos_client.AbiSerializer import AbiSerializer
+from pyeos_client.BlockFollower import BlockFollower
+from pyeos_client.ChainTypes import Account, Block, ChainInfo, TableRows
+from pyeos_client.ColumnarExport import async_extract_actions, extract_actions
+from pyeos_client.FastJson import decode_response
+from pyeos_client.JsonStream import JsonArrayStream
+from pyeos_client.NodeosConnect import query_body, request_body
+from pyeos_client.Pipeline import async_map_ordered, map_ordered
+from pyeos_client.TableScanner import TableScanner, async_scan_scopes, scan_scopes
+from pyeos_client.Transaction import push_result_error, transaction_id
+
+PushResult = namedtuple('PushResult', ['transaction_id', 'result', 'error', 'latency'])
+PushResult.__doc__ = """ outcome of one transaction pushed by ChainAPI.submit_transactions.
+
+result is the decoded answer of the node on success, error the decoded
+error (or the exception raised) on failure, latency the seconds spent
+pushing the request carrying the transaction.
+"""
+
+# maximum number of transactions accepted by one push_transactions call.
+MAX_PUSH_TRANSACTIONS = 1000
+
 
 class ChainAPI:
     """ wrapper for EOS Chain API"""
 
-    def __init__(self, connection_session):
+    def __init__(self, connection_session, abi_cache=None, block_store=None):
         """
         constructor  of the ChainAPI
         :param connection_session: session request object.
+        :param abi_cache: AbiCache object used by get_abi_serializer, it may
+        be shared by several ChainAPI objects of the same chain.
+        :param block_store: BlockStore object get_block reads blocks from,
+        only missing blocks are fetched from the node.
         """
         self.session = connection_session
+        self.abi_cache = abi_cache
+        self.block_store = block_store
+        self._push_transactions_available = True
 
-    def get_info(self):
+    def get_info(self, typed=False):
         """
         Get latest information related to a node.
 
-        :return: response object
+        :param typed: (bool) return a ChainInfo, raising on http errors
+        :return: response object, or ChainInfo object
 
         :Example:
 
@@ -40,18 +74,20 @@ class ChainAPI:
 
         """
         path = '/v1/chain/get_info'
-        return self.session.get(path=path)
+        return self._result(self.session.get(path=path), ChainInfo, typed)
 
-    def get_block(self, block_id):
+    def get_block(self, block_id, typed=False):
         """
         Get information related to a block.
 
-        :param block_id: (str) the format must be a string of a json
-        :return: response object
+        :param block_id: (int or str) number or id of the block, or a
+        string of a json
+        :param typed: (bool) return a Block, raising on http errors
+        :return: response object, or Block object
 
         :Example:
 
-        >>> ChainAPI.get_block(block_id='{"block_num_or_id":5}')
+        >>> ChainAPI.get_block(5)
         {
           "previous": "0000000445a9f27898383fd7de32835d5d6a978cc14ce40d9f3jb",
           "timestamp": "2017-07-18T20:16:36",
@@ -66,19 +102,23 @@ class ChainAPI:
         }
 
         """
+        if self.block_store is not None:
+            return self._result(self._stored_block(block_id), Block, typed)
         path = '/v1/chain/get_block'
-        return self.session.post(path=path, data=block_id)
+        return self._result(self.session.post(path=path, data=request_body(block_id, 'block_num_or_id')),
+                            Block, typed)
 
-    def get_account(self, account_name):
+    def get_account(self, account_name, typed=False):
         """
         Get information related to an account.
 
-        :param account_name: (str) the format must be a string of a json
-        :return: response object
+        :param account_name: (str) name of the account, or a string of a json
+        :param typed: (bool) return an Account, raising on http errors
+        :return: response object, or Account object
 
         :Example:
 
-        >>> ChainAPI.get_account(account_name='{"account_name":"inita"}')
+        >>> ChainAPI.get_account("inita")
         {
           "name": "inita",
           "eos_balance": "999998.9574 EOS",
@@ -119,18 +159,46 @@ class ChainAPI:
 
         """
         path = '/v1/chain/get_account'
-        return self.session.post(path=path, data=account_name)
+        return self._result(self.session.post(path=path, data=request_body(account_name, 'account_name')),
+                            Account, typed)
+
+    def stream_block_transactions(self, block_id, chunk_size=65536):
+        """
+        Fetch a block, yielding its transactions while the response is
+        being received instead of decoding it at once. Only the transaction
+        being received is held in memory.
+
+        The other fields of the block are available in the `rest` attribute
+        of the stream once the transactions were consumed.
+
+        :param block_id: (int or str) number or id of the block, or a
+        string of a json
+        :param chunk_size: (int) size of the chunks read from the connection
+        :return: JsonArrayStream of transactions as json
+
+        :Example:
+
+        >>> stream = ChainAPI.stream_block_transactions(5)
+        >>> for trx in stream:
+        ...     print(trx["status"])
+        >>> stream.rest["id"]
+        '000000050c0175cbf218a70131ddc3c3fab8b6e954edef77e0bfe7c36b599b1d'
+
+        """
+        path = '/v1/chain/get_block'
+        return self._stream_array(path, request_body(block_id, 'block_num_or_id'),
+                                  'transactions', chunk_size)
 
     def get_code(self, account_name):
         """
         Fetch smart contract code.
 
-        :param account_name: (str) the format must be a string of a json
+        :param account_name: (str) name of the account, or a string of a json
         :return: response object
 
         :Example:
 
-        >>> ChainAPI.get_code(account_name='{"account_name":"currency"}')
+        >>> ChainAPI.get_code("currency")
         {
           "name":"currency",
           "code_hash":"a1c8c84b4700c09c8edb83522237439e33cf01",
@@ -175,20 +243,41 @@ class ChainAPI:
 
         """
         path = '/v1/chain/get_code'
-        return self.session.post(path=path, data=account_name)
+        return self.session.post(path=path, data=request_body(account_name, 'account_name'))
 
-    def get_table_rows(self, account_details):
+    def get_code_hash(self, account_name):
         """
-        Fetch smart contract data from an account.
+        Fetch the hash of the code of a smart contract, without the code.
 
-        :param account_details: (str) account details, the format
-        must be a string of a json
+        :param account_name: (str) name of the account, or a string of a json
         :return: response object
 
         :Example:
 
-        >>> ChainAPI.get_table_rows(account_details='{"scope":"inita",
-                "code":"currency", "table":"account","json": true}')
+        >>> ChainAPI.get_code_hash("currency")
+        {
+          "account_name": "currency",
+          "code_hash": "a1c8c84b4700c09c8edb83522237439e33cf011a4d7ace51075998bd002e04c9"
+        }
+
+        """
+        path = '/v1/chain/get_code_hash'
+        return self.session.post(path=path, data=request_body(account_name, 'account_name'))
+
+    def get_table_rows(self, account_details=None, typed=False, **query):
+        """
+        Fetch smart contract data from an account.
+
+        :param account_details: (dict or str) account details, a dict or a
+        string of a json
+        :param typed: (bool) return a TableRows, raising on http errors
+        :param query: fields of the request (code, scope, table, limit
+        ..etc.), json defaults to true when no account_details are given
+        :return: response object, or TableRows object
+
+        :Example:
+
+        >>> ChainAPI.get_table_rows(code="currency", scope="inita", table="account")
         {
           "rows": [
             {
@@ -200,22 +289,83 @@ class ChainAPI:
         }
 
         """
+        account_details = query_body(account_details, query, {"json": True})
         path = '/v1/chain/get_table_rows'
-        return self.session.post(path=path, data=account_details)
+        return self._result(self.session.post(path=path, data=account_details), TableRows, typed)
+
+    def stream_table_rows(self, account_details=None, chunk_size=65536, **query):
+        """
+        Fetch smart contract data from an account, yielding the rows while
+        the response is being received. Only the row being received is
+        held in memory.
+
+        more and next_key are available in the `rest` attribute of the
+        stream once the rows were consumed.
+
+        :param account_details: (dict or str) account details, a dict or a
+        string of a json
+        :param chunk_size: (int) size of the chunks read from the connection
+        :param query: fields of the request (code, scope, table, limit
+        ..etc.), json defaults to true when no account_details are given
+        :return: JsonArrayStream of rows
+
+        :Example:
+
+        >>> stream = ChainAPI.stream_table_rows(code="eosio", scope="eosio",
+                                                table="voters", limit=100000)
+        >>> for row in stream:
+        ...     print(row["owner"])
+        >>> stream.rest["more"]
+        True
 
-    def abi_json_to_bin(self, data):
+        """
+        account_details = query_body(account_details, query, {"json": True})
+        path = '/v1/chain/get_table_rows'
+        return self._stream_array(path, account_details, 'rows', chunk_size)
+
+    def get_table_by_scope(self, data=None, **query):
+        """
+        List the scopes of a contract and their number of rows.
+
+        :param data: (dict or str) a dict or a string of a json
+        :param query: fields of the request (code, table, lower_bound, limit
+        ..etc.), added to data when it is a dict
+        :return: response object
+
+        :Example:
+
+        >>> ChainAPI.get_table_by_scope(code="eosio.token", table="accounts", limit=2)
+        {
+          "rows": [
+            {
+              "code": "eosio.token",
+              "scope": "inita",
+              "table": "accounts",
+              "payer": "inita",
+              "count": 1
+            }
+          ],
+          "more": "initb"
+        }
+
+        """
+        path = '/v1/chain/get_table_by_scope'
+        return self.session.post(path=path, data=query_body(data, query))
+
+    def abi_json_to_bin(self, data=None, **query):
         """
         Serialize json to binary hex. The resulting binary hex is usually
         used for the data field in push_transaction.
 
-        :param data: (str) the format must be a string of a json
+        :param data: (dict or str) a dict or a string of a json
+        :param query: fields of the request (code, action, args), added to
+        data when it is a dict
         :return: response object
 
         :Example:
 
-        >>> ChainAPI.abi_json_to_bin(data='{"code":"currency",
-                "action":"transfer", "args":{"from":"initb",
-                "to":"initc", "quantity":1000}}')
+        >>> ChainAPI.abi_json_to_bin(code="currency", action="transfer",
+                args={"from": "initb", "to": "initc", "quantity": 1000})
         {
           "binargs": "000000008093dd74000000000094dd74e803000000000000",
           "required_scope": [],
@@ -224,19 +374,21 @@ class ChainAPI:
 
         """
         path = '/v1/chain/abi_json_to_bin'
-        return self.session.post(path=path, data=data)
+        return self.session.post(path=path, data=query_body(data, query))
 
-    def abi_bin_to_json(self, data):
+    def abi_bin_to_json(self, data=None, **query):
         """
         Serialize back binary hex to json.
 
-        :param data:  (str) the format must be a string of a json
+        :param data: (dict or str) a dict or a string of a json
+        :param query: fields of the request (code, action, binargs), added
+        to data when it is a dict
         :return:response object
 
         :Example:
 
-        >>> ChainAPI.abi_bin_to_json(data='{"code":"currency",
-                "action":"transfer", "binargs":"000000008093dd74000000000094dd74e803000000000000"}')
+        >>> ChainAPI.abi_bin_to_json(code="currency", action="transfer",
+                binargs="000000008093dd74000000000094dd74e803000000000000")
         {
           "args": {
             "from": "initb",
@@ -249,15 +401,37 @@ class ChainAPI:
 
         """
         path = '/v1/chain/abi_bin_to_json'
-        return self.session.post(path=path, data=data)
+        return self.session.post(path=path, data=query_body(data, query))
+
+    def get_abi_serializer(self, account_name):
+        """
+        Fetch the ABI of a contract once through get_code and return a
+        serializer packing and unpacking its data locally, without the
+        abi_json_to_bin and abi_bin_to_json round trips. The ABI comes from
+        the abi_cache when the ChainAPI has one.
+
+        :param account_name: (str) account of the contract
+        :return: AbiSerializer object
+
+        :Example:
+
+        >>> serializer = ChainAPI.get_abi_serializer(account_name="eosio.token")
+        >>> serializer.pack_action_data("transfer", {"from": "inita",
+                "to": "initb", "quantity": "1.0000 EOS", "memo": ""})
+        '000000000093dd74000000008093dd74102700000000000004454f530000000000'
+
+        """
+        if self.abi_cache is not None:
+            return self.abi_cache.get_serializer(self, account_name)
+        return AbiSerializer.from_chain(self, account_name)
 
     def push_transaction(self, transaction):
         """
         This method expects a transaction in JSON format and will
         attempt to apply it to the blockchain,
 
-        :param transaction: (str) transaction, the format must be a
-        string of a json
+        :param transaction: (dict or str) transaction, a dict or a string
+        of a json
         :return: response object
 
         :Example:
@@ -281,8 +455,8 @@ class ChainAPI:
         """
         This method push multiple transactions at once.
 
-        :param transactions: (str) list of transactions, the format must be a
-        string of a list
+        :param transactions: (list or str) list of transactions, a list of
+        dicts or a string of a json list
         :return: response object
 
         :Example:
@@ -299,15 +473,99 @@ class ChainAPI:
         }
 
         """
-        path = '/v1/chain/push_transaction'
+        path = '/v1/chain/push_transactions'
         return self.session.post(path=path, data=transactions)
 
-    def get_required_keys(self, transaction_data):
+    def submit_transactions(self, transactions, concurrency=8, batch_size=100):
+        """
+        Push many signed transactions, keeping up to `concurrency` requests
+        in flight.
+
+        Transactions are sent by chunks of `batch_size` through
+        push_transactions. When the node does not expose that endpoint, the
+        chunks it refused are pushed one by one through push_transaction,
+        as every transaction is with batch_size=None.
+
+        :param transactions: list of transactions, as dicts or json strings
+        :param concurrency: (int) number of requests kept in flight
+        :param batch_size: (int) transactions per push_transactions call,
+        None to always push them one by one
+        :return: list of PushResult, in the order of `transactions`
+
+        :Example:
+
+        >>> results = ChainAPI.submit_transactions(signed_transactions, concurrency=16)
+        >>> failed = [r for r in results if r.error is not None]
+
+        """
+        transactions = [json.loads(trx) if isinstance(trx, str) else trx for trx in transactions]
+        if batch_size and self._push_transactions_available:
+            chunks = _chunks(transactions, batch_size)
+            chunk_results = map_ordered(self._push_chunk, chunks, concurrency, limiter=self._limiter())
+            results, unsent = self._collect_chunk_results(chunks, chunk_results)
+            if unsent:
+                pushed = map_ordered(self._push_one, [trx for _, chunk in unsent for trx in chunk],
+                                     concurrency, limiter=self._limiter())
+                _splice_unsent(results, unsent, pushed)
+            return results
+        return list(map_ordered(self._push_one, transactions, concurrency, limiter=self._limiter()))
+
+    def _collect_chunk_results(self, chunks, chunk_results):
+        """
+        Flatten the results of the chunks pushed through push_transactions.
+
+        :return: tuple: (list of PushResult, with None in place of the
+        transactions of the refused chunks, list of (offset, chunk) of
+        the refused chunks)
+        """
+        results = []
+        unsent = []
+        for chunk, chunk_result in zip(chunks, chunk_results):
+            if chunk_result is None:
+                # the node lacks push_transactions, only this chunk is
+                # pushed again, one by one.
+                self._push_transactions_available = False
+                unsent.append((len(results), chunk))
+                chunk_result = [None] * len(chunk)
+            results.extend(chunk_result)
+        return results, unsent
+
+    def _push_one(self, transaction):
+        trx_id = _local_transaction_id(transaction)
+        start = time.monotonic()
+        try:
+            response = self.push_transaction(transaction=transaction)
+        except Exception as e:
+            return PushResult(trx_id, None, e, time.monotonic() - start)
+        return _push_result(trx_id, response, time.monotonic() - start)
+
+    def _push_chunk(self, transactions):
+        """
+        Push a chunk through push_transactions.
+
+        :return: list of PushResult, None if the node lacks the endpoint
+        """
+        if not self._push_transactions_available:
+            return None
+        trx_ids = [_local_transaction_id(transaction) for transaction in transactions]
+        start = time.monotonic()
+        try:
+            response = self.push_transactions(transactions=transactions)
+        except Exception as e:
+            latency = time.monotonic() - start
+            return [PushResult(trx_id, None, e, latency) for trx_id in trx_ids]
+        return _push_chunk_results(trx_ids, response, time.monotonic() - start)
+
+    def get_required_keys(self, transaction_data=None, transaction=None, available_keys=()):
         """
         Get required keys to sign a transaction from list of your keys.
 
-        :param transaction_data: (str) transaction data with a list of keys,
-        the format must be a string of a json
+        :param transaction_data: (dict or str) transaction data with a list
+        of keys, a dict or a string of a json
+        :param transaction: (dict or Transaction) transaction, when no
+        transaction_data is given
+        :param available_keys: list of public keys, when no transaction_data
+        is given
         :return: response object
 
         :Example:
@@ -320,5 +578,388 @@ class ChainAPI:
         }
 
         """
+        if transaction_data is None:
+            if hasattr(transaction, 'as_dict'):
+                transaction = transaction.as_dict()
+            transaction_data = {"transaction": transaction, "available_keys": list(available_keys)}
         path = '/v1/chain/get_required_keys'
         return self.session.post(path=path, data=transaction_data)
+
+    def get_blocks(self, start, end, concurrency=8, max_buffered=None):
+        """
+        Fetch a range of blocks, pipelining the requests over a pool of
+        worker threads. Blocks are yielded in block number order.
+
+        At most `max_buffered` blocks are requested ahead of the one being
+        yielded, so memory stays bounded whatever the size of the range.
+        When the connection has a FlowControl, the look-ahead also shrinks
+        with its concurrency limit.
+
+        :param start: (int) number of the first block
+        :param end: (int) number of the last block, inclusive
+        :param concurrency: (int) number of requests kept in flight
+        :param max_buffered: (int) size of the reorder buffer, defaults to
+        twice the concurrency
+        :return: generator of blocks as json
+
+        :Example:
+
+        >>> for block in ChainAPI.get_blocks(start=1, end=1000, concurrency=16):
+        ...     print(block["block_num"], block["id"])
+
+        """
+        return map_ordered(self._fetch_block, range(start, end + 1), concurrency, max_buffered,
+                           limiter=self._limiter())
+
+    def follow_blocks(self, start=None, irreversible=False, **kwargs):
+        """
+        Follow the chain, yielding every new block once.
+
+        :param start: (int) first block to yield, defaults to the current
+        head (or last irreversible) block
+        :param irreversible: (bool) follow last_irreversible_block_num
+        instead of head_block_num
+        :param kwargs: other BlockFollower arguments (end, block_interval ..etc.)
+        :return: generator of BlockEvent
+
+        :Example:
+
+        >>> for event in ChainAPI.follow_blocks(irreversible=True):
+        ...     if event.action == 'rollback':
+        ...         undo(event.block_num, event.block_id)
+        ...     else:
+        ...         apply(event.block)
+
+        """
+        return iter(BlockFollower(self, start=start, irreversible=irreversible, **kwargs))
+
+    def scan_table_rows(self, code, scope, table, partitions=1, **kwargs):
+        """
+        Stream every row of a table, following the pages of get_table_rows.
+
+        With `partitions` greater than one the numeric key range is split
+        in as many sub-ranges, scanned concurrently. Rows are still yielded
+        in key order.
+
+        :param code: (str) account of the contract
+        :param scope: (str) scope of the table, or None to scan every scope
+        reported by get_table_by_scope, yielding (scope, row) tuples
+        :param table: (str) name of the table
+        :param partitions: (int) number of key ranges, or of scopes when
+        scope is None, scanned concurrently
+        :param kwargs: other TableScanner arguments (lower_bound, upper_bound,
+        limit, index_position, key_type ..etc.)
+        :return: generator of rows
+
+        :Example:
+
+        >>> for row in ChainAPI.scan_table_rows(code="eosio", scope="eosio",
+        ...                                     table="producers", partitions=8):
+        ...     print(row["owner"])
+
+        """
+        if scope is None:
+            return scan_scopes(self, code, table, concurrency=partitions, **kwargs)
+        return iter(TableScanner(self, code, scope, table, partitions=partitions, **kwargs))
+
+    def extract_actions(self, start, end, concurrency=8, **kwargs):
+        """
+        Flatten the actions of a range of blocks into typed columns: names
+        as uint64, token transfer quantities as int64 amounts and symbols.
+
+        :param start: (int) number of the first block
+        :param end: (int) number of the last block, inclusive
+        :param concurrency: (int) number of requests kept in flight
+        :param kwargs: other ActionColumns arguments (token_contracts ..etc.)
+        :return: ActionColumns object
+
+        :Example:
+
+        >>> columns = ChainAPI.extract_actions(start=1, end=100000, concurrency=16)
+        >>> columns.save('/data/actions')
+        >>> columns.to_numpy()["quantity"].sum()
+
+        """
+        return extract_actions(self, start, end, concurrency=concurrency, **kwargs)
+
+    @staticmethod
+    def _result(response, result_type, typed):
+        return result_type.from_response(response) if typed else response
+
+    def _stored_block(self, block_id):
+        return self.block_store.get_block(self, block_id)
+
+    def _limiter(self):
+        flow_control = getattr(self.session, 'flow_control', None)
+        return flow_control.limiter if flow_control is not None else None
+
+    def _stream_array(self, path, data, key, chunk_size):
+        response = self.session.post(path=path, data=data, stream=True)
+        try:
+            response.raise_for_status()
+        except Exception:
+            response.close()
+            raise
+        return JsonArrayStream(response.iter_content(chunk_size), key, on_close=response.close)
+
+    def _fetch_block(self, block_num):
+        response = self.get_block(block_num)
+        response.raise_for_status()
+        return decode_response(response)
+
+
+def _chunks(transactions, batch_size):
+    batch_size = min(batch_size, MAX_PUSH_TRANSACTIONS)
+    return [transactions[i:i + batch_size] for i in range(0, len(transactions), batch_size)]
+
+
+def _splice_unsent(results, unsent, pushed):
+    """
+    Put the results of the transactions pushed one by one in place of the
+    chunks push_transactions refused.
+    """
+    pushed = iter(pushed)
+    for offset, chunk in unsent:
+        results[offset:offset + len(chunk)] = [next(pushed) for _ in chunk]
+
+
+def _response_body(response):
+    try:
+        return decode_response(response)
+    except ValueError:
+        return response.text
+
+
+def _push_result(trx_id, response, latency):
+    """
+    Build the PushResult of a push_transaction answer.
+    """
+    body = _response_body(response)
+    if not response.ok:
+        return PushResult(trx_id, None, body, latency)
+    return PushResult(body.get('transaction_id', trx_id), body, None, latency)
+
+
+def _push_chunk_results(trx_ids, response, latency):
+    """
+    Build the PushResults of a push_transactions answer.
+
+    :return: list of PushResult, None if the node lacks the endpoint
+    """
+    if response.status_code == 404:
+        return None
+    body = _response_body(response)
+    if not response.ok or not isinstance(body, list) or len(body) != len(trx_ids):
+        return [PushResult(trx_id, None, body, latency) for trx_id in trx_ids]
+    results = []
+    for trx_id, result in zip(trx_ids, body):
+        error = push_result_error(result)
+        if error is not None:
+            results.append(PushResult(trx_id, None, error, latency))
+        else:
+            results.append(PushResult(result.get('transaction_id', trx_id), result, None, latency))
+    return results
+
+
+def _local_transaction_id(transaction):
+    """
+    Compute the id of a transaction given in the packed_trx push format.
+    """
+    if 'packed_trx' in transaction and transaction.get('compression', 'none') in ('none', 0):
+        return transaction_id(transaction['packed_trx'])
+    return None
+
+
+class AsyncChainAPI(ChainAPI):
+    """ asyncio wrapper for EOS Chain API.
+
+    It shares the methods of ChainAPI, every one of them returns an
+    awaitable when the connection session is an AsyncRequestHandlerAPI.
+    get_blocks, follow_blocks and scan_table_rows return async generators,
+    the stream_* methods an awaitable of a stream iterated with `async for`.
+
+    :Example:
+
+    >>> connection = AsyncRequestHandlerAPI(base_url='http://nodeos-server:8888')
+    >>> chainapi = AsyncChainAPI(connection)
+    >>> (await chainapi.get_info()).json()
+    """
+
+    async def get_abi_serializer(self, account_name):
+        """
+        Fetch the ABI of a contract once through get_code and return a
+        serializer packing and unpacking its data locally. The ABI comes
+        from the abi_cache when the AsyncChainAPI has one.
+
+        :param account_name: (str) account of the contract
+        :return: AbiSerializer object
+
+        :Example:
+
+        >>> serializer = await AsyncChainAPI.get_abi_serializer(account_name="eosio.token")
+
+        """
+        if self.abi_cache is not None:
+            return await self.abi_cache.async_get_serializer(self, account_name)
+        return AbiSerializer.from_code_response(await self.get_code(account_name), account_name)
+
+    async def submit_transactions(self, transactions, concurrency=8, batch_size=100):
+        """
+        Push many signed transactions, keeping up to `concurrency` requests
+        in flight, like ChainAPI.submit_transactions.
+
+        :param transactions: list of transactions, as dicts or json strings
+        :param concurrency: (int) number of requests kept in flight
+        :param batch_size: (int) transactions per push_transactions call,
+        None to always push them one by one
+        :return: list of PushResult, in the order of `transactions`
+
+        :Example:
+
+        >>> results = await AsyncChainAPI.submit_transactions(signed_transactions, concurrency=16)
+
+        """
+        transactions = [json.loads(trx) if isinstance(trx, str) else trx for trx in transactions]
+        if batch_size and self._push_transactions_available:
+            chunks = _chunks(transactions, batch_size)
+            chunk_results = [result async for result in
+                             async_map_ordered(self._push_chunk, chunks, concurrency)]
+            results, unsent = self._collect_chunk_results(chunks, chunk_results)
+            if unsent:
+                pushed = [result async for result in async_map_ordered(
+                    self._push_one, [trx for _, chunk in unsent for trx in chunk], concurrency)]
+                _splice_unsent(results, unsent, pushed)
+            return results
+        return [result async for result in async_map_ordered(self._push_one, transactions, concurrency)]
+
+    async def _push_one(self, transaction):
+        trx_id = _local_transaction_id(transaction)
+        start = time.monotonic()
+        try:
+            response = await self.push_transaction(transaction=transaction)
+        except Exception as e:
+            return PushResult(trx_id, None, e, time.monotonic() - start)
+        return _push_result(trx_id, response, time.monotonic() - start)
+
+    async def _push_chunk(self, transactions):
+        if not self._push_transactions_available:
+            return None
+        trx_ids = [_local_transaction_id(transaction) for transaction in transactions]
+        start = time.monotonic()
+        try:
+            response = await self.push_transactions(transactions=transactions)
+        except Exception as e:
+            latency = time.monotonic() - start
+            return [PushResult(trx_id, None, e, latency) for trx_id in trx_ids]
+        return _push_chunk_results(trx_ids, response, time.monotonic() - start)
+
+    def get_blocks(self, start, end, concurrency=8, max_buffered=None):
+        """
+        Fetch a range of blocks with up to `concurrency` requests in flight.
+        Blocks are yielded in block number order.
+
+        :param start: (int) number of the first block
+        :param end: (int) number of the last block, inclusive
+        :param concurrency: (int) number of requests kept in flight
+        :param max_buffered: (int) size of the reorder buffer, defaults to
+        twice the concurrency
+        :return: async generator of blocks as json
+
+        :Example:
+
+        >>> async for block in AsyncChainAPI.get_blocks(start=1, end=1000, concurrency=64):
+        ...     print(block["block_num"], block["id"])
+
+        """
+        return async_map_ordered(self._fetch_block, range(start, end + 1), concurrency, max_buffered)
+
+    def follow_blocks(self, start=None, irreversible=False, **kwargs):
+        """
+        Follow the chain, yielding every new block once, like
+        ChainAPI.follow_blocks.
+
+        :param start: (int) first block to yield, defaults to the current
+        head (or last irreversible) block
+        :param irreversible: (bool) follow last_irreversible_block_num
+        instead of head_block_num
+        :param kwargs: other BlockFollower arguments (end, block_interval ..etc.)
+        :return: async generator of BlockEvent
+
+        :Example:
+
+        >>> async for event in AsyncChainAPI.follow_blocks(irreversible=True):
+        ...     apply(event.block)
+
+        """
+        return BlockFollower(self, start=start, irreversible=irreversible, **kwargs).__aiter__()
+
+    def scan_table_rows(self, code, scope, table, partitions=1, **kwargs):
+        """
+        Stream every row of a table, following the pages of get_table_rows,
+        like ChainAPI.scan_table_rows. The partitions are read concurrently
+        on the event loop.
+
+        :param code: (str) account of the contract
+        :param scope: (str) scope of the table, or None to scan every scope
+        reported by get_table_by_scope, yielding (scope, row) tuples
+        :param table: (str) name of the table
+        :param partitions: (int) number of key ranges, or of scopes when
+        scope is None, scanned concurrently
+        :param kwargs: other TableScanner arguments
+        :return: async generator of rows
+
+        :Example:
+
+        >>> async for row in AsyncChainAPI.scan_table_rows(code="eosio", scope="eosio",
+        ...                                                table="producers", partitions=8):
+        ...     print(row["owner"])
+
+        """
+        if scope is None:
+            return async_scan_scopes(self, code, table, concurrency=partitions, **kwargs)
+        return TableScanner(self, code, scope, table, partitions=partitions, **kwargs).__aiter__()
+
+    async def extract_actions(self, start, end, concurrency=8, **kwargs):
+        """
+        Flatten the actions of a range of blocks into typed columns, like
+        ChainAPI.extract_actions.
+
+        :param start: (int) number of the first block
+        :param end: (int) number of the last block, inclusive
+        :param concurrency: (int) number of requests kept in flight
+        :param kwargs: other ActionColumns arguments (token_contracts ..etc.)
+        :return: ActionColumns object
+
+        :Example:
+
+        >>> columns = await AsyncChainAPI.extract_actions(start=1, end=100000, concurrency=64)
+
+        """
+        return await async_extract_actions(self, start, end, concurrency=concurrency, **kwargs)
+
+    @staticmethod
+    def _result(response, result_type, typed):
+        if not typed:
+            return response
+
+        async def typed_result():
+            return result_type.from_response(await response)
+
+        return typed_result()
+
+    def _stored_block(self, block_id):
+        return self.block_store.async_get_block(self, block_id)
+
+    async def _stream_array(self, path, data, key, chunk_size):
+        response = await self.session.post(path=path, data=data, stream=True)
+        try:
+            response.raise_for_status()
+        except Exception:
+            response.close()
+            raise
+        return JsonArrayStream(response.iter_content(chunk_size), key, on_close=response.close)
+
+    async def _fetch_block(self, block_num):
+        response = await self.get_block(block_num)
+        response.raise_for_status()
+        return decode_response(response)
@@ -7,6 +7,14 @@
 .. author:: Merouane Benthameur <merouane.benth@gmail.com>
 """
 
+from pyeos_client.FastJson import dumps
+from pyeos_client.NodeosConnect import is_json_text
+
+
+def _wallet_name_body(wallet_name):
+    # a bare name is sent as a json string, '"default"' as it is.
+    return wallet_name if is_json_text(wallet_name) else dumps(wallet_name)
+
 
 class WalletAPI:
     """wrapper for EOS Wallet API"""
@@ -22,12 +30,13 @@ class WalletAPI:
         """
         Create a new wallet with the given name.
 
-        :param wallet_name: (str) name of the wallet to be created
+        :param wallet_name: (str) name of the wallet to be created, bare or
+        as a json string
         :return: response object
 
         :Example:
 
-        >>> WalletAPI.wallet_create(wallet_name='"default"')
+        >>> WalletAPI.wallet_create("default")
         PW5KFWYKqvt63d4iNvedfDEPVZL227D3RQ1zpVFzuUwhMAJmRAYyX
 
         This command will return the password that can be used to
@@ -35,39 +44,41 @@ class WalletAPI:
 
         """
         path = '/v1/wallet/create'
-        return self.session.post(path=path, data=wallet_name)
+        return self.session.post(path=path, data=_wallet_name_body(wallet_name))
 
     def wallet_open(self, wallet_name):
         """
         Open an existing wallet of the given name.
 
-        :param wallet_name: (str) name of the wallet to be opened
+        :param wallet_name: (str) name of the wallet to be opened, bare or
+        as a json string
         :return: response object
 
         :Example:
 
-        >>> WalletAPI.wallet_open(wallet_name='"default"')
+        >>> WalletAPI.wallet_open("default")
         {}
 
         """
         path = '/v1/wallet/open'
-        return self.session.post(path=path, data=wallet_name)
+        return self.session.post(path=path, data=_wallet_name_body(wallet_name))
 
     def wallet_lock(self, wallet_name):
         """
         Lock a wallet of the given name
 
-        :param wallet_name: (str) name of the wallet to be opened
+        :param wallet_name: (str) name of the wallet to be locked, bare or
+        as a json string
         :return: response object
 
         :Example:
 
-        >>> WalletAPI.wallet_lock(wallet_name='"default"')
+        >>> WalletAPI.wallet_lock("default")
         {}
 
         """
         path = '/v1/wallet/lock'
-        return self.session.post(path=path, data=wallet_name)
+        return self.session.post(path=path, data=_wallet_name_body(wallet_name))
 
     def wallet_lock_all(self):
         """
@@ -88,14 +99,14 @@ class WalletAPI:
         """
         Unlock a wallet with the given name and password
 
-        :param wallet_name_passord: (str) list with name and password
-        of the given wallet
+        :param wallet_name_password: (list or str) name and password of the
+        given wallet, a list or a string of a json list
         :return: response object
 
         :Example:
 
-        >>> WalletAPI.wallet_unlock(wallet_name_password='["default",
-               "PW5KFWYKqvt63d4iNvedfDEPVZL227D3RQ1zpVFzuUwhMAJmRAYyX"]')
+        >>> WalletAPI.wallet_unlock(["default",
+               "PW5KFWYKqvt63d4iNvedfDEPVZL227D3RQ1zpVFzuUwhMAJmRAYyX"])
         {}
 
         """
@@ -106,14 +117,14 @@ class WalletAPI:
         """
         Import a private key to the wallet of the given name
 
-        :param wallet_name_privKey: (str) list that contains the wallet
-        name and private key
+        :param wallet_name_privKey: (list or str) wallet name and private
+        key, a list or a string of a json list
         :return: response object
 
         :Example:
 
-        >>> WalletAPI.wallet_import_key(wallet_name_privKey='["default",
-               "5KQwrPbwdL6PhXujxW37FSSQZ1JiwsST4cqQzDeyXtP79zkvFD3"]')
+        >>> WalletAPI.wallet_import_key(["default",
+               "5KQwrPbwdL6PhXujxW37FSSQZ1JiwsST4cqQzDeyXtP79zkvFD3"])
 
         """
         path = '/v1/wallet/import_key'
@@ -168,12 +179,12 @@ class WalletAPI:
         """
         Set wallet auto lock timeout (in seconds)
 
-        :param timeout: (str) timeout in seconds
+        :param timeout: (int or str) timeout in seconds
         :return: response object
 
         :Example:
 
-        >>> WalletAPI.wallet_set_timeout(timeout='10')
+        >>> WalletAPI.wallet_set_timeout(10)
         {}
 
         """
@@ -185,7 +196,8 @@ class WalletAPI:
         Sign transaction given an array of transaction, require
         public keys, and chain id
 
-        :param transaction_data: (str) list of transaction json and  public key
+        :param transaction_data: (list or str) transaction, public keys and
+        chain id, a list or a string of a json list
         :return: response key
 
         :Example:
@@ -221,3 +233,11 @@ class WalletAPI:
         """
         path = '/v1/wallet/sign_transaction'
         return self.session.post(path=path, data=transaction_data)
+
+
+class AsyncWalletAPI(WalletAPI):
+    """ asyncio wrapper for EOS Wallet API.
+
+    It shares the methods of WalletAPI, every one of them returns an
+    awaitable when the connection session is an AsyncRequestHandlerAPI.
+    """
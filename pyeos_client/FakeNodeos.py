@@ -0,0 +1,774 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+.. module:: FakeNodeos
+   :synopsis: A local stand-in for nodeos and keosd serving a synthetic
+              chain, with configurable block sizes, tables and latencies,
+              to develop and benchmark against without a live node.
+.. author:: Merouane Benthameur <merouane.benth@gmail.com>
+"""
+
+import argparse
+import bisect
+import hashlib
+import json
+import random
+import secrets
+import threading
+import time
+from datetime import datetime, timedelta
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from pyeos_client.AbiSerializer import AbiSerializer
+from pyeos_client.Codec import AbiError, asset_to_string, key_value, string_to_name, string_to_symbol
+from pyeos_client.LocalSigner import LocalSigner
+from pyeos_client.Transaction import NULL_TRANSACTION_ID, transaction_id
+
+UINT64_MAX = 2 ** 64 - 1
+
+GENESIS_TIME = datetime(2018, 6, 8, 8, 8, 8, 500000)
+
+CHAIN_ID = 'aca376f206b8fc25a6ed44dbdc66547c36c6c33e3a119ffbeaef943642f0e906'
+
+_EOS_SYMBOL = string_to_symbol('4,EOS')
+
+TOKEN_ABI = {
+    'version': 'eosio::abi/1.0',
+    'types': [{'new_type_name': 'account_name', 'type': 'name'}],
+    'structs': [
+        {'name': 'transfer', 'base': '', 'fields': [
+            {'name': 'from', 'type': 'account_name'},
+            {'name': 'to', 'type': 'account_name'},
+            {'name': 'quantity', 'type': 'asset'},
+            {'name': 'memo', 'type': 'string'},
+        ]},
+        {'name': 'account', 'base': '', 'fields': [
+            {'name': 'balance', 'type': 'asset'},
+        ]},
+    ],
+    'actions': [{'name': 'transfer', 'type': 'transfer', 'ricardian_contract': ''}],
+    'tables': [{'name': 'accounts', 'index_type': 'i64', 'key_names': ['currency'],
+                'key_types': ['uint64'], 'type': 'account'}],
+    'ricardian_clauses': [],
+}
+
+# error codes and names of nodeos and keosd.
+ERRORS = {
+    'unknown_block_exception': (3100002, 'Unknown block'),
+    'account_query_exception': (3060002, 'Account Query Exception'),
+    'contract_table_query_exception': (3060003, 'Contract Table Query Exception'),
+    'tx_duplicate': (3040008, 'Duplicate transaction'),
+    'tx_decompression_error': (3040010, 'Error decompressing transaction'),
+    'wallet_exist_exception': (3120001, 'Wallet already exists'),
+    'wallet_nonexistent_exception': (3120002, 'Nonexistent wallet'),
+    'wallet_locked_exception': (3120003, 'Locked wallet'),
+    'wallet_missing_pub_key_exception': (3120004, 'Missing public key'),
+    'wallet_invalid_password_exception': (3120005, 'Invalid wallet password'),
+    'abi_not_found_exception': (3015014, 'No ABI found'),
+    'parse_error_exception': (4, 'Parse Error'),
+}
+
+
+class NodeError(Exception):
+    """ an error answered by the fake node, in the format of nodeos"""
+
+    def __init__(self, name, details='', status_code=500):
+        super().__init__(name)
+        self.name = name
+        self.details = details
+        self.status_code = status_code
+
+    def body(self):
+        code, what = ERRORS.get(self.name, (0, 'unspecified'))
+        return {
+            'code': self.status_code,
+            'message': 'Not Found' if self.status_code == 404 else 'Internal Service Error',
+            'error': {'code': code, 'name': self.name, 'what': what,
+                      'details': [{'message': self.details, 'file': '', 'line_number': 0, 'method': ''}]},
+        }
+
+    def detail_string(self):
+        """
+        Format the error like fc::exception::to_detail_string, as found in
+        the results of push_transactions.
+        """
+        code, what = ERRORS.get(self.name, (0, 'unspecified'))
+        return '%d %s: %s\n%s' % (code, self.name, what, self.details)
+
+
+def account_name(index):
+    """
+    Get the name of the synthetic account number `index`.
+
+    :param index: (int) number of the account
+    :return: str: a valid name, eg. accaaaaaaaab
+    """
+    letters = []
+    for _ in range(9):
+        index, letter = divmod(index, 26)
+        letters.append(chr(0x61 + letter))
+    return 'acc' + ''.join(reversed(letters))
+
+
+def _block_time(block_num):
+    return (GENESIS_TIME + timedelta(milliseconds=500 * block_num)).isoformat(timespec='milliseconds')
+
+
+class LatencyProfile:
+    """ the delay added by the fake node before it answers a request
+
+    The delay is drawn from a normal distribution of mean `latency` and
+    standard deviation `jitter`, plus `per_kb` seconds per KB of response.
+    """
+
+    def __init__(self, latency=0.0, jitter=0.0, per_kb=0.0):
+        """
+        constructor of the LatencyProfile
+
+        :param latency: (float) mean delay, in seconds
+        :param jitter: (float) standard deviation of the delay, in seconds
+        :param per_kb: (float) seconds added per KB of response body
+        """
+        self.latency = latency
+        self.jitter = jitter
+        self.per_kb = per_kb
+
+    def delay(self, size=0):
+        """
+        Draw a delay.
+
+        :param size: (int) size of the response body
+        :return: float: seconds
+        """
+        delay = random.gauss(self.latency, self.jitter) if self.jitter else self.latency
+        return max(0.0, delay) + self.per_kb * size / 1024.0
+
+
+class SyntheticTable:
+    """ the rows of a contract table, keyed by uint64 primary keys
+
+    A table built from a number of rows generates them on demand, their keys
+    are spread evenly over the uint64 range so concurrent partitions of a
+    scan get the same share of rows.
+    """
+
+    def __init__(self, rows, row_size=0):
+        """
+        constructor of the SyntheticTable
+
+        :param rows: (int) number of generated rows, or a list of rows,
+        keyed by their position in the list
+        :param row_size: (int) length of the padding of generated rows
+        """
+        if isinstance(rows, int):
+            self.stride = max(1, UINT64_MAX // max(rows, 1))
+            self.keys = range(0, rows * self.stride, self.stride)
+            self.rows = None
+        else:
+            self.keys = range(len(rows))
+            self.rows = list(rows)
+        self.padding = 'x' * row_size
+
+    def __len__(self):
+        return len(self.keys)
+
+    def row(self, position):
+        if self.rows is not None:
+            return self.rows[position]
+        row = {
+            'id': self.keys[position],
+            'owner': account_name(position),
+            'balance': asset_to_string(position * 10000 % 99999999, _EOS_SYMBOL),
+        }
+        if self.padding:
+            row['memo'] = self.padding
+        return row
+
+    def query(self, lower_bound=None, upper_bound=None, limit=10):
+        """
+        Get a page of rows, like get_table_rows.
+
+        :param lower_bound: (int) lowest key
+        :param upper_bound: (int) highest key, inclusive
+        :param limit: (int) rows per page
+        :return: tuple: (list of rows, next key or None)
+        """
+        start = 0 if lower_bound is None else bisect.bisect_left(self.keys, lower_bound)
+        end = len(self.keys) if upper_bound is None else bisect.bisect_right(self.keys, upper_bound)
+        stop = min(end, start + max(limit, 1))
+        rows = [self.row(position) for position in range(start, stop)]
+        return rows, (self.keys[stop] if stop < end else None)
+
+
+class SyntheticChain:
+    """ a deterministic chain of blocks, accounts and tables
+
+    Every block holds `transactions_per_block` executed transactions of
+    `actions_per_transaction` eosio.token transfers between synthetic
+    accounts. Blocks only depend on their number, so a block can be asked
+    in any order and always has the same content.
+    """
+
+    def __init__(self, head_block_num=1000000, lib_lag=325, transactions_per_block=10,
+                 actions_per_transaction=1, memo_size=16, tables=None, row_size=0,
+                 block_interval=None, accounts=10000, seed=0, clock=time.monotonic):
+        """
+        constructor of the SyntheticChain
+
+        :param head_block_num: (int) number of the head block
+        :param lib_lag: (int) blocks between the head and the last irreversible block
+        :param transactions_per_block: (int) transactions in each block
+        :param actions_per_transaction: (int) transfers in each transaction
+        :param memo_size: (int) length of the memo of the transfers
+        :param tables: dict of (code, scope, table) to a number of rows or
+        a list of rows, defaults to 10000 rows of eosio.token accounts
+        :param row_size: (int) length of the padding of generated rows
+        :param block_interval: (float) seconds between two blocks, the head
+        stays still when None
+        :param accounts: (int) number of synthetic accounts
+        :param seed: (int) seed of the content of the blocks
+        :param clock: callable returning the current time in seconds
+        """
+        self.initial_head = head_block_num
+        self.lib_lag = lib_lag
+        self.transactions_per_block = transactions_per_block
+        self.actions_per_transaction = actions_per_transaction
+        self.memo = 'm' * memo_size
+        self.block_interval = block_interval
+        self.accounts = accounts
+        self.seed = seed
+        self.clock = clock
+        self.started_at = clock()
+        if tables is None:
+            tables = {('eosio.token', 'eosio.token', 'accounts'): 10000}
+        self.tables = dict((key, SyntheticTable(rows, row_size)) for key, rows in tables.items())
+        self.contracts = {'eosio.token': TOKEN_ABI}
+        self.serializers = {}
+        self.pushed = set()
+        self.lock = threading.Lock()
+        self.block_json = lru_cache(maxsize=4096)(self._block_json)
+
+    @property
+    def head_block_num(self):
+        if not self.block_interval:
+            return self.initial_head
+        return self.initial_head + int((self.clock() - self.started_at) / self.block_interval)
+
+    def block_id(self, block_num):
+        """
+        Get the id of a block, its first 4 bytes are the block number.
+        """
+        digest = hashlib.sha256(b'%d:%d' % (self.seed, block_num)).hexdigest()
+        return '%08x' % block_num + digest[8:]
+
+    def get_info(self):
+        head = self.head_block_num
+        lib = max(1, head - self.lib_lag)
+        return {
+            'server_version': 'fake',
+            'chain_id': CHAIN_ID,
+            'head_block_num': head,
+            'last_irreversible_block_num': lib,
+            'last_irreversible_block_id': self.block_id(lib),
+            'head_block_id': self.block_id(head),
+            'head_block_time': _block_time(head),
+            'head_block_producer': 'eosio',
+            'virtual_block_cpu_limit': 200000000,
+            'virtual_block_net_limit': 1048576000,
+            'block_cpu_limit': 199900,
+            'block_net_limit': 1048576,
+        }
+
+    def block(self, block_num):
+        """
+        Build a block, as returned by get_block.
+
+        :param block_num: (int) number of the block
+        :return: dict
+        """
+        if block_num < 1 or block_num > self.head_block_num:
+            raise NodeError('unknown_block_exception', 'Could not find block: %s' % block_num)
+        rand = random.Random(self.seed * 1000003 + block_num)
+        transactions = []
+        for _ in range(self.transactions_per_block):
+            actions = []
+            for _ in range(self.actions_per_transaction):
+                sender = account_name(rand.randrange(self.accounts))
+                actions.append({
+                    'account': 'eosio.token',
+                    'name': 'transfer',
+                    'authorization': [{'actor': sender, 'permission': 'active'}],
+                    'data': {
+                        'from': sender,
+                        'to': account_name(rand.randrange(self.accounts)),
+                        'quantity': asset_to_string(rand.randrange(1, 10000000), _EOS_SYMBOL),
+                        'memo': self.memo,
+                    },
+                })
+            packed_trx = '%032x' % rand.getrandbits(128) * 4
+            transactions.append({
+                'status': 'executed',
+                'cpu_usage_us': rand.randrange(100, 2000),
+                'net_usage_words': 16,
+                'trx': {
+                    'id': transaction_id(packed_trx),
+                    'signatures': ['SIG_K1_' + '%064x' % rand.getrandbits(256)],
+                    'compression': 'none',
+                    'packed_context_free_data': '',
+                    'context_free_data': [],
+                    'packed_trx': packed_trx,
+                    'transaction': {
+                        'expiration': _block_time(block_num + 60),
+                        'ref_block_num': (block_num - 3) & 0xffff,
+                        'ref_block_prefix': rand.getrandbits(32),
+                        'max_net_usage_words': 0,
+                        'max_cpu_usage_ms': 0,
+                        'delay_sec': 0,
+                        'context_free_actions': [],
+                        'actions': actions,
+                        'transaction_extensions': [],
+                    },
+                },
+            })
+        block_id = self.block_id(block_num)
+        return {
+            'timestamp': _block_time(block_num),
+            'producer': 'eosio',
+            'confirmed': 0,
+            'previous': self.block_id(block_num - 1) if block_num > 1 else '0' * 64,
+            'transaction_mroot': '0' * 64,
+            'action_mroot': '0' * 64,
+            'schedule_version': 0,
+            'new_producers': None,
+            'header_extensions': [],
+            'producer_signature': 'SIG_K1_' + block_id,
+            'transactions': transactions,
+            'block_extensions': [],
+            'id': block_id,
+            'block_num': block_num,
+            'ref_block_prefix': int.from_bytes(bytes.fromhex(block_id[16:24]), 'little'),
+        }
+
+    def _block_json(self, block_num):
+        return json.dumps(self.block(block_num)).encode()
+
+    def get_block(self, body):
+        block = body['block_num_or_id']
+        if isinstance(block, str) and len(block) == 64:
+            block_num = int(block[:8], 16)
+            if block_num > self.head_block_num or self.block_id(block_num) != block:
+                raise NodeError('unknown_block_exception', 'Could not find block: %s' % block)
+        else:
+            try:
+                block_num = int(block)
+            except ValueError:
+                raise NodeError('unknown_block_exception', 'Invalid block ID: %s' % block)
+        if block_num < 1 or block_num > self.head_block_num:
+            raise NodeError('unknown_block_exception', 'Could not find block: %s' % block)
+        return self.block_json(block_num)
+
+    def get_account(self, body):
+        name = body['account_name']
+        try:
+            string_to_name(name)
+        except AbiError:
+            raise NodeError('account_query_exception', 'unknown key (eosio::chain::name): %s' % name)
+        key = {'perm_name': 'active', 'parent': 'owner', 'required_auth': {
+            'threshold': 1, 'keys': [{'key': 'EOS6MRyAjQq8ud7hVNYcfnVPJqcVpscN5So8BhtHuGYqET5GDW5CV',
+                                      'weight': 1}], 'accounts': [], 'waits': []}}
+        return {
+            'account_name': name,
+            'head_block_num': self.head_block_num,
+            'head_block_time': _block_time(self.head_block_num),
+            'privileged': False,
+            'last_code_update': '1970-01-01T00:00:00.000',
+            'created': GENESIS_TIME.isoformat(timespec='milliseconds'),
+            'core_liquid_balance': '100.0000 EOS',
+            'ram_quota': 8150, 'net_weight': 10000, 'cpu_weight': 10000,
+            'net_limit': {'used': 0, 'available': 1000000, 'max': 1000000},
+            'cpu_limit': {'used': 0, 'available': 1000000, 'max': 1000000},
+            'ram_usage': 2996,
+            'permissions': [dict(key, perm_name='owner', parent='')] + [key],
+            'total_resources': None, 'self_delegated_bandwidth': None,
+            'refund_request': None, 'voter_info': None,
+        }
+
+    def code_hash(self, name):
+        abi = self.contracts.get(name)
+        if abi is None:
+            return '0' * 64
+        return hashlib.sha256(json.dumps(abi, sort_keys=True).encode()).hexdigest()
+
+    def get_code(self, body):
+        result = self.get_code_hash(body)
+        abi = self.contracts.get(body['account_name'])
+        result.update(wast='', wasm='')
+        if abi is not None:
+            result['abi'] = abi
+        return result
+
+    def get_code_hash(self, body):
+        name = self.get_account(body)['account_name']
+        return {'account_name': name, 'code_hash': self.code_hash(name)}
+
+    def _serializer(self, code):
+        serializer = self.serializers.get(code)
+        if serializer is None:
+            abi = self.contracts.get(code)
+            if abi is None:
+                raise NodeError('abi_not_found_exception', 'No ABI found for %s' % code)
+            serializer = self.serializers[code] = AbiSerializer(abi)
+        return serializer
+
+    def abi_json_to_bin(self, body):
+        try:
+            return {'binargs': self._serializer(body['code']).pack_action_data(body['action'], body['args'])}
+        except (AbiError, KeyError, TypeError, ValueError) as e:
+            raise NodeError('parse_error_exception', str(e))
+
+    def abi_bin_to_json(self, body):
+        try:
+            return {'args': self._serializer(body['code']).unpack_action_data(body['action'], body['binargs'])}
+        except (AbiError, KeyError, TypeError, ValueError) as e:
+            raise NodeError('parse_error_exception', str(e))
+
+    def get_table_rows(self, body):
+        table = self.tables.get((body.get('code'), str(body.get('scope')), body.get('table')))
+        if table is None:
+            raise NodeError('contract_table_query_exception', 'Table %s is not specified in the ABI'
+                            % body.get('table'))
+        bounds = []
+        for bound in (body.get('lower_bound'), body.get('upper_bound')):
+            try:
+                bounds.append(key_value(bound) if bound not in (None, '') else None)
+            except AbiError:
+                raise NodeError('contract_table_query_exception', 'Invalid bound %s' % bound)
+        rows, next_key = table.query(bounds[0], bounds[1], int(body.get('limit', 10)))
+        if not body.get('json', False):
+            rows = [json.dumps(row).encode().hex() for row in rows]
+        return {'rows': rows, 'more': next_key is not None,
+                'next_key': '' if next_key is None else str(next_key)}
+
+    def get_table_by_scope(self, body):
+        code, table = body.get('code'), body.get('table')
+        entries = sorted((string_to_name(scope), scope, name, len(rows))
+                         for (contract, scope, name), rows in self.tables.items()
+                         if contract == code and table in (None, '', name))
+        lower = body.get('lower_bound')
+        lower = string_to_name(lower) if lower else 0
+        entries = [entry for entry in entries if entry[0] >= lower]
+        limit = int(body.get('limit', 10))
+        rows = [{'code': code, 'scope': scope, 'table': name, 'payer': code, 'count': count}
+                for _, scope, name, count in entries[:limit]]
+        return {'rows': rows, 'more': entries[limit][1] if len(entries) > limit else ''}
+
+    def get_required_keys(self, body):
+        return {'required_keys': list(body.get('available_keys', []))[:1]}
+
+    def push_transaction(self, body):
+        if body.get('compression', 'none') not in ('none', 0):
+            raise NodeError('tx_decompression_error', 'compressed transactions are not supported')
+        packed_trx = body.get('packed_trx')
+        trx_id = transaction_id(packed_trx) if packed_trx else hashlib.sha256(
+            json.dumps(body, sort_keys=True).encode()).hexdigest()
+        with self.lock:
+            if trx_id in self.pushed:
+                raise NodeError('tx_duplicate', 'duplicate transaction %s' % trx_id)
+            self.pushed.add(trx_id)
+        block_num = self.head_block_num + 1
+        return {
+            'transaction_id': trx_id,
+            'processed': {
+                'id': trx_id,
+                'block_num': block_num,
+                'block_time': _block_time(block_num),
+                'receipt': {'status': 'executed', 'cpu_usage_us': 500, 'net_usage_words': 16},
+                'elapsed': 500,
+                'net_usage': 128,
+                'scheduled': False,
+                'action_traces': [],
+                'except': None,
+            },
+        }
+
+    def push_transactions(self, body):
+        results = []
+        for transaction in body:
+            try:
+                results.append(self.push_transaction(transaction))
+            except NodeError as e:
+                # nodeos answers a failed transaction with a null id and the
+                # error under processed.
+                results.append({'transaction_id': NULL_TRANSACTION_ID,
+                                'processed': {'error': e.detail_string()}})
+        return results
+
+
+class FakeWallet:
+    """ the wallets of a fake keosd, holding their keys in LocalSigner objects"""
+
+    def __init__(self):
+        self.wallets = {}
+        self.lock = threading.Lock()
+
+    def _wallet(self, name, unlocked=True):
+        wallet = self.wallets.get(name)
+        if wallet is None:
+            raise NodeError('wallet_nonexistent_exception', 'Unable to open file: %s.wallet' % name)
+        if unlocked and wallet['locked']:
+            raise NodeError('wallet_locked_exception', 'Wallet is locked: %s' % name)
+        return wallet
+
+    def _unlocked_keys(self):
+        keys = {}
+        for wallet in self.wallets.values():
+            if not wallet['locked']:
+                keys.update(wallet['signer'].keys)
+        return keys
+
+    def create(self, name):
+        with self.lock:
+            if name in self.wallets:
+                raise NodeError('wallet_exist_exception', 'Wallet with name: %s already exists' % name)
+            password = 'PW5' + secrets.token_hex(24)
+            self.wallets[name] = {'password': password, 'locked': False, 'signer': LocalSigner()}
+            return password
+
+    def open(self, name):
+        self._wallet(name, unlocked=False)
+        return {}
+
+    def lock(self, name):
+        self._wallet(name, unlocked=False)['locked'] = True
+        return {}
+
+    def lock_all(self, body=None):
+        for wallet in self.wallets.values():
+            wallet['locked'] = True
+        return {}
+
+    def unlock(self, body):
+        name, password = body
+        wallet = self._wallet(name, unlocked=False)
+        if password != wallet['password']:
+            raise NodeError('wallet_invalid_password_exception', 'Invalid password for wallet: %s' % name)
+        wallet['locked'] = False
+        return {}
+
+    def import_key(self, body):
+        name, private_key = body
+        try:
+            self._wallet(name)['signer'].import_key(private_key)
+        except ValueError as e:
+            raise NodeError('parse_error_exception', str(e))
+        return {}
+
+    def list_wallets(self, body=None):
+        return [name if wallet['locked'] else name + ' *' for name, wallet in sorted(self.wallets.items())]
+
+    def list_keys(self, body=None):
+        signer = LocalSigner()
+        signer.keys = self._unlocked_keys()
+        return json.loads(signer.wallet_list_keys().content)
+
+    def get_public_keys(self, body=None):
+        return sorted(self._unlocked_keys())
+
+    def set_timeout(self, body):
+        return {}
+
+    def sign_transaction(self, body):
+        transaction, public_keys, chain_id = body
+        signer = LocalSigner()
+        signer.keys = self._unlocked_keys()
+        try:
+            return signer.sign_transaction(transaction, public_keys, chain_id)
+        except KeyError as e:
+            raise NodeError('wallet_missing_pub_key_exception', str(e))
+        except (AbiError, TypeError, ValueError) as e:
+            raise NodeError('parse_error_exception', str(e))
+
+
+class FakeNodeos:
+    """ an http server answering the chain and wallet endpoints used by
+    ChainAPI and WalletAPI from a SyntheticChain and a FakeWallet
+
+    :Example:
+
+    >>> with FakeNodeos(SyntheticChain(transactions_per_block=50),
+    ...                 latency=LatencyProfile(latency=0.01, jitter=0.003)) as node:
+    ...     chainapi = ChainAPI(RequestHandlerAPI(base_url=node.url))
+    ...     blocks = list(chainapi.get_blocks(start=1, end=1000))
+    """
+
+    def __init__(self, chain=None, wallet=None, latency=None, error_rate=0.0,
+                 push_transactions=True, host='127.0.0.1', port=0):
+        """
+        constructor of the FakeNodeos
+
+        :param chain: SyntheticChain object, a default one when None
+        :param wallet: FakeWallet object, a new one when None
+        :param latency: LatencyProfile object applied to every endpoint, or
+        a dict of path to LatencyProfile, with an optional 'default' entry
+        :param error_rate: (float) share of requests answered with a 503
+        :param push_transactions: (bool) expose /v1/chain/push_transactions,
+        nodes lacking it answer a 404
+        :param host: (str) address to listen on
+        :param port: (int) port to listen on, 0 picks a free one
+        """
+        self.chain = chain if chain is not None else SyntheticChain()
+        self.wallet = wallet if wallet is not None else FakeWallet()
+        if latency is None or isinstance(latency, dict):
+            self.latencies = dict(latency or {})
+        else:
+            self.latencies = {'default': latency}
+        self.error_rate = error_rate
+        self.requests = 0
+        chain, wallet = self.chain, self.wallet
+        self.routes = {
+            '/v1/chain/get_info': lambda body: chain.get_info(),
+            '/v1/chain/get_block': chain.get_block,
+            '/v1/chain/get_account': chain.get_account,
+            '/v1/chain/get_code': chain.get_code,
+            '/v1/chain/get_code_hash': chain.get_code_hash,
+            '/v1/chain/get_table_rows': chain.get_table_rows,
+            '/v1/chain/get_table_by_scope': chain.get_table_by_scope,
+            '/v1/chain/abi_json_to_bin': chain.abi_json_to_bin,
+            '/v1/chain/abi_bin_to_json': chain.abi_bin_to_json,
+            '/v1/chain/get_required_keys': chain.get_required_keys,
+            '/v1/chain/push_transaction': chain.push_transaction,
+            '/v1/wallet/create': wallet.create,
+            '/v1/wallet/open': wallet.open,
+            '/v1/wallet/lock': wallet.lock,
+            '/v1/wallet/lock_all': wallet.lock_all,
+            '/v1/wallet/unlock': wallet.unlock,
+            '/v1/wallet/import_key': wallet.import_key,
+            '/v1/wallet/list_wallets': wallet.list_wallets,
+            '/v1/wallet/list_keys': wallet.list_keys,
+            '/v1/wallet/get_public_keys': wallet.get_public_keys,
+            '/v1/wallet/set_timeout': wallet.set_timeout,
+            '/v1/wallet/sign_transaction': wallet.sign_transaction,
+        }
+        if push_transactions:
+            self.routes['/v1/chain/push_transactions'] = chain.push_transactions
+        self.server = ThreadingHTTPServer((host, port), _handler(self))
+        self.server.daemon_threads = True
+        self.thread = None
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return 'http://%s:%d' % (host, port)
+
+    def handle(self, path, body):
+        """
+        Answer a request.
+
+        :param path: str: path of the endpoint
+        :param body: bytes: body of the request
+        :return: tuple: (status code, bytes body)
+        """
+        self.requests += 1
+        if self.error_rate and random.random() < self.error_rate:
+            return 503, b'{"code":503,"message":"Service Unavailable"}'
+        route = self.routes.get(path)
+        if route is None:
+            return 404, json.dumps(NodeError('exception', 'Unknown Endpoint', 404).body()).encode()
+        try:
+            result = route(json.loads(body) if body else None)
+        except NodeError as e:
+            return e.status_code, json.dumps(e.body()).encode()
+        except (KeyError, TypeError, ValueError) as e:
+            return 500, json.dumps(NodeError('parse_error_exception', str(e)).body()).encode()
+        return 200, result if isinstance(result, bytes) else json.dumps(result).encode()
+
+    def delay(self, path, size):
+        profile = self.latencies.get(path, self.latencies.get('default'))
+        return 0.0 if profile is None else profile.delay(size)
+
+    def start(self):
+        """
+        Serve requests from a background thread.
+
+        :return: self
+        """
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        """
+        Stop serving and close the socket.
+        """
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+
+def _handler(node):
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+        # headers and body are sent by separate writes.
+        disable_nagle_algorithm = True
+
+        def log_message(self, *args):
+            pass
+
+        def do_POST(self):
+            size = int(self.headers.get('Content-Length') or 0)
+            status, body = node.handle(self.path, self.rfile.read(size) if size else b'')
+            delay = node.delay(self.path, len(body))
+            if delay:
+                time.sleep(delay)
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        do_GET = do_POST
+
+    return Handler
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Serve a synthetic chain like nodeos and keosd.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8888, help='0 picks a free port')
+    parser.add_argument('--head', type=int, default=1000000, help='number of the head block')
+    parser.add_argument('--transactions-per-block', type=int, default=10)
+    parser.add_argument('--actions-per-transaction', type=int, default=1)
+    parser.add_argument('--memo-size', type=int, default=16)
+    parser.add_argument('--rows', type=int, default=10000, help='rows of the eosio.token accounts table')
+    parser.add_argument('--row-size', type=int, default=0)
+    parser.add_argument('--block-interval', type=float, default=None)
+    parser.add_argument('--latency', type=float, default=0.0, help='mean delay of the answers, in seconds')
+    parser.add_argument('--jitter', type=float, default=0.0)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    args = parser.parse_args(argv)
+    chain = SyntheticChain(head_block_num=args.head, transactions_per_block=args.transactions_per_block,
+                           actions_per_transaction=args.actions_per_transaction, memo_size=args.memo_size,
+                           tables={('eosio.token', 'eosio.token', 'accounts'): args.rows},
+                           row_size=args.row_size, block_interval=args.block_interval)
+    node = FakeNodeos(chain, latency=LatencyProfile(args.latency, args.jitter),
+                      error_rate=args.error_rate, host=args.host, port=args.port)
+    # the first line tells the url to the process which started the server.
+    print(node.url, flush=True)
+    try:
+        node.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        node.server.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+.. module:: FastJson
+   :synopsis: json encoding and decoding through the fastest installed
+              backend: orjson, then ujson, then the standard library.
+.. author:: Merouane Benthameur <merouane.benth@gmail.com>
+"""
+
+import json
+import time
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+try:
+    import ujson
+except ImportError:  # pragma: no cover - optional dependency
+    ujson = None
+
+if orjson is not None:
+    BACKEND = 'orjson'
+
+    def loads(data):
+        """
+        Decode a json document.
+
+        :param data: (bytes or str) json document
+        :return: decoded value
+        """
+        return orjson.loads(data)
+
+    def dumps(value):
+        """
+        Encode a value as compact json.
+
+        :param value: value to encode
+        :return: bytes
+        """
+        return orjson.dumps(value)
+elif ujson is not None:
+    BACKEND = 'ujson'
+
+    def loads(data):
+        """
+        Decode a json document.
+
+        :param data: (bytes or str) json document
+        :return: decoded value
+        """
+        return ujson.loads(data)
+
+    def dumps(value):
+        """
+        Encode a value as compact json.
+
+        :param value: value to encode
+        :return: bytes
+        """
+        return ujson.dumps(value, ensure_ascii=False, escape_forward_slashes=False).encode('utf-8')
+else:
+    BACKEND = 'json'
+
+    def loads(data):
+        """
+        Decode a json document.
+
+        :param data: (bytes or str) json document
+        :return: decoded value
+        """
+        return json.loads(data)
+
+    def dumps(value):
+        """
+        Encode a value as compact json.
+
+        :param value: value to encode
+        :return: bytes
+        """
+        return json.dumps(value, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+
+def decode_response(response):
+    """
+    Decode the body of a response with the fast backend.
+
+    :param response: response object
+    :return: decoded value
+    """
+    on_decode = getattr(response, 'on_decode', None)
+    if on_decode is None:
+        return loads(response.content)
+    # set by Instrumentation on the responses it measured.
+    start = time.perf_counter()
+    value = loads(response.content)
+    on_decode(time.perf_counter() - start)
+    return value
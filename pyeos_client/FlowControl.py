@@ -0,0 +1,297 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+.. module:: FlowControl
+   :synopsis: Client side flow control of the requests sent to a node: an
+              adaptive concurrency limit and per endpoint rate limits.
+.. author:: Merouane Benthameur <merouane.benth@gmail.com>
+"""
+
+import threading
+import time
+
+import requests
+
+# statuses of a node asking its clients to slow down.
+OVERLOAD_STATUSES = frozenset([429, 503])
+
+
+class TokenBucket:
+    """ a thread-safe token bucket, allowing `rate` requests per second with
+    bursts of up to `burst` requests
+
+    Callers reserve their tokens before waiting for them, so concurrent
+    callers are served in order without polling.
+    """
+
+    def __init__(self, rate, burst=None, clock=time.monotonic, sleep=time.sleep):
+        """
+        constructor of the TokenBucket
+
+        :param rate: (float) tokens added per second
+        :param burst: (float) capacity of the bucket, defaults to one second of tokens
+        :param clock: callable returning the current time in seconds
+        :param sleep: callable waiting a number of seconds
+        """
+        self.rate = float(rate)
+        self.burst = float(burst if burst is not None else max(rate, 1))
+        self.clock = clock
+        self.sleep = sleep
+        self.tokens = self.burst
+        self.updated_at = clock()
+        self.lock = threading.Lock()
+
+    def reserve(self, tokens=1):
+        """
+        Take tokens from the bucket, possibly ahead of their arrival.
+
+        :param tokens: (float) number of tokens
+        :return: float: seconds to wait before using them
+        """
+        with self.lock:
+            now = self.clock()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated_at) * self.rate)
+            self.updated_at = now
+            self.tokens -= tokens
+            return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+    def acquire(self, tokens=1):
+        """
+        Wait for tokens.
+
+        :param tokens: (float) number of tokens
+        :return: float: seconds waited
+        """
+        wait = self.reserve(tokens)
+        if wait > 0:
+            self.sleep(wait)
+        return wait
+
+
+class AdaptiveLimiter:
+    """ a concurrency limit adjusted by additive increase, multiplicative decrease
+
+    The limit grows by one every `limit` successful requests while it is in
+    use, and is multiplied by `backoff` when the node reports an overload or
+    a request times out. With a `latency_tolerance`, it is also decreased
+    when the smoothed latency of an endpoint exceeds that many times the
+    lowest latency seen on that endpoint, so a fast call such as get_info
+    does not make the slower ones look overloaded. It is decreased at most
+    once per round trip: only requests started after the last decrease can
+    decrease it again.
+    """
+
+    def __init__(self, initial=8, min_limit=1, max_limit=64, backoff=0.5,
+                 latency_tolerance=None, alpha=0.2, clock=time.monotonic):
+        """
+        constructor of the AdaptiveLimiter
+
+        :param initial: (int) starting limit
+        :param min_limit: (int) lowest limit
+        :param max_limit: (int) highest limit
+        :param backoff: (float) factor applied to the limit on an overload
+        :param latency_tolerance: (float) ratio of the smoothed latency to
+        the lowest one deemed an overload, eg. 3.0, None to only react to
+        overloads and timeouts. Queueing in the client or on a busy node
+        also raises the latency, so it is off by default.
+        :param alpha: (float) smoothing factor of the latency EWMA
+        :param clock: callable returning the current time in seconds
+        """
+        self.initial = initial
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.backoff = backoff
+        self.latency_tolerance = latency_tolerance
+        self.alpha = alpha
+        self.clock = clock
+        self._limit = float(min(max(initial, min_limit), max_limit))
+        self.in_flight = 0
+        # path to [smoothed latency, lowest latency].
+        self.latencies = {}
+        self.decreases = 0
+        self._decreased_at = None
+        self.condition = threading.Condition()
+
+    @property
+    def limit(self):
+        return int(self._limit)
+
+    def acquire(self, timeout=None):
+        """
+        Wait until a request may be sent.
+
+        :param timeout: (float) seconds to wait at most, None to wait forever
+        :return: float: the start time to give to release, None on timeout
+        """
+        with self.condition:
+            if not self.condition.wait_for(lambda: self.in_flight < self.limit, timeout):
+                return None
+            self.in_flight += 1
+            return self.clock()
+
+    def release(self, started, overloaded=False, path=None):
+        """
+        Record the end of a request.
+
+        :param started: (float) value returned by acquire
+        :param overloaded: (bool) the node reported an overload or the
+        request timed out
+        :param path: str: path to  api endpoint, the latencies of each
+        path are compared to their own lowest one
+        """
+        with self.condition:
+            saturated = self.in_flight >= self.limit
+            self.in_flight -= 1
+            latency = self.clock() - started
+            if not overloaded:
+                latencies = self.latencies.get(path)
+                if latencies is None:
+                    latencies = self.latencies[path] = [None, latency]
+                latencies[1] = min(latencies[1], latency)
+                if latencies[0] is None:
+                    latencies[0] = latency
+                else:
+                    latencies[0] += self.alpha * (latency - latencies[0])
+                overloaded = (self.latency_tolerance is not None
+                              and latencies[0] > self.latency_tolerance * latencies[1])
+            if overloaded:
+                if self._decreased_at is None or started >= self._decreased_at:
+                    self._limit = max(self.min_limit, self._limit * self.backoff)
+                    self._decreased_at = self.clock()
+                    self.decreases += 1
+                    # the latencies measured under the previous limit are forgotten.
+                    for latencies in self.latencies.values():
+                        latencies[0] = None
+            elif saturated:
+                self._limit = min(self.max_limit, self._limit + 1.0 / self._limit)
+            self.condition.notify_all()
+
+
+class FlowControl:
+    """ the flow control of the requests of a RequestHandlerAPI
+
+    Give it to RequestHandlerAPI with the `flow_control` argument, each
+    request then waits for a token of the bucket of its path and for a slot
+    of the adaptive concurrency limit. A Retry-After header received with
+    a 429 or a 503 holds every request back for that many seconds.
+
+    :Example:
+
+    >>> flow_control = FlowControl(AdaptiveLimiter(initial=4, max_limit=32),
+    ...                            rate=50, rates={'/v1/chain/get_table_rows': 10})
+    >>> connection = RequestHandlerAPI(base_url='http://nodeos-server:8888',
+    ...                                flow_control=flow_control)
+    """
+
+    def __init__(self, limiter=None, rate=None, rates=None, burst=None, max_pause=60.0,
+                 clock=time.monotonic, sleep=time.sleep):
+        """
+        constructor of the FlowControl
+
+        :param limiter: AdaptiveLimiter object, a default one when None
+        :param rate: (float) requests per second allowed on each path
+        without an entry in `rates`, None for no limit
+        :param rates: dict of path to requests per second
+        :param burst: (float) capacity of the buckets, defaults to one
+        second of requests
+        :param max_pause: (float) highest Retry-After honoured, in seconds
+        :param clock: callable returning the current time in seconds
+        :param sleep: callable waiting a number of seconds
+        """
+        self.limiter = limiter if limiter is not None else AdaptiveLimiter(clock=clock)
+        self.rate = rate
+        self.rates = dict(rates or {})
+        self.burst = burst
+        self.max_pause = max_pause
+        self.clock = clock
+        self.sleep = sleep
+        self.buckets = {}
+        self.paused_until = 0.0
+        self.lock = threading.Lock()
+
+    def clone(self):
+        """
+        Build a FlowControl with the same settings and a fresh state, eg.
+        for another node.
+
+        :return: FlowControl object
+        """
+        limiter = self.limiter
+        return FlowControl(
+            AdaptiveLimiter(limiter.initial, limiter.min_limit, limiter.max_limit, limiter.backoff,
+                            limiter.latency_tolerance, limiter.alpha, limiter.clock),
+            self.rate, self.rates, self.burst, self.max_pause, self.clock, self.sleep)
+
+    def bucket(self, path):
+        """
+        Get the token bucket of a path.
+
+        :param path: str: path to  api endpoint
+        :return: TokenBucket object, None when the path is not rate limited
+        """
+        bucket = self.buckets.get(path)
+        if bucket is None:
+            rate = self.rates.get(path, self.rate)
+            if rate is None:
+                return None
+            with self.lock:
+                bucket = self.buckets.setdefault(
+                    path, TokenBucket(rate, self.burst, clock=self.clock, sleep=self.sleep))
+        return bucket
+
+    def request(self, send, path):
+        """
+        Send a request once the flow control allows it.
+
+        :param send: callable sending the request and returning a response
+        :param path: str: path to  api endpoint
+        :return: response object
+        """
+        bucket = self.bucket(path)
+        if bucket is not None:
+            bucket.acquire()
+        pause = self.paused_until - self.clock()
+        if pause > 0:
+            self.sleep(pause)
+        started = self.limiter.acquire()
+        try:
+            response = send()
+        except (requests.exceptions.Timeout, requests.exceptions.ConnectionError):
+            self.limiter.release(started, overloaded=True, path=path)
+            raise
+        except Exception:
+            self.limiter.release(started, path=path)
+            raise
+        overloaded = response.status_code in OVERLOAD_STATUSES
+        if overloaded:
+            self._retry_after(response)
+        self.limiter.release(started, overloaded, path)
+        return response
+
+    def _retry_after(self, response):
+        try:
+            delay = float(response.headers.get('Retry-After'))
+        except (TypeError, ValueError):
+            # http dates are not worth parsing, the limit already backed off.
+            return
+        pause_until = self.clock() + min(max(delay, 0.0), self.max_pause)
+        with self.lock:
+            self.paused_until = max(self.paused_until, pause_until)
+
+    def get_stats(self):
+        """
+        Get the state of the flow control.
+
+        :return: dict: limit, requests in flight, smoothed and lowest
+        latencies of each path, number of decreases of the limit
+        """
+        limiter = self.limiter
+        with limiter.condition:
+            return {
+                'limit': limiter.limit,
+                'in_flight': limiter.in_flight,
+                'latencies': {path: {'latency': latency, 'min_latency': min_latency}
+                              for path, (latency, min_latency) in limiter.latencies.items()},
+                'decreases': limiter.decreases,
+            }
@@ -0,0 +1,487 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+.. module:: Instrumentation
+   :synopsis: Per endpoint latency histograms, byte counts and error classes
+              of the requests sent to the nodes, exported as Prometheus text
+              or to callbacks.
+.. author:: Merouane Benthameur <merouane.benth@gmail.com>
+"""
+
+import asyncio
+import threading
+import time
+from collections import namedtuple
+from functools import partial
+
+import requests
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+from pyeos_client.AsyncNodeosConnect import StreamedResponse
+from pyeos_client.FastJson import loads
+from pyeos_client.NodeosConnect import BufferedResponse, PoolAdapter
+
+try:
+    import aiohttp
+except ImportError:  # pragma: no cover - optional dependency
+    aiohttp = None
+
+# phases of a request, in seconds. ttfb runs from the end of the connection
+# to the response headers, download from the headers to the end of the body.
+PHASES = ('total', 'connect', 'ttfb', 'download', 'decode')
+
+# upper bounds, in seconds, of the buckets exported to Prometheus.
+PROMETHEUS_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+RequestSample = namedtuple('RequestSample', [
+    'method', 'path', 'base_url', 'status_code', 'error',
+    'total', 'connect', 'ttfb', 'download', 'bytes_sent', 'bytes_received'])
+RequestSample.__doc__ = """ measures of one request, given to the callbacks of an Instrumentation.
+
+error is None on success, otherwise the class returned by classify_error.
+Phases are in seconds, download is None for streamed responses.
+"""
+
+_connect_timing = threading.local()
+
+
+def _add_connect_time(seconds):
+    _connect_timing.seconds = getattr(_connect_timing, 'seconds', 0.0) + seconds
+
+
+def _body_size(data):
+    # a str body is sent utf-8 encoded, its characters are not its bytes.
+    if data is None:
+        return 0
+    if isinstance(data, str):
+        return len(data.encode('utf-8'))
+    return len(data)
+
+
+class _TimedHTTPConnection(HTTPConnection):
+
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            super().connect()
+        finally:
+            _add_connect_time(time.perf_counter() - start)
+
+
+class _TimedHTTPSConnection(HTTPSConnection):
+
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            super().connect()
+        finally:
+            _add_connect_time(time.perf_counter() - start)
+
+
+class _TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _TimedHTTPConnection
+
+
+class _TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _TimedHTTPSConnection
+
+
+class InstrumentedAdapter(PoolAdapter):
+    """ a requests adapter timing the connections it opens, TLS handshake included"""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': _TimedHTTPConnectionPool,
+            'https': _TimedHTTPSConnectionPool,
+        }
+
+
+def classify_error(error=None, response=None):
+    """
+    Sort a failed request into a short error class.
+
+    :param error: exception raised by the request
+    :param response: response object, for http errors
+    :return: str: eg. connect_timeout, read_timeout, connection_error,
+    http_429, or the name of the error reported by nodeos (tx_duplicate
+    ..etc.), None for a successful response
+    """
+    if error is not None:
+        if isinstance(error, requests.exceptions.ConnectTimeout):
+            return 'connect_timeout'
+        if isinstance(error, requests.exceptions.ReadTimeout):
+            return 'read_timeout'
+        if isinstance(error, requests.exceptions.ConnectionError):
+            return 'connection_error'
+        if isinstance(error, asyncio.TimeoutError):
+            return 'timeout'
+        if aiohttp is not None and isinstance(error, aiohttp.ClientConnectionError):
+            return 'connection_error'
+        return type(error).__name__
+    if response is None or response.status_code < 400:
+        return None
+    try:
+        name = loads(response.content)['error']['name']
+    except Exception:
+        name = None
+    return name if isinstance(name, str) and name else 'http_%d' % response.status_code
+
+
+class LatencyHistogram:
+    """ a log-linear histogram of latencies, in the manner of HdrHistogram
+
+    Values are recorded in microseconds in buckets whose width is at most
+    1/2^(precision_bits-1) of their value, so the memory used does not
+    depend on the number of values.
+    """
+
+    def __init__(self, precision_bits=5, max_seconds=3600):
+        """
+        constructor of the LatencyHistogram
+
+        :param precision_bits: (int) bits of precision, 5 keeps every value
+        within about 6%
+        :param max_seconds: (float) highest recorded value, higher values
+        are counted in the last bucket
+        """
+        self.precision_bits = precision_bits
+        self.counts = [0] * (self._index(int(max_seconds * 1000000)) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def _index(self, micros):
+        p = self.precision_bits
+        if micros < (1 << p):
+            return micros
+        shift = micros.bit_length() - p
+        return (1 << p) + ((shift - 1) << (p - 1)) + (micros >> shift) - (1 << (p - 1))
+
+    def _highest(self, index):
+        p = self.precision_bits
+        if index < (1 << p):
+            return index
+        shift, offset = divmod(index - (1 << p), 1 << (p - 1))
+        return ((offset + (1 << (p - 1)) + 1) << (shift + 1)) - 1
+
+    def record(self, seconds):
+        """
+        Record a latency.
+
+        :param seconds: (float) latency
+        """
+        index = self._index(max(0, int(seconds * 1000000)))
+        self.counts[min(index, len(self.counts) - 1)] += 1
+        self.count += 1
+        self.sum += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def percentile(self, q):
+        """
+        Get the latency below which a share of the values were recorded.
+
+        :param q: (float) share, eg. 0.99
+        :return: float: seconds, None when nothing was recorded
+        """
+        if not self.count:
+            return None
+        rank = max(1, int(q * self.count + 0.5))
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return min(self._highest(index) / 1000000.0, self.max)
+        return self.max
+
+    def count_below(self, seconds):
+        """
+        Count the values recorded in buckets lying at or below a latency.
+
+        :param seconds: (float) latency
+        :return: int
+        """
+        limit = int(seconds * 1000000)
+        total = 0
+        for index, count in enumerate(self.counts):
+            if self._highest(index) > limit:
+                break
+            total += count
+        return total
+
+
+class PathMetrics:
+    """ counters and histograms of the requests sent to one api path"""
+
+    def __init__(self, precision_bits=5):
+        self.requests = 0
+        self.statuses = {}
+        self.errors = {}
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.histograms = dict((phase, LatencyHistogram(precision_bits)) for phase in PHASES)
+
+
+class Instrumentation:
+    """ metrics of the requests sent through one or more handlers
+
+    Give it to RequestHandlerAPI (or to NodePoolRequestHandlerAPI, which
+    passes it to every node) with the `instrumentation` argument. Handlers
+    without one do not pay for it.
+
+    :Example:
+
+    >>> instrumentation = Instrumentation(callbacks=[print])
+    >>> connection = RequestHandlerAPI(base_url='http://nodeos-server:8888',
+    ...                                instrumentation=instrumentation)
+    >>> ChainAPI(connection).get_info()
+    >>> print(instrumentation.prometheus_text())
+    """
+
+    def __init__(self, callbacks=(), precision_bits=5):
+        """
+        constructor of the Instrumentation
+
+        :param callbacks: callables given a RequestSample after each request
+        :param precision_bits: (int) precision of the latency histograms
+        """
+        self.callbacks = list(callbacks)
+        self.precision_bits = precision_bits
+        self.paths = {}
+        self.lock = threading.Lock()
+
+    def add_callback(self, callback):
+        """
+        Call `callback` with a RequestSample after each request.
+        """
+        self.callbacks.append(callback)
+
+    def _metrics(self, path):
+        metrics = self.paths.get(path)
+        if metrics is None:
+            metrics = self.paths[path] = PathMetrics(self.precision_bits)
+        return metrics
+
+    def record(self, sample):
+        """
+        Record the measures of a request.
+
+        :param sample: RequestSample object
+        """
+        with self.lock:
+            metrics = self._metrics(sample.path)
+            metrics.requests += 1
+            if sample.status_code is not None:
+                metrics.statuses[sample.status_code] = metrics.statuses.get(sample.status_code, 0) + 1
+            if sample.error is not None:
+                metrics.errors[sample.error] = metrics.errors.get(sample.error, 0) + 1
+            metrics.bytes_sent += sample.bytes_sent
+            metrics.bytes_received += sample.bytes_received
+            for phase in PHASES[:-1]:
+                value = getattr(sample, phase)
+                if value is not None:
+                    metrics.histograms[phase].record(value)
+        for callback in self.callbacks:
+            callback(sample)
+
+    def record_decode(self, path, seconds):
+        """
+        Record the time spent decoding the json body of a response.
+        """
+        with self.lock:
+            self._metrics(path).histograms['decode'].record(seconds)
+
+    def adapter(self, **kwargs):
+        """
+        Build the requests adapter timing the connections of a
+        RequestHandlerAPI.
+
+        :param kwargs: PoolAdapter arguments (pool_maxsize, socket_options ..etc.)
+        :return: InstrumentedAdapter object
+        """
+        return InstrumentedAdapter(**kwargs)
+
+    def request(self, session, method, base_url, path, **kwargs):
+        """
+        Send a request with a requests session, measuring it.
+
+        :param session: requests.Session object
+        :param method: str: http method
+        :param base_url: str: url of the node
+        :param path: str: path to  api endpoint
+        :param kwargs: other requests arguments (data, verify ..etc.)
+        :return: response object
+        """
+        stream = kwargs.pop('stream', False)
+        data = kwargs.get('data')
+        bytes_sent = _body_size(data)
+        _connect_timing.seconds = 0.0
+        start = time.perf_counter()
+        status_code = None
+        try:
+            response = session.request(method, base_url + path, stream=True, **kwargs)
+            status_code = response.status_code
+            headers_at = time.perf_counter()
+            if not stream:
+                # read the body here so its download gets timed.
+                response.content
+        except requests.exceptions.RequestException as e:
+            self.record(RequestSample(method, path, base_url, status_code, classify_error(e),
+                                      time.perf_counter() - start, _connect_timing.seconds,
+                                      None, None, bytes_sent, 0))
+            raise
+        end = time.perf_counter()
+        connect = _connect_timing.seconds
+        response.on_decode = partial(self.record_decode, path)
+        self.record(RequestSample(
+            method, path, base_url, status_code, classify_error(response=response),
+            end - start, connect, headers_at - start - connect,
+            None if stream else end - headers_at, bytes_sent,
+            0 if stream else len(response.content)))
+        return response
+
+    async def async_request(self, session, method, base_url, path, **kwargs):
+        """
+        Send a request with an aiohttp session, measuring it.
+
+        :param session: aiohttp.ClientSession object, created with the
+        trace config of aiohttp_trace_config
+        :param method: str: http method
+        :param base_url: str: url of the node
+        :param path: str: path to  api endpoint
+        :param kwargs: other aiohttp arguments (data, ssl ..etc.), stream
+        leaves the body unread
+        :return: BufferedResponse object, or StreamedResponse object
+        """
+        stream = kwargs.pop('stream', False)
+        data = kwargs.get('data')
+        bytes_sent = _body_size(data)
+        timing = {'connect': 0.0}
+        start = time.perf_counter()
+        status_code = None
+        try:
+            if stream:
+                response = await session.request(method, base_url + path, trace_request_ctx=timing,
+                                                 **kwargs)
+                status_code = response.status
+                headers_at = time.perf_counter()
+                content = b''
+                result = StreamedResponse(response)
+            else:
+                async with session.request(method, base_url + path, trace_request_ctx=timing,
+                                           **kwargs) as response:
+                    status_code = response.status
+                    headers_at = time.perf_counter()
+                    content = await response.read()
+                    result = BufferedResponse(status_code=response.status, content=content,
+                                              headers=response.headers, url=str(response.url),
+                                              reason=response.reason)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            self.record(RequestSample(method, path, base_url, status_code, classify_error(e),
+                                      time.perf_counter() - start, timing['connect'],
+                                      None, None, bytes_sent, 0))
+            raise
+        end = time.perf_counter()
+        connect = timing['connect']
+        result.on_decode = partial(self.record_decode, path)
+        self.record(RequestSample(
+            method, path, base_url, status_code, classify_error(response=result),
+            end - start, connect, headers_at - start - connect,
+            None if stream else end - headers_at, bytes_sent, len(content)))
+        return result
+
+    def aiohttp_trace_config(self):
+        """
+        Build the aiohttp trace config timing the connections of an
+        AsyncRequestHandlerAPI.
+
+        :return: aiohttp.TraceConfig object
+        """
+        import aiohttp
+
+        async def on_start(session, context, params):
+            context.connect_start = time.perf_counter()
+
+        async def on_end(session, context, params):
+            if isinstance(context.trace_request_ctx, dict):
+                context.trace_request_ctx['connect'] += time.perf_counter() - context.connect_start
+
+        trace_config = aiohttp.TraceConfig()
+        trace_config.on_connection_create_start.append(on_start)
+        trace_config.on_connection_create_end.append(on_end)
+        return trace_config
+
+    def get_stats(self):
+        """
+        Summarize the metrics of every path.
+
+        :return: dict: per path, requests, statuses, errors, bytes and the
+        p50, p99 and max of every phase, in seconds
+        """
+        with self.lock:
+            stats = {}
+            for path, metrics in self.paths.items():
+                stats[path] = {
+                    'requests': metrics.requests,
+                    'statuses': dict(metrics.statuses),
+                    'errors': dict(metrics.errors),
+                    'bytes_sent': metrics.bytes_sent,
+                    'bytes_received': metrics.bytes_received,
+                }
+                for phase, histogram in metrics.histograms.items():
+                    stats[path][phase] = {
+                        'count': histogram.count,
+                        'p50': histogram.percentile(0.5),
+                        'p99': histogram.percentile(0.99),
+                        'max': histogram.max,
+                    }
+            return stats
+
+    def prometheus_text(self, prefix='pyeos'):
+        """
+        Export the metrics in the Prometheus text format.
+
+        :param prefix: str: prefix of the metric names
+        :return: str
+        """
+        lines = [
+            '# TYPE %s_request_duration_seconds histogram' % prefix,
+        ]
+        with self.lock:
+            paths = sorted(self.paths.items())
+            for path, metrics in paths:
+                for phase in PHASES:
+                    histogram = metrics.histograms[phase]
+                    labels = 'path="%s",phase="%s"' % (path, phase)
+                    for bound in PROMETHEUS_BUCKETS:
+                        lines.append('%s_request_duration_seconds_bucket{%s,le="%s"} %d'
+                                     % (prefix, labels, bound, histogram.count_below(bound)))
+                    lines.append('%s_request_duration_seconds_bucket{%s,le="+Inf"} %d'
+                                 % (prefix, labels, histogram.count))
+                    lines.append('%s_request_duration_seconds_sum{%s} %.6f' % (prefix, labels, histogram.sum))
+                    lines.append('%s_request_duration_seconds_count{%s} %d' % (prefix, labels, histogram.count))
+            lines.append('# TYPE %s_requests_total counter' % prefix)
+            for path, metrics in paths:
+                for status, count in sorted(metrics.statuses.items()):
+                    lines.append('%s_requests_total{path="%s",status="%s"} %d' % (prefix, path, status, count))
+            lines.append('# TYPE %s_request_errors_total counter' % prefix)
+            for path, metrics in paths:
+                for error, count in sorted(metrics.errors.items()):
+                    lines.append('%s_request_errors_total{path="%s",error="%s"} %d' % (prefix, path, error, count))
+            lines.append('# TYPE %s_request_bytes_total counter' % prefix)
+            for path, metrics in paths:
+                lines.append('%s_request_bytes_total{path="%s",direction="sent"} %d'
+                             % (prefix, path, metrics.bytes_sent))
+                lines.append('%s_request_bytes_total{path="%s",direction="received"} %d'
+                             % (prefix, path, metrics.bytes_received))
+        return '\n'.join(lines) + '\n'
+
+    def reset(self):
+        """
+        Forget every recorded metric.
+        """
+        with self.lock:
+            self.paths = {}
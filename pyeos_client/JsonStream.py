@@ -0,0 +1,191 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+.. module:: JsonStream
+   :synopsis: An incremental json splitter yielding the items of an array
+              of a response while its body is still being received.
+.. author:: Merouane Benthameur <merouane.benth@gmail.com>
+"""
+
+import re
+
+from pyeos_client.FastJson import loads
+
+# a whole string, an unterminated string or a structural character.
+_TOKEN = re.compile(rb'"[^"\\]*(?:\\.[^"\\]*)*"|"|[\[\]{},]')
+# everything up to the next bracket or unterminated string, used within items.
+_SKIP = re.compile(rb'[^"\[\]{}]*(?:"[^"\\]*(?:\\.[^"\\]*)*"[^"\[\]{}]*)*')
+_ARRAY_VALUE = re.compile(rb'\s*:\s*\[')
+_ARRAY_VALUE_PREFIX = re.compile(rb'\s*(?::\s*)?')
+
+
+def _skip_item(buf, pos, depth, array_depth):
+    """
+    Move to the end of an item of the array, only looking at its brackets.
+
+    :return: tuple: (position, depth), the depth is still greater than
+    array_depth when the item goes on in the next chunk
+    """
+    skip, size = _SKIP.match, len(buf)
+    while True:
+        pos = skip(buf, pos).end()
+        if pos == size or buf[pos] == 0x22:
+            return pos, depth
+        if buf[pos] in b'[{':
+            depth += 1
+        else:
+            depth -= 1
+            if depth == array_depth:
+                return pos + 1, depth
+        pos += 1
+
+
+class JsonArrayStream:
+    """ the items of an array held by a key of a top level json object, decoded one by one
+
+    Only the item being received and the fields outside of the array are
+    kept in memory. The other fields are available in `rest` once the
+    items were all consumed, with the array left empty. The chunks may also
+    be an async iterable, the stream is then iterated with `async for`.
+
+    :Example:
+
+    >>> stream = JsonArrayStream(response.iter_content(65536), "rows")
+    >>> for row in stream:
+    ...     print(row)
+    >>> stream.rest
+    {'rows': [], 'more': False, 'next_key': ''}
+    """
+
+    def __init__(self, chunks, key, on_close=None):
+        """
+        constructor of the JsonArrayStream
+
+        :param chunks: iterable or async iterable of bytes, eg.
+        response.iter_content()
+        :param key: (str) key of the array in the top level object
+        :param on_close: callable invoked once the stream ends, eg.
+        response.close
+        """
+        self.chunks = chunks
+        self.key = key
+        self.on_close = on_close
+        self.rest = None
+
+    def __iter__(self):
+        splitter = _ArraySplitter(self.key)
+        try:
+            for chunk in self.chunks:
+                for item in splitter.feed(chunk):
+                    yield item
+            self.rest = splitter.finish()
+        finally:
+            if self.on_close is not None:
+                self.on_close()
+
+    async def __aiter__(self):
+        splitter = _ArraySplitter(self.key)
+        try:
+            async for chunk in self.chunks:
+                for item in splitter.feed(chunk):
+                    yield item
+            self.rest = splitter.finish()
+        finally:
+            if self.on_close is not None:
+                self.on_close()
+
+
+class _ArraySplitter:
+    """ the state of the split of one json document, fed chunk by chunk"""
+
+    def __init__(self, key):
+        self.key = b'"' + key.encode() + b'"'
+        self.buf = bytearray()
+        self.head = bytearray()
+        self.pos = self.mark = 0
+        self.depth = 0
+        self.array_depth = None
+        self.item_start = None
+        self.found = False
+
+    def feed(self, chunk):
+        """
+        Add a chunk of the document.
+
+        :param chunk: (bytes) next bytes of the document
+        :return: generator of the items completed by the chunk
+        """
+        buf = self.buf
+        pos, mark, depth = self.pos, self.mark, self.depth
+        array_depth, item_start, found = self.array_depth, self.item_start, self.found
+        buf += chunk
+        while True:
+            if array_depth is not None and depth > array_depth:
+                pos, depth = _skip_item(buf, pos, depth, array_depth)
+                if depth > array_depth:
+                    # the item goes on in the next chunk.
+                    break
+            match = _TOKEN.search(buf, pos)
+            if match is None:
+                pos = len(buf)
+                break
+            token, start, end = match.group(), match.start(), match.end()
+            if token[0] == 0x22:
+                if len(token) == 1:
+                    # the string goes on in the next chunk.
+                    pos = start
+                    break
+                pos = end
+                if depth == 1 and not found and token == self.key:
+                    value = _ARRAY_VALUE.match(buf, end)
+                    if value is None:
+                        if _ARRAY_VALUE_PREFIX.fullmatch(buf, end):
+                            pos = start
+                            break
+                        continue
+                    found = True
+                    self.head += buf[mark:value.end()]
+                    pos = mark = value.end()
+                    depth += 1
+                    array_depth = depth
+                    item_start = pos
+            elif token in b'[{':
+                depth += 1
+                pos = end
+            elif token == b',':
+                if depth == array_depth:
+                    yield loads(buf[item_start:start])
+                    item_start = end
+                pos = end
+            else:
+                if depth == array_depth:
+                    if buf[item_start:start].strip():
+                        yield loads(buf[item_start:start])
+                    array_depth = item_start = None
+                    mark = start
+                depth -= 1
+                pos = end
+        # drop what was consumed, keeping the pending item or the fields.
+        if array_depth is not None:
+            keep = item_start
+        else:
+            keep = mark
+        del buf[:keep]
+        pos -= keep
+        mark -= keep
+        if item_start is not None:
+            item_start -= keep
+        self.pos, self.mark, self.depth = pos, mark, depth
+        self.array_depth, self.item_start, self.found = array_depth, item_start, found
+
+    def finish(self):
+        """
+        End the document.
+
+        :return: json: the document with the array left empty
+        """
+        if self.array_depth is not None:
+            raise ValueError('truncated json, the array %s was not closed' % self.key.decode())
+        self.head += self.buf[self.mark:]
+        return loads(self.head)
@@ -0,0 +1,434 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+.. module:: LocalSigner
+   :synopsis: An in-process replacement of the keosd signing API: secp256k1
+              canonical signatures of EOS transactions, in pure python.
+.. author:: Merouane Benthameur <merouane.benth@gmail.com>
+
+The multiplications by a secret (private keys and nonces) go through
+libsecp256k1 when coincurve is installed (pip install pyeos_client[signing]).
+The pure python fallback avoids branches and table lookups depending on
+the secret, but python integers are not constant time: it is not
+hardened against timing side channels, keep it to hosts where no
+attacker can measure the signing time.
+"""
+
+import hashlib
+import hmac
+import json
+from concurrent.futures import ProcessPoolExecutor
+from secrets import randbelow
+
+try:
+    import coincurve
+except ImportError:  # pragma: no cover - optional dependency
+    coincurve = None
+
+from pyeos_client.AbiSerializer import (
+    TRANSACTION_ABI, TRANSACTION_DEFAULTS, AbiError, AbiSerializer,
+    base58_decode, base58_encode, key_to_string, string_to_key)
+from pyeos_client.NodeosConnect import BufferedResponse
+
+# secp256k1 domain parameters.
+P = 0xfffffffffffffffffffffffffffffffffffffffffffffffffffffffefffffc2f
+N = 0xfffffffffffffffffffffffffffffffebaaedce6af48a03bbfd25e8cd0364141
+G = (0x79be667ef9dcbbac55a06295ce870b07029bfcdb2dce28d959f2815b16f81798,
+     0x483ada7726a3c4655da4fbfc0e1108a8fd17b448a68554199c47d08ffb10d4b8)
+
+_G_TABLE = []
+_TRANSACTION_SERIALIZER = AbiSerializer(TRANSACTION_ABI)
+
+
+def _jacobian_double(point):
+    x, y, z = point
+    if not y:
+        return (0, 0, 0)
+    ysq = y * y % P
+    s = 4 * x * ysq % P
+    m = 3 * x * x % P
+    nx = (m * m - 2 * s) % P
+    ny = (m * (s - nx) - 8 * ysq * ysq) % P
+    return (nx, ny, 2 * y * z % P)
+
+
+def _jacobian_add_affine(point, affine):
+    """
+    Add an affine point to a jacobian point.
+    """
+    x1, y1, z1 = point
+    if not z1:
+        return (affine[0], affine[1], 1)
+    x2, y2 = affine
+    z1z1 = z1 * z1 % P
+    u2 = x2 * z1z1 % P
+    s2 = y2 * z1 * z1z1 % P
+    if u2 == x1:
+        if s2 != y1:
+            return (0, 0, 0)
+        return _jacobian_double(point)
+    h = (u2 - x1) % P
+    r = (s2 - y1) % P
+    hh = h * h % P
+    hhh = h * hh % P
+    v = x1 * hh % P
+    nx = (r * r - hhh - 2 * v) % P
+    ny = (r * (v - nx) - y1 * hhh) % P
+    return (nx, ny, z1 * h % P)
+
+
+def _to_affine(point):
+    x, y, z = point
+    if not z:
+        return None
+    z_inv = pow(z, P - 2, P)
+    z_inv2 = z_inv * z_inv % P
+    return (x * z_inv2 % P, y * z_inv2 * z_inv % P)
+
+
+def _g_table():
+    # the multiples j * 16^i * G for j from 1 to 16, so that k * G costs
+    # 64 additions whatever the nibbles of k.
+    if not _G_TABLE:
+        base = G
+        for _ in range(64):
+            row = []
+            acc = (0, 0, 0)
+            for _ in range(16):
+                acc = _jacobian_add_affine(acc, base)
+                row.append(_to_affine(acc))
+            _G_TABLE.append(row)
+            base = row[-1]
+    return _G_TABLE
+
+
+# the scalar whose 64 nibbles are all ones.
+_ONES = int('1' * 64, 16)
+
+
+def _select(row, digit):
+    """
+    Read row[digit - 1] going through every entry, so the memory accesses
+    do not depend on the digit.
+    """
+    x = y = 0
+    for j, (px, py) in enumerate(row, 1):
+        mask = -(j == digit)
+        x |= px & mask
+        y |= py & mask
+    return (x, y)
+
+
+def point_mul_g(k):
+    """
+    Multiply the generator of secp256k1 by a scalar.
+
+    :param k: (int) scalar, from 1 to N - 1
+    :return: tuple: affine point (x, y)
+    """
+    if coincurve is not None:
+        data = coincurve.PublicKey.from_secret(k.to_bytes(32, 'big')).format(compressed=False)
+        return (int.from_bytes(data[1:33], 'big'), int.from_bytes(data[33:], 'big'))
+    table = _g_table()
+    # k = (k - ONES mod N) + ONES modulo N, the digits of the first term
+    # plus one are never zero, so every window adds a point.
+    k = (k - _ONES) % N
+    acc = (0, 0, 0)
+    for i in range(64):
+        acc = _jacobian_add_affine(acc, _select(table[i], ((k >> (4 * i)) & 0xf) + 1))
+    return _to_affine(acc)
+
+
+def compress_point(point):
+    """
+    Encode a point in the 33 bytes compressed form.
+    """
+    return bytes([2 + (point[1] & 1)]) + point[0].to_bytes(32, 'big')
+
+
+def decompress_point(data):
+    """
+    Decode a 33 bytes compressed point.
+    """
+    x = int.from_bytes(data[1:], 'big')
+    y = pow((x * x * x + 7) % P, (P + 1) // 4, P)
+    if (y & 1) != (data[0] & 1):
+        y = P - y
+    return (x, y)
+
+
+def private_key_from_string(s):
+    """
+    Parse a private key in the WIF or PVT_K1_ format.
+
+    :param s: (str) private key
+    :return: int
+    """
+    if s.startswith('PVT_'):
+        key_type, data = string_to_key(s)
+        if key_type != 0:
+            raise AbiError('only K1 private keys are supported')
+        return int.from_bytes(data, 'big')
+    raw = base58_decode(s)
+    payload, checksum = raw[:-4], raw[-4:]
+    if hashlib.sha256(hashlib.sha256(payload).digest()).digest()[:4] != checksum:
+        raise AbiError('invalid checksum in private key')
+    if payload[0] != 0x80 or len(payload) != 33:
+        raise AbiError('invalid WIF private key')
+    return int.from_bytes(payload[1:], 'big')
+
+
+def private_key_to_wif(secret):
+    """
+    Format a private key in the WIF format.
+    """
+    payload = b'\x80' + secret.to_bytes(32, 'big')
+    return base58_encode(payload + hashlib.sha256(hashlib.sha256(payload).digest()).digest()[:4])
+
+
+def public_key_from_private(secret, legacy=True):
+    """
+    Derive the public key string of a private key.
+
+    :param secret: (int) private key
+    :param legacy: (bool) use the EOS... form instead of PUB_K1_...
+    :return: str
+    """
+    data = compress_point(point_mul_g(secret))
+    return key_to_string(data, 0, 'EOS' if legacy else 'PUB')
+
+
+def _rfc6979_nonces(secret, digest):
+    """
+    Generate the successive nonces of RFC 6979, HMAC-SHA256 flavour.
+    """
+    key = secret.to_bytes(32, 'big') + digest
+    v = b'\x01' * 32
+    k = b'\x00' * 32
+    k = hmac.new(k, v + b'\x00' + key, hashlib.sha256).digest()
+    v = hmac.new(k, v, hashlib.sha256).digest()
+    k = hmac.new(k, v + b'\x01' + key, hashlib.sha256).digest()
+    v = hmac.new(k, v, hashlib.sha256).digest()
+    while True:
+        v = hmac.new(k, v, hashlib.sha256).digest()
+        yield int.from_bytes(v, 'big')
+        k = hmac.new(k, v + b'\x00', hashlib.sha256).digest()
+        v = hmac.new(k, v, hashlib.sha256).digest()
+
+
+def is_canonical(signature):
+    """
+    Tell whether a compact signature is canonical, as required by nodeos.
+
+    :param signature: (bytes) 65 bytes compact signature
+    """
+    return (not signature[1] & 0x80 and not (signature[1] == 0 and not signature[2] & 0x80)
+            and not signature[33] & 0x80 and not (signature[33] == 0 and not signature[34] & 0x80))
+
+
+def sign_digest(secret, digest):
+    """
+    Sign a sha256 digest, looping over the nonces like fc until the
+    signature is canonical.
+
+    :param secret: (int) private key
+    :param digest: (bytes) 32 bytes digest
+    :return: str: SIG_K1_ signature
+    """
+    z = int.from_bytes(digest, 'big')
+    nonces = _rfc6979_nonces(secret, digest)
+    # fc skips the first nonce, its nonce function bumps the counter before use.
+    next(nonces)
+    for nonce in nonces:
+        if not 0 < nonce < N:
+            continue
+        point = point_mul_g(nonce)
+        r = point[0] % N
+        if not r:
+            continue
+        # the inverse of the nonce is computed on a blinded value.
+        blind = randbelow(N - 1) + 1
+        s = blind * pow(nonce * blind % N, N - 2, N) * (z + r * secret) % N
+        if not s:
+            continue
+        recid = (point[1] & 1) | (2 if point[0] >= N else 0)
+        if s > N // 2:
+            s = N - s
+            recid ^= 1
+        signature = bytes([27 + 4 + recid]) + r.to_bytes(32, 'big') + s.to_bytes(32, 'big')
+        if is_canonical(signature):
+            return key_to_string(signature, 0, 'SIG')
+
+
+def pack_transaction(transaction):
+    """
+    Pack a json transaction whose action data is hex encoded.
+
+    :param transaction: dict: transaction
+    :return: bytes
+    """
+    values = dict(TRANSACTION_DEFAULTS)
+    values.update(transaction)
+    return _TRANSACTION_SERIALIZER.pack('transaction', values)
+
+
+def signing_digest(chain_id, packed_trx, context_free_data=b''):
+    """
+    Compute the digest signed for a transaction.
+
+    :param chain_id: (str) hex chain id
+    :param packed_trx: (bytes) packed transaction
+    :param context_free_data: (bytes) packed context free data
+    :return: bytes
+    """
+    cfd_digest = hashlib.sha256(context_free_data).digest() if context_free_data else b'\0' * 32
+    return hashlib.sha256(bytes.fromhex(chain_id) + packed_trx + cfd_digest).digest()
+
+
+def _sign_job(job):
+    secrets, digest = job
+    return [sign_digest(secret, digest) for secret in secrets]
+
+
+class LocalSigner:
+    """ an in-process wallet signing transactions with its own keys.
+
+    It answers the key and signing calls of WalletAPI, so it can replace a
+    WalletAPI talking to keosd.
+    """
+
+    def __init__(self, private_keys=()):
+        """
+        constructor of the LocalSigner
+
+        :param private_keys: list of private keys, in the WIF or PVT_K1_ format
+        """
+        self.keys = {}
+        for private_key in private_keys:
+            self.import_key(private_key)
+
+    def import_key(self, private_key):
+        """
+        Add a private key to the signer.
+
+        :param private_key: (str) private key, in the WIF or PVT_K1_ format
+        :return: str: public key in the legacy EOS... format
+        """
+        secret = private_key_from_string(private_key)
+        public_key = public_key_from_private(secret)
+        self.keys[public_key] = secret
+        return public_key
+
+    def _secret(self, public_key):
+        key_type, data = string_to_key(public_key)
+        legacy = key_to_string(data, key_type, 'EOS')
+        try:
+            return self.keys[legacy]
+        except KeyError:
+            raise KeyError('no private key for %s' % public_key)
+
+    def sign_transaction(self, transaction, public_keys, chain_id, context_free_data=b''):
+        """
+        Sign a json transaction with the keys matching `public_keys`.
+
+        :param transaction: dict: transaction, with hex encoded action data
+        :param public_keys: list of public keys to sign with
+        :param chain_id: (str) hex chain id
+        :param context_free_data: (bytes) packed context free data
+        :return: dict: transaction with its signatures appended
+        """
+        signed = dict(transaction)
+        signed['signatures'] = list(transaction.get('signatures', [])) + self.sign_packed_transaction(
+            pack_transaction(transaction), public_keys, chain_id, context_free_data)
+        return signed
+
+    def sign_packed_transaction(self, packed_trx, public_keys, chain_id, context_free_data=b''):
+        """
+        Sign a transaction already packed, eg. by Transaction.
+
+        :param packed_trx: (bytes) packed transaction
+        :param public_keys: list of public keys to sign with
+        :param chain_id: (str) hex chain id
+        :param context_free_data: (bytes) packed context free data
+        :return: list of SIG_K1_ signatures
+        """
+        digest = signing_digest(chain_id, packed_trx, context_free_data)
+        return [sign_digest(self._secret(public_key), digest) for public_key in public_keys]
+
+    def sign_transactions(self, transactions, public_keys, chain_id, processes=None, chunksize=16):
+        """
+        Sign many transactions on a pool of processes, for bulk jobs.
+
+        :param transactions: list of json transactions
+        :param public_keys: list of public keys to sign each one with
+        :param chain_id: (str) hex chain id
+        :param processes: (int) number of processes, defaults to the cpu count
+        :param chunksize: (int) transactions sent to a process at once
+        :return: list of signed transactions, in the input order
+        """
+        secrets = [self._secret(public_key) for public_key in public_keys]
+        jobs = [(secrets, signing_digest(chain_id, pack_transaction(transaction)))
+                for transaction in transactions]
+        with ProcessPoolExecutor(max_workers=processes) as executor:
+            signatures = list(executor.map(_sign_job, jobs, chunksize=chunksize))
+        signed = []
+        for transaction, transaction_signatures in zip(transactions, signatures):
+            transaction = dict(transaction)
+            transaction['signatures'] = list(transaction.get('signatures', [])) + transaction_signatures
+            signed.append(transaction)
+        return signed
+
+    def wallet_sign_trx(self, transaction_data):
+        """
+        Sign transaction given an array of transaction, require
+        public keys, and chain id
+
+        :param transaction_data: (list or str) transaction, public keys and
+        chain id, a list or a string of a json list
+        :return: response object
+
+        :Example:
+
+        >>> LocalSigner.wallet_sign_trx(transaction_data='[{"expiration":"2018-06-01T12:00:30","ref_block_num":21453,"ref_block_prefix":3165644999,"actions":[...]},["EOS6MRyAjQq8ud7hVNYcfnVPJqcVpscN5So8BhtHuGYqET5GDW5CV"],"cf057bbfb72640471fd910bcb67639c22df9f92470936cddc1ade0e2f2e7dc4f"]')
+
+        """
+        if isinstance(transaction_data, str):
+            transaction_data = json.loads(transaction_data)
+        transaction, public_keys, chain_id = transaction_data
+        return _json_response(self.sign_transaction(transaction, public_keys, chain_id))
+
+    def wallet_import_key(self, wallet_name_privKey):
+        """
+        Import a private key, the wallet name is ignored.
+
+        :param wallet_name_privKey: (list or str) wallet name and private
+        key, a list or a string of a json list
+        :return: response object
+        """
+        if isinstance(wallet_name_privKey, str):
+            wallet_name_privKey = json.loads(wallet_name_privKey)
+        _, private_key = wallet_name_privKey
+        self.import_key(private_key)
+        return _json_response({})
+
+    def wallet_get_public_keys(self):
+        """
+        List all public keys of the signer
+
+        :return: response object
+        """
+        return _json_response(sorted(self.keys))
+
+    def wallet_list_keys(self):
+        """
+        List all key pairs of the signer
+
+        :return: response object
+        """
+        return _json_response([[public_key, private_key_to_wif(secret)]
+                               for public_key, secret in sorted(self.keys.items())])
+
+
+def _json_response(value):
+    return BufferedResponse(status_code=200, content=json.dumps(value).encode(), reason='OK')
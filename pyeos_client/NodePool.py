@@ -0,0 +1,331 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+.. module:: NodePool
+   :synopsis: A RequestHandlerAPI spreading requests over several nodes,
+              routing each one to the fastest healthy node.
+.. author:: Merouane Benthameur <merouane.benth@gmail.com>
+"""
+
+import threading
+import time
+from collections import defaultdict, deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import requests
+
+from pyeos_client.NodeosConnect import IDEMPOTENT_PATHS, RequestHandlerAPI, encode_body
+from pyeos_client.Retry import RETRIABLE_STATUSES, not_sent
+
+
+class NodeStats:
+    """ health figures of one node of the pool"""
+
+    def __init__(self, base_url, alpha):
+        self.base_url = base_url
+        self.alpha = alpha
+        self.latency = None
+        self.error_rate = 0.0
+        self.head_block_num = None
+        self.lag = 0
+        self.in_flight = 0
+        self.failures = 0
+        self.down_until = 0.0
+        self.requests = 0
+        self.errors = 0
+
+    def record(self, latency, error):
+        self.requests += 1
+        self.errors += error
+        self.error_rate += self.alpha * (error - self.error_rate)
+        if latency is not None:
+            if self.latency is None:
+                self.latency = latency
+            else:
+                self.latency += self.alpha * (latency - self.latency)
+
+    def as_dict(self):
+        return dict((key, value) for key, value in vars(self).items() if key != 'alpha')
+
+
+class NodePoolRequestHandlerAPI:
+    """ a class to handle the http connections with several EOS nodes."""
+
+    def __init__(self, base_urls, verify=False, max_lag=10, alpha=0.2,
+                 failure_threshold=3, cooldown=5.0, health_interval=5.0,
+                 hedge_percentile=None, hedge_min_samples=20, hedge_window=256,
+                 hedge_workers=32, clock=time.monotonic, **kwargs):
+        """
+        constructor of the NodePoolRequestHandlerAPI
+
+        :param base_urls: list: urls of the nodes, eg. http://nodeos-server:8888
+        :param verify: bool: verify the ssl certificate of the nodes
+        :param max_lag: (int) number of blocks a node may be behind the best
+        head before it is considered unhealthy, the lag is measured by the
+        health checks
+        :param alpha: (float) smoothing factor of the latency and error EWMAs
+        :param failure_threshold: (int) consecutive failures after which a node
+        is taken out of rotation for `cooldown` seconds
+        :param cooldown: (float) seconds a failing node is left aside
+        :param health_interval: (float) seconds between two background
+        get_info health checks, None to only run them on `health_check`, in
+        which case `max_lag` is ignored until it is called
+        :param hedge_percentile: (float) enable hedging of read calls: when a
+        read call has not answered within this percentile (eg. 0.95) of the
+        recent latencies of its path, a duplicate is sent to the next node
+        (or on another connection to the same node) and the first answer wins
+        :param hedge_min_samples: (int) latencies recorded for a path before
+        its calls get hedged
+        :param hedge_window: (int) number of recent latencies kept per path
+        :param hedge_workers: (int) threads running hedged calls
+        :param clock: callable returning the current time in seconds
+        :param kwargs: arguments given to every RequestHandlerAPI (headers ..etc.),
+        each node gets its own clone of a `flow_control`
+        """
+        if not base_urls:
+            raise ValueError('at least one node url is required')
+        flow_control = kwargs.pop('flow_control', None)
+        self.nodes = [RequestHandlerAPI(base_url, verify=verify,
+                                        flow_control=flow_control.clone() if flow_control is not None else None,
+                                        **kwargs)
+                      for base_url in base_urls]
+        self.stats = dict((node.base_url, NodeStats(node.base_url, alpha)) for node in self.nodes)
+        self.max_lag = max_lag
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.clock = clock
+        self.lock = threading.Lock()
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_samples = hedge_min_samples
+        self.latencies = defaultdict(lambda: deque(maxlen=hedge_window))
+        self.hedges_fired = 0
+        self.hedges_won = 0
+        self._executor = ThreadPoolExecutor(max_workers=hedge_workers) if hedge_percentile else None
+        self._stop = threading.Event()
+        self._thread = None
+        if health_interval:
+            self._thread = threading.Thread(target=self._run_health_checks,
+                                            args=(health_interval,), daemon=True)
+            self._thread.start()
+
+    def get(self, path, **kwargs):
+        """
+        A GET Http method, sent to the best node.
+
+        :param path: str: path to  api endpoint
+        :param kwargs: json: arguments auth, headers, data ..etc.
+
+        :return: response object
+
+        """
+        return self._request('get', path, **kwargs)
+
+    def post(self, path, **kwargs):
+        """
+        A POST Http method, sent to the best node. Read calls fail over to
+        the next node, other calls only when the request was not delivered.
+
+        :param path: str: path to  api endpoint
+        :param kwargs: json: arguments auth, headers, data ..etc.
+
+        :return: response object
+
+        """
+        return self._request('post', path, **kwargs)
+
+    def ranked_nodes(self):
+        """
+        Sort the nodes from the best to the worst candidate.
+
+        :return: list of RequestHandlerAPI objects
+        """
+        now = self.clock()
+        with self.lock:
+            return sorted(self.nodes, key=lambda node: self._score(self.stats[node.base_url], now))
+
+    def _score(self, stats, now):
+        unhealthy = stats.down_until > now or stats.lag > self.max_lag
+        # unknown nodes get tried first so every node gets measured.
+        latency = stats.latency if stats.latency is not None else 0.0
+        return (unhealthy, latency * (1 + stats.in_flight) * (1 + 10 * stats.error_rate))
+
+    def _request(self, method, path, **kwargs):
+        if 'data' in kwargs:
+            # serialized once, whatever the number of nodes tried.
+            kwargs['data'] = encode_body(kwargs['data'])
+        idempotent = path in IDEMPOTENT_PATHS
+        nodes = self.ranked_nodes()
+        response, error = None, None
+        if idempotent and self._executor is not None:
+            response, error, contacted = self._hedged_attempt(nodes[:2], method, path, kwargs)
+            if error is None and response.status_code not in RETRIABLE_STATUSES:
+                return response
+            # a node the hedge did not reach is still tried.
+            nodes = nodes[contacted:]
+        for node in nodes:
+            response, error = self._attempt(node, method, path, kwargs)
+            if error is None:
+                if response.status_code not in RETRIABLE_STATUSES:
+                    return response
+            elif not (idempotent or not_sent(error)):
+                raise error
+        if error is not None:
+            raise error
+        return response
+
+    def _attempt(self, node, method, path, kwargs):
+        """
+        Send a request to one node and record its outcome.
+
+        :return: tuple: (response, None) or (None, exception)
+        """
+        stats = self.stats[node.base_url]
+        with self.lock:
+            stats.in_flight += 1
+        start = self.clock()
+        try:
+            response = getattr(node, method)(path, **kwargs)
+        except requests.exceptions.RequestException as e:
+            self._record(stats, None, True)
+            return None, e
+        finally:
+            with self.lock:
+                stats.in_flight -= 1
+        latency = self.clock() - start
+        failed = response.status_code in RETRIABLE_STATUSES
+        self._record(stats, latency, failed)
+        if not failed:
+            with self.lock:
+                self.latencies[path].append(latency)
+        return response, None
+
+    def hedge_delay(self, path):
+        """
+        Get the time after which a call to `path` gets hedged.
+
+        :param path: str: path to  api endpoint
+        :return: float: seconds, None while too few latencies were recorded
+        """
+        with self.lock:
+            samples = sorted(self.latencies[path])
+        if len(samples) < self.hedge_min_samples:
+            return None
+        return samples[min(len(samples) - 1, int(self.hedge_percentile * len(samples)))]
+
+    def _hedged_attempt(self, nodes, method, path, kwargs):
+        """
+        Send a request to the first node, and a duplicate to the second
+        one when the first is slower than the hedge delay.
+
+        :return: tuple: (response, exception, number of nodes contacted)
+        """
+        primary_node = nodes[0]
+        backup_node = nodes[1] if len(nodes) > 1 else nodes[0]
+        contacted = 2 if backup_node is not primary_node else 1
+        primary = self._executor.submit(self._attempt, primary_node, method, path, kwargs)
+        delay = self.hedge_delay(path)
+        if delay is None:
+            return primary.result() + (1,)
+        done, _ = wait([primary], timeout=delay)
+        if done:
+            return primary.result() + (1,)
+        backup = self._executor.submit(self._attempt, backup_node, method, path, kwargs)
+        with self.lock:
+            self.hedges_fired += 1
+        pending = set([primary, backup])
+        outcome = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                outcome = future.result()
+                response, error = outcome
+                if error is None and response.status_code not in RETRIABLE_STATUSES:
+                    if future is backup:
+                        with self.lock:
+                            self.hedges_won += 1
+                    for loser in pending:
+                        _discard(loser)
+                    return outcome + (contacted,)
+        return outcome + (contacted,)
+
+    def get_hedge_stats(self):
+        """
+        Get the hedging counters.
+
+        :return: dict: number of hedges fired, and won by the duplicate
+        """
+        with self.lock:
+            return {'fired': self.hedges_fired, 'won': self.hedges_won}
+
+    def _record(self, stats, latency, error):
+        with self.lock:
+            stats.record(latency, error)
+            stats.failures = stats.failures + 1 if error else 0
+            if stats.failures >= self.failure_threshold:
+                stats.down_until = self.clock() + self.cooldown
+
+    def health_check(self):
+        """
+        Query get_info on every node to update their head block lag.
+
+        :return: dict: statistics of each node, by url
+        """
+        def check(node):
+            try:
+                response = node.get(path='/v1/chain/get_info', timeout=self.cooldown)
+                response.raise_for_status()
+                return node, response.json()['head_block_num']
+            except (requests.exceptions.RequestException, ValueError, KeyError):
+                return node, None
+
+        with ThreadPoolExecutor(max_workers=len(self.nodes)) as executor:
+            heads = list(executor.map(check, self.nodes))
+        best = max([head for _, head in heads if head is not None] or [0])
+        with self.lock:
+            for node, head in heads:
+                stats = self.stats[node.base_url]
+                if head is None:
+                    stats.failures += 1
+                    stats.down_until = self.clock() + self.cooldown
+                else:
+                    stats.head_block_num = head
+                    stats.lag = best - head
+        return self.get_stats()
+
+    def get_stats(self):
+        """
+        Get the health figures of every node.
+
+        :return: dict: statistics of each node, by url
+        """
+        with self.lock:
+            return dict((url, stats.as_dict()) for url, stats in self.stats.items())
+
+    def _run_health_checks(self, interval):
+        while not self._stop.wait(interval):
+            self.health_check()
+
+    def close(self):
+        """
+        Stop the background health checks and close the sessions.
+        """
+        self._stop.set()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+        for node in self.nodes:
+            node.session.close()
+
+
+def _discard(future):
+    """
+    Cancel the losing call of a hedge, or release its connection once done.
+    """
+    def close(done_future):
+        response, _ = done_future.result()
+        if response is not None:
+            response.close()
+
+    if not future.cancel():
+        future.add_done_callback(close)
+
@@ -8,52 +8,410 @@
 .. author: Merouane Benthameur <merouane.benth@gmail.com>
 """
 
+import json
+import socket
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
 import requests
+from requests.adapters import HTTPAdapter
+
+from pyeos_client.FastJson import dumps
 
 __version__ = "0.1.9"
 
+# chain api calls which do not change the state of the chain, they may be
+# sent again or to another node without side effects.
+IDEMPOTENT_PATHS = frozenset([
+    '/v1/chain/get_info',
+    '/v1/chain/get_block',
+    '/v1/chain/get_block_header_state',
+    '/v1/chain/get_account',
+    '/v1/chain/get_code',
+    '/v1/chain/get_code_hash',
+    '/v1/chain/get_abi',
+    '/v1/chain/get_raw_abi',
+    '/v1/chain/get_raw_code_and_abi',
+    '/v1/chain/get_table_rows',
+    '/v1/chain/get_table_by_scope',
+    '/v1/chain/get_currency_balance',
+    '/v1/chain/get_currency_stats',
+    '/v1/chain/get_producers',
+    '/v1/chain/abi_json_to_bin',
+    '/v1/chain/abi_bin_to_json',
+    '/v1/chain/get_required_keys',
+])
+
+
+def is_json_text(value):
+    """
+    Tell whether a value is an already serialized json object, list or
+    string, as taken by the API wrappers before they accepted native values.
+
+    :param value: value passed to an API method
+    :return: bool
+    """
+    if isinstance(value, str):
+        return value.lstrip()[:1] in ('{', '[', '"')
+    return isinstance(value, (bytes, bytearray))
+
+
+def encode_body(data):
+    """
+    Serialize the body of a request with the fast json backend. Strings and
+    bytes are sent as they are.
+
+    :param data: body of the request, native value or serialized json
+    :return: str or bytes
+    """
+    if data is None or isinstance(data, (str, bytes, bytearray)):
+        return data
+    return dumps(data)
+
+
+@lru_cache(maxsize=4096, typed=True)
+def field_body(key, value):
+    """
+    Serialize the body of a request taking a single field. Bodies are
+    cached, repeated calls such as get_account of the same account do not
+    serialize them again.
+
+    :param key: str: name of the field
+    :param value: hashable value of the field
+    :return: bytes
+    """
+    return dumps({key: value})
+
+
+def request_body(value, key):
+    """
+    Build the body of a request from the argument of an API method. Json
+    text, dicts and lists are sent as they are, other values become the
+    `key` field of a json object.
+
+    :param value: argument of the API method
+    :param key: str: name of the field carrying a native value
+    :return: body of the request
+    """
+    if value is None or is_json_text(value) or isinstance(value, (dict, list, tuple)):
+        return value
+    return field_body(key, value)
+
+
+def query_body(data, query, defaults=None):
+    """
+    Build the body of a request from the arguments of an API method taking
+    either a whole request or its fields as keywords. Keywords given along
+    with a dict override its fields.
+
+    :param data: dict, json text or None
+    :param query: dict: keyword fields of the API method
+    :param defaults: dict: fields of a request built from keywords only
+    :return: body of the request
+    :raises ValueError: when keywords are given along with json text
+    """
+    if data is None:
+        return dict(defaults or {}, **query)
+    if not query:
+        return data
+    if not isinstance(data, dict):
+        raise ValueError('fields %s cannot be added to a json text request' % ', '.join(sorted(query)))
+    return dict(data, **query)
+
+
+class BufferedResponse:
+    """ a fully read http response exposing the subset of requests.Response used by the API wrappers."""
+
+    def __init__(self, status_code, content, headers=None, url=None, reason=None):
+        self.status_code = status_code
+        self.content = content
+        self.headers = headers or {}
+        self.url = url
+        self.reason = reason
+
+    @property
+    def ok(self):
+        return self.status_code < 400
+
+    @property
+    def text(self):
+        return self.content.decode('utf-8')
+
+    def json(self, **kwargs):
+        """
+        Decode the body of the response.
+
+        :return: json: decoded body
+
+        """
+        return json.loads(self.content, **kwargs)
+
+    def iter_content(self, chunk_size=1, decode_unicode=False):
+        """
+        Iterate over the body of the response by chunks.
+
+        :param chunk_size: (int) size of the chunks
+        :return: generator of bytes
+        """
+        chunk_size = chunk_size or len(self.content) or 1
+        for i in range(0, len(self.content), chunk_size):
+            yield self.content[i:i + chunk_size]
+
+    def close(self):
+        """
+        Nothing to release, the body was already read.
+        """
+
+    def raise_for_status(self):
+        """
+        Raise requests.exceptions.HTTPError if the node answered with an error.
+        """
+        if not self.ok:
+            raise requests.exceptions.HTTPError(
+                '%s Error: %s for url: %s' % (self.status_code, self.reason, self.url),
+                response=self)
+
+    def __repr__(self):
+        return '<BufferedResponse [%s]>' % self.status_code
+
+
+def tcp_socket_options(nodelay=True, keepalive=None):
+    """
+    Build the socket options of the connections to a node.
+
+    :param nodelay: (bool) disable Nagle's algorithm
+    :param keepalive: (float) seconds of idleness after which tcp keep-alive
+    probes are sent, None to leave them disabled
+    :return: list of (level, option, value) tuples
+    """
+    options = [(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)] if nodelay else []
+    if keepalive is not None:
+        options.append((socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1))
+        # the idle time and interval options are not available on every platform.
+        for name in ('TCP_KEEPIDLE', 'TCP_KEEPINTVL'):
+            if hasattr(socket, name):
+                options.append((socket.IPPROTO_TCP, getattr(socket, name), max(1, int(keepalive))))
+    return options
+
+
+class PoolAdapter(HTTPAdapter):
+    """ a requests adapter whose connections get custom socket options"""
+
+    __attrs__ = HTTPAdapter.__attrs__ + ['socket_options']
+
+    def __init__(self, socket_options=None, **kwargs):
+        """
+        constructor of the PoolAdapter
+
+        :param socket_options: list of (level, option, value) tuples, the
+        urllib3 defaults when None
+        :param kwargs: HTTPAdapter arguments (pool_connections, pool_maxsize,
+        pool_block ..etc.)
+        """
+        self.socket_options = socket_options
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        if self.socket_options is not None:
+            kwargs['socket_options'] = self.socket_options
+        super().init_poolmanager(*args, **kwargs)
+
+
+_shared_handlers = {}
+_shared_handlers_lock = threading.Lock()
+# the private urllib3 pool methods prewarm relies on.
+_POOL_METHODS = ('_get_conn', '_new_conn', '_put_conn')
+
 
 class RequestHandlerAPI:
-    """ a class to handle the http connection with the EOS node."""
+    """ a class to handle the http connection with the EOS node.
+
+    A handler may be shared by any number of threads and of ChainAPI and
+    WalletAPI objects, its connections are pooled by urllib3. Size the pool
+    to the number of threads sending requests, with pool_block=True a
+    thread waits for a free connection instead of opening one which is
+    closed right after its request.
+    """
+
+    def __init__(self, base_url,  verify=False, instrumentation=None, flow_control=None,
+                 retry=None, pool_connections=10, pool_maxsize=10, pool_block=False,
+                 keep_alive=True, socket_options=None, prewarm=0, **kwargs):
+        """
+        constructor of the RequestHandlerAPI
 
-    def __init__(self, base_url,  verify=False, **kwargs):
+        :param base_url: str: url of the node
+        :param verify: (bool) verify the certificate of the node
+        :param instrumentation: Instrumentation object measuring the
+        requests, None to send them unmeasured
+        :param flow_control: FlowControl object limiting the concurrency and
+        the rate of the requests, None to send them right away
+        :param retry: RetryEngine object retrying the failed requests, None
+        to raise their errors right away
+        :param pool_connections: (int) number of hosts whose connections
+        are pooled
+        :param pool_maxsize: (int) connections kept open per host
+        :param pool_block: (bool) wait for a free connection when all of
+        them are busy, instead of opening an extra one
+        :param keep_alive: (bool) reuse the connections, False closes them
+        after each request
+        :param socket_options: list of (level, option, value) tuples set on
+        the sockets, see tcp_socket_options, defaults to TCP_NODELAY
+        :param prewarm: (int) connections opened to the node right away, so
+        the first requests do not pay the TCP and TLS handshakes
+        :param kwargs: attributes of the requests session (headers ..etc.)
+        """
         self.base_url = base_url
         self.session = requests.Session()
         self.ssl_verify = verify
+        self.instrumentation = instrumentation
+        self.flow_control = flow_control
+        self.retry = retry
+        adapter_kwargs = dict(pool_connections=pool_connections, pool_maxsize=pool_maxsize,
+                              pool_block=pool_block, socket_options=socket_options)
+        for prefix in ('http://', 'https://'):
+            if instrumentation is not None:
+                self.session.mount(prefix, instrumentation.adapter(**adapter_kwargs))
+            else:
+                self.session.mount(prefix, PoolAdapter(**adapter_kwargs))
+        if not keep_alive:
+            self.session.headers['Connection'] = 'close'
 
         for arg in kwargs:
             if isinstance(kwargs[arg], dict):
                 kwargs[arg] = self.__set_session_attr(
                     getattr(self.session, arg), kwargs[arg])
             setattr(self.session, arg, kwargs[arg])
+        if prewarm:
+            self.prewarm(prewarm)
+
+    @classmethod
+    def shared(cls, base_url, **kwargs):
+        """
+        Get the handler of a node shared by the whole process, creating it
+        on the first call. The later calls pass either no other argument or
+        the arguments of the first call.
+
+        :param base_url: str: url of the node
+        :param kwargs: other RequestHandlerAPI arguments
+        :return: RequestHandlerAPI object
+        :raises ValueError: when the arguments differ from the ones the
+        handler was created with
+
+        :Example:
+
+        >>> chainapi = ChainAPI(RequestHandlerAPI.shared('http://nodeos-server:8888', pool_maxsize=32))
+        >>> walletapi = WalletAPI(RequestHandlerAPI.shared('http://nodeos-server:8888'))
+        """
+        with _shared_handlers_lock:
+            entry = _shared_handlers.get((cls, base_url))
+            if entry is None:
+                entry = _shared_handlers[(cls, base_url)] = (cls(base_url, **kwargs), kwargs)
+            elif kwargs and kwargs != entry[1]:
+                raise ValueError('the shared handler of %s was created with other arguments: %r'
+                                 % (base_url, entry[1]))
+            return entry[0]
+
+    def prewarm(self, connections):
+        """
+        Open connections to the node and leave them in the pool.
+
+        :param connections: (int) number of connections, at most pool_maxsize
+        :return: int: number of connections opened
+        """
+        adapter = self.session.get_adapter(self.base_url)
+        connections = min(connections, getattr(adapter, '_pool_maxsize', connections))
+        request = requests.Request('GET', self.base_url).prepare()
+        if hasattr(adapter, 'get_connection_with_tls_context'):
+            pool = adapter.get_connection_with_tls_context(request, self.ssl_verify)
+        else:
+            pool = adapter.get_connection(self.base_url)
+            adapter.cert_verify(pool, self.base_url, self.ssl_verify, None)
+        if not all(hasattr(pool, name) for name in _POOL_METHODS):
+            # the private methods of the urllib3 pool are gone, the
+            # connections are opened by concurrent requests instead.
+            return self._prewarm_with_requests(connections)
+        # the connections are taken out of the pool while they connect, so
+        # each one gets a slot of its own.
+        taken = [pool._get_conn() for _ in range(connections)]
+        conns = [conn if conn is not None else pool._new_conn() for conn in taken]
+
+        def connect(conn):
+            if getattr(conn, 'sock', None) is None:
+                conn.connect()
+                return 1
+            return 0
+
+        try:
+            with ThreadPoolExecutor(max_workers=max(1, connections)) as executor:
+                return sum(executor.map(connect, conns))
+        finally:
+            for conn in conns:
+                pool._put_conn(conn)
+
+    def _prewarm_with_requests(self, connections):
+        def send(_):
+            try:
+                # the body is read so the connection goes back to the pool.
+                self.session.get(self.base_url + '/v1/chain/get_info', verify=self.ssl_verify).content
+                return 1
+            except requests.exceptions.RequestException:
+                return 0
+
+        with ThreadPoolExecutor(max_workers=max(1, connections)) as executor:
+            return sum(executor.map(send, range(connections)))
 
     def get(self, path, **kwargs):
         """
         A GET Http method.
 
         :param path: str: path to  api endpoint
-        :param kwargs: json: arguments auth, headers, data ..etc.
+        :param kwargs: json: arguments auth, headers, data ..etc. a data
+        which is not a string is serialized as json. deadline (float)
+        bounds the seconds spent on the call, retries included.
 
         :return: response object
 
         """
-        try:
-            return self.session.get(self.base_url + path, verify=self.ssl_verify, **kwargs)
-        except requests.exceptions.RequestException as e:
-            raise e
+        return self._request('GET', path, kwargs)
 
     def post(self, path, **kwargs):
         """
         A POST Http method.
 
         :param path: str: path to  api endpoint
-        :param kwargs: json: arguments auth, headers, data ..etc.
+        :param kwargs: json: arguments auth, headers, data ..etc. a data
+        which is not a string is serialized as json. deadline (float)
+        bounds the seconds spent on the call, retries included.
 
         :return: response object
 
         """
+        return self._request('POST', path, kwargs)
+
+    def _request(self, method, path, kwargs):
+        if 'data' in kwargs:
+            kwargs['data'] = encode_body(kwargs['data'])
+        if self.retry is not None:
+            return self.retry.call(lambda attempt_kwargs: self._attempt(method, path, attempt_kwargs),
+                                   path, kwargs)
+        if 'deadline' in kwargs:
+            # without retries the deadline only bounds the single attempt.
+            deadline = kwargs.pop('deadline')
+            kwargs.setdefault('timeout', deadline)
+        return self._attempt(method, path, kwargs)
+
+    def _attempt(self, method, path, kwargs):
+        if self.flow_control is not None:
+            return self.flow_control.request(lambda: self._send(method, path, kwargs), path)
+        return self._send(method, path, kwargs)
+
+    def _send(self, method, path, kwargs):
+        if self.instrumentation is not None:
+            return self.instrumentation.request(self.session, method, self.base_url, path,
+                                                verify=self.ssl_verify, **kwargs)
         try:
-            return self.session.post(self.base_url + path, verify=self.ssl_verify, **kwargs)
+            return self.session.request(method, self.base_url + path, verify=self.ssl_verify, **kwargs)
         except requests.exceptions.RequestException as e:
             raise e
 
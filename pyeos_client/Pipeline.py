@@ -0,0 +1,108 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+.. module:: Pipeline
+   :synopsis: An ordered map over a pool of threads or over asyncio tasks,
+              with a bounded reorder buffer following the concurrency limit
+              of the connection.
+.. author:: Merouane Benthameur <merouane.benth@gmail.com>
+"""
+
+import asyncio
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+_END = object()
+
+
+def map_ordered(func, items, concurrency, max_buffered=None, limiter=None):
+    """
+    Apply `func` to every item on a pool of threads, yielding the results
+    in the order of `items`. At most `max_buffered` items are submitted
+    ahead of the result being yielded.
+
+    :param func: callable taking one item
+    :param items: iterable of items
+    :param concurrency: (int) number of worker threads
+    :param max_buffered: (int) size of the reorder buffer, defaults to
+    twice the concurrency
+    :param limiter: AdaptiveLimiter object of the connection, when given
+    at most twice its current limit of items are submitted ahead, so the
+    items are pulled no faster than the node answers
+    :return: generator of results
+    """
+    max_buffered = max(max_buffered or 2 * concurrency, concurrency)
+
+    def window():
+        if limiter is None:
+            return max_buffered
+        return max(1, min(max_buffered, 2 * limiter.limit))
+
+    items = iter(items)
+    pending = deque()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+
+        def fill():
+            while len(pending) < window():
+                item = next(items, _END)
+                if item is _END:
+                    return
+                pending.append(executor.submit(func, item))
+
+        try:
+            fill()
+            while pending:
+                result = pending.popleft().result()
+                fill()
+                yield result
+        finally:
+            for future in pending:
+                future.cancel()
+
+
+async def async_map_ordered(func, items, concurrency, max_buffered=None, limiter=None):
+    """
+    Await `func` on every item with up to `concurrency` calls in flight,
+    yielding the results in the order of `items`, the asyncio counterpart
+    of map_ordered.
+
+    :param func: coroutine function taking one item
+    :param items: iterable of items
+    :param concurrency: (int) number of calls in flight
+    :param max_buffered: (int) size of the reorder buffer, defaults to
+    twice the concurrency
+    :param limiter: AdaptiveLimiter object, as taken by map_ordered
+    :return: async generator of results
+    """
+    max_buffered = max(max_buffered or 2 * concurrency, concurrency)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    def window():
+        if limiter is None:
+            return max_buffered
+        return max(1, min(max_buffered, 2 * limiter.limit))
+
+    async def bounded(item):
+        async with semaphore:
+            return await func(item)
+
+    items = iter(items)
+    pending = deque()
+
+    def fill():
+        while len(pending) < window():
+            item = next(items, _END)
+            if item is _END:
+                return
+            pending.append(asyncio.ensure_future(bounded(item)))
+
+    try:
+        fill()
+        while pending:
+            result = await pending.popleft()
+            fill()
+            yield result
+    finally:
+        for task in pending:
+            task.cancel()
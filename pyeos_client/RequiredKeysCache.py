@@ -0,0 +1,145 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+.. module:: RequiredKeysCache
+   :synopsis: A cache of get_required_keys answers keyed by the authorizations
+              of a transaction and the available keys.
+.. author:: Merouane Benthameur <merouane.benth@gmail.com>
+"""
+
+import hashlib
+import json
+import threading
+import time
+
+
+def permissions_fingerprint(account):
+    """
+    Hash the permissions of an account, as returned by get_account.
+
+    :param account: json: get_account result
+    :return: str
+    """
+    permissions = sorted(account.get('permissions', []), key=lambda p: p['perm_name'])
+    return hashlib.sha256(json.dumps(permissions, sort_keys=True).encode()).hexdigest()
+
+
+def authorization_set(transaction):
+    """
+    Collect the (actor, permission) pairs authorizing a transaction.
+
+    :param transaction: dict: json transaction
+    :return: frozenset of (actor, permission) tuples
+    """
+    return frozenset((auth['actor'], auth['permission'])
+                     for key in ('context_free_actions', 'actions')
+                     for action in transaction.get(key, [])
+                     for auth in action.get('authorization', []))
+
+
+class RequiredKeysCache:
+    """ a cache in front of ChainAPI.get_required_keys"""
+
+    def __init__(self, chain_api, ttl=300, check_interval=30, max_entries=4096,
+                 clock=time.monotonic):
+        """
+        constructor of the RequiredKeysCache
+
+        :param chain_api: ChainAPI object
+        :param ttl: (float) seconds an answer is kept
+        :param check_interval: (float) seconds between two get_account checks
+        of the permissions of an actor, None to rely on the ttl only
+        :param max_entries: (int) number of answers kept
+        :param clock: callable returning the current time in seconds
+        """
+        self.chain_api = chain_api
+        self.ttl = ttl
+        self.check_interval = check_interval
+        self.max_entries = max_entries
+        self.clock = clock
+        self.entries = {}
+        self.fingerprints = {}
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_required_keys(self, transaction, available_keys):
+        """
+        Get the keys required to sign a transaction, from the cache when the
+        same authorizations were resolved with the same available keys.
+
+        :param transaction: dict, json string or Transaction object
+        :param available_keys: list of public keys
+        :return: list of required public keys
+        """
+        if isinstance(transaction, str):
+            transaction = json.loads(transaction)
+        elif hasattr(transaction, 'as_dict'):
+            transaction = transaction.as_dict()
+        authorizations = authorization_set(transaction)
+        key = (authorizations, frozenset(available_keys))
+        now = self.clock()
+        if self.check_interval is not None:
+            for actor in set(actor for actor, _ in authorizations):
+                self._check_account(actor, now)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry[0] > now:
+                self.hits += 1
+                return list(entry[1])
+            self.misses += 1
+        response = self.chain_api.get_required_keys(transaction=transaction,
+                                                    available_keys=available_keys)
+        response.raise_for_status()
+        required_keys = response.json()['required_keys']
+        with self.lock:
+            if len(self.entries) >= self.max_entries:
+                self._prune(now)
+            self.entries[key] = (now + self.ttl, tuple(required_keys))
+        return required_keys
+
+    def _check_account(self, actor, now):
+        with self.lock:
+            checked = self.fingerprints.get(actor)
+            if checked is not None and now - checked[0] < self.check_interval:
+                return
+        response = self.chain_api.get_account(actor)
+        response.raise_for_status()
+        self.observe_account(response.json())
+
+    def observe_account(self, account):
+        """
+        Record the permissions of an account, dropping the cached answers
+        involving it when they changed. Callers already fetching get_account
+        may feed it here to save the periodic checks.
+
+        :param account: json: get_account result
+        """
+        actor = account['account_name']
+        fingerprint = permissions_fingerprint(account)
+        with self.lock:
+            previous = self.fingerprints.get(actor)
+            self.fingerprints[actor] = (self.clock(), fingerprint)
+            if previous is not None and previous[1] != fingerprint:
+                self._invalidate_actor(actor)
+
+    def invalidate(self, actor=None):
+        """
+        Drop the answers involving an actor, or every answer.
+        """
+        with self.lock:
+            if actor is None:
+                self.entries.clear()
+            else:
+                self._invalidate_actor(actor)
+
+    def _invalidate_actor(self, actor):
+        for key in [key for key in self.entries if any(a == actor for a, _ in key[0])]:
+            del self.entries[key]
+
+    def _prune(self, now):
+        for key in [key for key, entry in self.entries.items() if entry[0] <= now]:
+            del self.entries[key]
+        while len(self.entries) >= self.max_entries:
+            del self.entries[next(iter(self.entries))]
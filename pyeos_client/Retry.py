@@ -0,0 +1,360 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+.. module:: Retry
+   :synopsis: Retries of failed requests with exponential backoff and
+              jitter, bounded by per call deadlines and by a retry budget
+              shared across threads. Pushes are only retried when the
+              node's duplicate detection makes it safe.
+.. author:: Merouane Benthameur <merouane.benth@gmail.com>
+"""
+
+import random
+import threading
+import time
+
+import requests
+from urllib3.exceptions import NewConnectionError
+
+from pyeos_client.FastJson import dumps, loads
+from pyeos_client.NodeosConnect import IDEMPOTENT_PATHS, BufferedResponse
+from pyeos_client.Transaction import push_result_error, transaction_id
+
+# statuses meaning the node did not process the request.
+RETRIABLE_STATUSES = frozenset([429, 502, 503, 504])
+
+# statuses of a node refusing a request before processing it, 502 and 504
+# come from proxies which may have forwarded it.
+UNPROCESSED_STATUSES = frozenset([429, 503])
+
+PUSH_PATHS = frozenset([
+    '/v1/chain/push_transaction',
+    '/v1/chain/push_transactions',
+    '/v1/chain/send_transaction',
+])
+
+
+def not_sent(error):
+    """
+    Tell whether a failed request surely never reached the node.
+    """
+    if isinstance(error, requests.exceptions.ConnectTimeout):
+        return True
+    if isinstance(error, requests.exceptions.ConnectionError):
+        reason = getattr(error.args[0], 'reason', None) if error.args else None
+        return isinstance(reason, NewConnectionError)
+    return False
+
+
+def _error_name(body):
+    error = body.get('error') if isinstance(body, dict) else None
+    return error.get('name') if isinstance(error, dict) else None
+
+
+def _push_result_error_name(result):
+    """
+    Get the name of the error of one result of push_transactions, whose
+    error is a string such as "3040008 tx_duplicate: Duplicate transaction".
+    """
+    error = push_result_error(result)
+    if isinstance(error, str):
+        words = error.split(':', 1)[0].split()
+        return words[-1] if words else None
+    return _error_name(result)
+
+
+def push_transaction_ids(data):
+    """
+    Compute the ids of the transactions of a push request body.
+
+    :param data: (bytes or str) json body of push_transaction or push_transactions
+    :return: list of str, None when an id can not be computed locally
+    """
+    try:
+        body = loads(data)
+    except (TypeError, ValueError):
+        return None
+    ids = []
+    for transaction in body if isinstance(body, list) else [body]:
+        if not isinstance(transaction, dict) or 'packed_trx' not in transaction or \
+                transaction.get('compression', 'none') not in ('none', 0):
+            return None
+        ids.append(transaction_id(transaction['packed_trx']))
+    return ids
+
+
+class RetryPolicy:
+    """ how the calls to an endpoint are retried
+
+    Idempotent calls are retried after any connection error, timeout or
+    retriable status. Other calls are only retried when the node surely did
+    not process them, or, for pushes of transactions whose id is known,
+    when the node would reject a second copy as a duplicate.
+    """
+
+    def __init__(self, max_attempts=4, base_delay=0.1, max_delay=5.0, multiplier=2.0,
+                 jitter=True, idempotent=True, statuses=RETRIABLE_STATUSES):
+        """
+        constructor of the RetryPolicy
+
+        :param max_attempts: (int) attempts of a call, the first one included
+        :param base_delay: (float) delay before the first retry, in seconds
+        :param max_delay: (float) highest delay between two attempts
+        :param multiplier: (float) growth of the delay after each attempt
+        :param jitter: (bool) draw the delay uniformly between 0 and its
+        value, so clients failing together do not retry together
+        :param idempotent: (bool) the call may be sent again after it was
+        possibly processed
+        :param statuses: http statuses which are retried
+        """
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.multiplier = multiplier
+        self.jitter = jitter
+        self.idempotent = idempotent
+        self.statuses = frozenset(statuses)
+
+    def delay(self, attempt):
+        """
+        Get the delay before an attempt.
+
+        :param attempt: (int) number of the failed attempt, from 1
+        :return: float: seconds
+        """
+        delay = min(self.max_delay, self.base_delay * self.multiplier ** (attempt - 1))
+        return random.uniform(0, delay) if self.jitter else delay
+
+
+READ_POLICY = RetryPolicy()
+
+WRITE_POLICY = RetryPolicy(idempotent=False)
+
+
+class RetryBudget:
+    """ a thread-safe budget of retries
+
+    Each call adds `ratio` token and each retry takes one, on top of
+    `min_per_second` tokens added per second, so retries stay a fraction
+    of the traffic when a node is down instead of multiplying it.
+    """
+
+    def __init__(self, ratio=0.2, min_per_second=5.0, capacity=100.0, clock=time.monotonic):
+        """
+        constructor of the RetryBudget
+
+        :param ratio: (float) retries allowed per call
+        :param min_per_second: (float) retries allowed per second whatever
+        the number of calls
+        :param capacity: (float) most tokens kept
+        :param clock: callable returning the current time in seconds
+        """
+        self.ratio = ratio
+        self.min_per_second = min_per_second
+        self.capacity = capacity
+        self.clock = clock
+        self.tokens = capacity
+        self.updated_at = clock()
+        self.lock = threading.Lock()
+
+    def _refill(self, tokens):
+        now = self.clock()
+        self.tokens = min(self.capacity, self.tokens + tokens + (now - self.updated_at) * self.min_per_second)
+        self.updated_at = now
+
+    def record_call(self):
+        """
+        Add the tokens of a call.
+        """
+        with self.lock:
+            self._refill(self.ratio)
+
+    def withdraw(self):
+        """
+        Take the token of a retry.
+
+        :return: bool: False when the budget is exhausted
+        """
+        with self.lock:
+            self._refill(0.0)
+            if self.tokens < 1:
+                return False
+            self.tokens -= 1
+            return True
+
+
+class RetryEngine:
+    """ the retries of the requests of a RequestHandlerAPI
+
+    Give it to RequestHandlerAPI with the `retry` argument. Calls to the
+    idempotent chain endpoints use READ_POLICY, the others WRITE_POLICY,
+    unless `policies` has an entry for their path. A push retried after
+    it may have reached the node, and then rejected as a duplicate, is
+    answered as a success: {"transaction_id": ..., "duplicate": true}.
+
+    A call gives up once `deadline` seconds passed since it started, the
+    timeout of each attempt being cut to the time left. One engine, or one
+    budget, may be shared by several handlers.
+
+    :Example:
+
+    >>> retry = RetryEngine(deadline=10, policies={
+    ...     '/v1/chain/get_block': RetryPolicy(max_attempts=8)})
+    >>> connection = RequestHandlerAPI(base_url='http://nodeos-server:8888', retry=retry)
+    >>> connection.post('/v1/chain/get_info', deadline=2)
+    """
+
+    def __init__(self, policies=None, read_policy=READ_POLICY, write_policy=WRITE_POLICY,
+                 budget=None, deadline=None, clock=time.monotonic, sleep=time.sleep):
+        """
+        constructor of the RetryEngine
+
+        :param policies: dict of path to RetryPolicy
+        :param read_policy: RetryPolicy of the idempotent chain endpoints
+        :param write_policy: RetryPolicy of the other endpoints
+        :param budget: RetryBudget object, a new one when None
+        :param deadline: (float) seconds a call may last, retries included,
+        None for no limit. A `deadline` argument of a call overrides it.
+        :param clock: callable returning the current time in seconds
+        :param sleep: callable waiting a number of seconds
+        """
+        self.policies = dict(policies or {})
+        self.read_policy = read_policy
+        self.write_policy = write_policy
+        self.budget = budget if budget is not None else RetryBudget(clock=clock)
+        self.deadline = deadline
+        self.clock = clock
+        self.sleep = sleep
+        self.stats = {'calls': 0, 'retries': 0, 'budget_exhausted': 0,
+                      'deadline_exceeded': 0, 'duplicates': 0}
+        self.lock = threading.Lock()
+
+    def policy(self, path):
+        """
+        Get the policy of a path.
+
+        :param path: str: path to  api endpoint
+        :return: RetryPolicy object
+        """
+        policy = self.policies.get(path)
+        if policy is None:
+            policy = self.read_policy if path in IDEMPOTENT_PATHS else self.write_policy
+        return policy
+
+    def _count(self, key):
+        with self.lock:
+            self.stats[key] += 1
+
+    def call(self, send, path, kwargs):
+        """
+        Send a request, retrying it as its policy allows.
+
+        :param send: callable taking the request arguments and returning a response
+        :param path: str: path to  api endpoint
+        :param kwargs: request arguments, data already serialized
+        :return: response object
+        """
+        policy = self.policy(path)
+        deadline = kwargs.pop('deadline', self.deadline)
+        expires_at = None if deadline is None else self.clock() + deadline
+        timeout = kwargs.get('timeout')
+        trx_ids = push_transaction_ids(kwargs.get('data')) if path in PUSH_PATHS else None
+        delivered = False
+        self._count('calls')
+        self.budget.record_call()
+        attempt = 0
+        while True:
+            attempt += 1
+            if expires_at is not None:
+                kwargs['timeout'] = _cut_timeout(timeout, max(expires_at - self.clock(), 0.001))
+            response, error = None, None
+            try:
+                response = send(kwargs)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                error = e
+            if response is not None:
+                if delivered and trx_ids is not None:
+                    response = self._duplicate_as_success(response, path, trx_ids)
+                if response.status_code not in policy.statuses:
+                    return response
+                retriable = policy.idempotent or trx_ids is not None or \
+                    response.status_code in UNPROCESSED_STATUSES
+                delivered = delivered or response.status_code not in UNPROCESSED_STATUSES
+            else:
+                retriable = policy.idempotent or trx_ids is not None or not_sent(error)
+                delivered = delivered or not not_sent(error)
+            delay = policy.delay(attempt)
+            if response is not None:
+                delay = max(delay, _retry_after(response, policy.max_delay))
+            if not retriable or attempt >= policy.max_attempts:
+                return self._give_up(response, error)
+            if expires_at is not None and self.clock() + delay >= expires_at:
+                self._count('deadline_exceeded')
+                return self._give_up(response, error)
+            if not self.budget.withdraw():
+                self._count('budget_exhausted')
+                return self._give_up(response, error)
+            self._count('retries')
+            if response is not None:
+                response.close()
+            self.sleep(delay)
+
+    @staticmethod
+    def _give_up(response, error):
+        if error is not None:
+            raise error
+        return response
+
+    def _duplicate_as_success(self, response, path, trx_ids):
+        """
+        Answer the duplicates of a push retried after it may have reached
+        the node as successes.
+        """
+        try:
+            body = loads(response.content)
+        except ValueError:
+            return response
+        if path == '/v1/chain/push_transactions':
+            if not isinstance(body, list) or len(body) != len(trx_ids):
+                return response
+            results = [{'transaction_id': trx_id, 'duplicate': True}
+                       if _push_result_error_name(result) == 'tx_duplicate' else result
+                       for trx_id, result in zip(trx_ids, body)]
+            if results == body:
+                return response
+            self._count('duplicates')
+            return BufferedResponse(status_code=200, content=dumps(results), headers=response.headers,
+                                    url=getattr(response, 'url', None), reason='OK')
+        if _error_name(body) != 'tx_duplicate':
+            return response
+        self._count('duplicates')
+        return BufferedResponse(status_code=200,
+                                content=dumps({'transaction_id': trx_ids[0], 'duplicate': True}),
+                                headers=response.headers, url=getattr(response, 'url', None),
+                                reason='OK')
+
+    def get_stats(self):
+        """
+        Get the counters of the engine.
+
+        :return: dict: calls, retries, retries refused by the budget or by
+        a deadline, duplicates answered as successes
+        """
+        with self.lock:
+            return dict(self.stats)
+
+
+def _cut_timeout(timeout, left):
+    if timeout is None:
+        return left
+    if isinstance(timeout, tuple):
+        return tuple(left if value is None else min(value, left) for value in timeout)
+    return min(timeout, left)
+
+
+def _retry_after(response, max_delay):
+    try:
+        return min(max(float(response.headers.get('Retry-After')), 0.0), max_delay)
+    except (TypeError, ValueError):
+        return 0.0
@@ -0,0 +1,138 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+.. module:: SingleFlight
+   :synopsis: A request handler layer sharing one http call between identical
+              concurrent read requests, with an optional short-lived cache.
+.. author:: Merouane Benthameur <merouane.benth@gmail.com>
+"""
+
+import threading
+import time
+
+from pyeos_client.NodeosConnect import IDEMPOTENT_PATHS, encode_body
+
+
+class _Call:
+    """ an in-flight request awaited by several callers"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.response = None
+        self.error = None
+
+
+class CoalescingRequestHandlerAPI:
+    """ a wrapper of a request handler coalescing identical concurrent reads"""
+
+    def __init__(self, handler, ttl=None, paths=IDEMPOTENT_PATHS,
+                 max_cached=1024, clock=time.monotonic):
+        """
+        constructor of the CoalescingRequestHandlerAPI
+
+        :param handler: RequestHandlerAPI (or compatible) object doing the calls
+        :param ttl: dict: seconds a successful response is served from memory,
+        by path, eg. {'/v1/chain/get_info': 0.25}
+        :param paths: set: paths whose requests may be shared, defaults to the
+        read calls of the chain api
+        :param max_cached: (int) number of responses kept by the micro-cache
+        :param clock: callable returning the current time in seconds
+        """
+        self.handler = handler
+        self.ttl = ttl or {}
+        self.paths = paths
+        self.max_cached = max_cached
+        self.clock = clock
+        self.lock = threading.Lock()
+        self.in_flight = {}
+        self.cache = {}
+        self.requests = 0
+        self.coalesced = 0
+        self.cache_hits = 0
+
+    def __getattr__(self, name):
+        # expose base_url, session ..etc. of the wrapped handler.
+        return getattr(self.handler, name)
+
+    def get(self, path, **kwargs):
+        """
+        A GET Http method.
+
+        :param path: str: path to  api endpoint
+        :param kwargs: json: arguments auth, headers, data ..etc.
+
+        :return: response object
+
+        """
+        return self._request('get', path, kwargs)
+
+    def post(self, path, **kwargs):
+        """
+        A POST Http method.
+
+        :param path: str: path to  api endpoint
+        :param kwargs: json: arguments auth, headers, data ..etc.
+
+        :return: response object
+
+        """
+        return self._request('post', path, kwargs)
+
+    def _request(self, method, path, kwargs):
+        if 'data' in kwargs:
+            # native bodies are keyed, and sent, in their serialized form.
+            kwargs['data'] = encode_body(kwargs['data'])
+        if path not in self.paths or set(kwargs) - set(['data']):
+            return getattr(self.handler, method)(path, **kwargs)
+        key = (method, path, kwargs.get('data'))
+        now = self.clock()
+        with self.lock:
+            self.requests += 1
+            cached = self.cache.get(key)
+            if cached is not None and cached[0] > now:
+                self.cache_hits += 1
+                return cached[1]
+            call = self.in_flight.get(key)
+            leader = call is None
+            if leader:
+                call = self.in_flight[key] = _Call()
+            else:
+                self.coalesced += 1
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.response
+        try:
+            call.response = getattr(self.handler, method)(path, **kwargs)
+            return call.response
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self.lock:
+                del self.in_flight[key]
+                if path in self.ttl and call.error is None and call.response.ok:
+                    self._cache(key, call.response, self.ttl[path])
+            call.done.set()
+
+    def _cache(self, key, response, ttl):
+        now = self.clock()
+        if len(self.cache) >= self.max_cached:
+            for expired in [k for k, (expires, _) in self.cache.items() if expires <= now]:
+                del self.cache[expired]
+            if len(self.cache) >= self.max_cached:
+                self.cache.pop(next(iter(self.cache)))
+        self.cache[key] = (now + ttl, response)
+
+    def get_stats(self):
+        """
+        Get the coalescing counters.
+
+        :return: dict: number of requests, of requests served by an in-flight
+        call and of requests served by the micro-cache
+        """
+        with self.lock:
+            return {'requests': self.requests, 'coalesced': self.coalesced,
+                    'cache_hits': self.cache_hits}
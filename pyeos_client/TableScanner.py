@@ -0,0 +1,331 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+.. module:: TableScanner
+   :synopsis: Stream every row of a contract table, following the pages
+              returned by get_table_rows, optionally over concurrent key ranges.
+.. author:: Merouane Benthameur <merouane.benth@gmail.com>
+"""
+
+import threading
+
+from pyeos_client.Codec import key_value, name_to_string
+from pyeos_client.FastJson import decode_response
+from pyeos_client.Pipeline import async_map_ordered, map_ordered
+
+UINT64_MAX = 2 ** 64 - 1
+
+
+class TableScanner:
+    """ an iterator over the rows of a contract table
+
+    It is iterated with `for` over a ChainAPI, and with `async for` over an
+    AsyncChainAPI.
+    """
+
+    def __init__(self, chain_api, code, scope, table, lower_bound=None,
+                 upper_bound=None, limit=1000, partitions=1, concurrency=None,
+                 max_buffered=None, **kwargs):
+        """
+        constructor of the TableScanner
+
+        :param chain_api: ChainAPI or AsyncChainAPI object
+        :param code: (str) account of the contract
+        :param scope: (str) scope of the table
+        :param table: (str) name of the table
+        :param lower_bound: lowest key to return, as accepted by get_table_rows
+        :param upper_bound: highest key to return, inclusive
+        :param limit: (int) number of rows requested per page
+        :param partitions: (int) number of key ranges scanned concurrently,
+        the bounds must then be numbers, decimal strings or names
+        :param concurrency: (int) number of worker threads, or of requests
+        in flight with an AsyncChainAPI, defaults to partitions
+        :param max_buffered: (int) key ranges read ahead of the one being
+        consumed, defaults to the concurrency. A key range is held whole
+        until it is consumed, scan large tables with more partitions than
+        threads to bound the memory.
+        :param kwargs: other get_table_rows arguments (index_position,
+        key_type, encode_type ..etc.)
+        """
+        self.chain_api = chain_api
+        self.query = dict(code=code, scope=scope, table=table, json=True, limit=limit)
+        self.query.update(kwargs)
+        self.lower_bound = lower_bound
+        self.upper_bound = upper_bound
+        self.partitions = partitions
+        self.concurrency = concurrency or partitions
+        self.max_buffered = max_buffered or self.concurrency
+
+    def __iter__(self):
+        if self.partitions <= 1:
+            return self.iter_range(self.lower_bound, self.upper_bound)
+        return read_ordered(lambda bounds: self.iter_pages(*bounds), self._ranges(), self.concurrency,
+                            self.max_buffered, limiter=self.chain_api._limiter())
+
+    async def __aiter__(self):
+        if self.partitions <= 1:
+            async for page in self.async_iter_pages(self.lower_bound, self.upper_bound):
+                for row in page:
+                    yield row
+            return
+        async for row in async_read_ordered(lambda bounds: self.async_iter_pages(*bounds), self._ranges(),
+                                            self.concurrency, self.max_buffered):
+            yield row
+
+    def _ranges(self):
+        ranges = split_key_range(self.lower_bound, self.upper_bound, self.partitions)
+        if self.query.get('key_type') == 'name' or any(
+                isinstance(bound, str) and not bound.isdigit()
+                for bound in (self.lower_bound, self.upper_bound)):
+            # name keys are sent back as names, the node parses them as such.
+            ranges = [(name_to_string(lower), name_to_string(upper)) for lower, upper in ranges]
+        return ranges
+
+    def iter_range(self, lower_bound=None, upper_bound=None):
+        """
+        Stream the rows between two keys, one page at a time.
+
+        :param lower_bound: lowest key to return
+        :param upper_bound: highest key to return, inclusive
+        :return: generator of rows
+        """
+        for page in self.iter_pages(lower_bound, upper_bound):
+            for row in page:
+                yield row
+
+    def iter_pages(self, lower_bound=None, upper_bound=None):
+        """
+        Stream the pages between two keys, following more/next_key.
+
+        :param lower_bound: lowest key to return
+        :param upper_bound: highest key to return, inclusive
+        :return: generator of lists of rows
+        """
+        query = dict(self.query)
+        if upper_bound is not None:
+            query['upper_bound'] = str(upper_bound)
+        while True:
+            if lower_bound is not None:
+                query['lower_bound'] = str(lower_bound)
+            rows, lower_bound = _page(self.chain_api.get_table_rows(query))
+            yield rows
+            if lower_bound is None:
+                return
+
+    async def async_iter_pages(self, lower_bound=None, upper_bound=None):
+        """
+        Stream the pages between two keys with an AsyncChainAPI.
+
+        :param lower_bound: lowest key to return
+        :param upper_bound: highest key to return, inclusive
+        :return: async generator of lists of rows
+        """
+        query = dict(self.query)
+        if upper_bound is not None:
+            query['upper_bound'] = str(upper_bound)
+        while True:
+            if lower_bound is not None:
+                query['lower_bound'] = str(lower_bound)
+            rows, lower_bound = _page(await self.chain_api.get_table_rows(query))
+            yield rows
+            if lower_bound is None:
+                return
+
+
+def iter_table_scopes(chain_api, code, table=None, limit=1000):
+    """
+    Stream the scopes of a contract, following the pages returned by
+    get_table_by_scope.
+
+    :param chain_api: ChainAPI object
+    :param code: (str) account of the contract
+    :param table: (str) only list the scopes of this table
+    :param limit: (int) number of scopes requested per page
+    :return: generator of scope entries (code, scope, table, payer, count)
+    """
+    query = dict(code=code, limit=limit)
+    if table is not None:
+        query['table'] = table
+    while True:
+        entries, query['lower_bound'] = _page(chain_api.get_table_by_scope(query))
+        for entry in entries:
+            yield entry
+        if query['lower_bound'] is None:
+            return
+
+
+async def async_iter_table_scopes(chain_api, code, table=None, limit=1000):
+    """
+    Stream the scopes of a contract with an AsyncChainAPI.
+
+    :param chain_api: AsyncChainAPI object
+    :param code: (str) account of the contract
+    :param table: (str) only list the scopes of this table
+    :param limit: (int) number of scopes requested per page
+    :return: async generator of scope entries
+    """
+    query = dict(code=code, limit=limit)
+    if table is not None:
+        query['table'] = table
+    while True:
+        entries, query['lower_bound'] = _page(await chain_api.get_table_by_scope(query))
+        for entry in entries:
+            yield entry
+        if query['lower_bound'] is None:
+            return
+
+
+def scan_scopes(chain_api, code, table, concurrency=8, limit=1000, **kwargs):
+    """
+    Stream the rows of a table across all its scopes, scanning up to
+    `concurrency` scopes at once. Scopes are yielded in the order of
+    get_table_by_scope.
+
+    :param chain_api: ChainAPI object
+    :param code: (str) account of the contract
+    :param table: (str) name of the table
+    :param concurrency: (int) number of scopes scanned concurrently
+    :param limit: (int) number of rows requested per page
+    :param kwargs: other get_table_rows arguments
+    :return: generator of (scope, row) tuples
+    """
+    def scan(scope):
+        for page in TableScanner(chain_api, code, scope, table, limit=limit, **kwargs).iter_pages():
+            yield [(scope, row) for row in page]
+
+    scopes = (entry['scope'] for entry in iter_table_scopes(chain_api, code, table))
+    return read_ordered(scan, scopes, concurrency, limiter=chain_api._limiter())
+
+
+async def async_scan_scopes(chain_api, code, table, concurrency=8, limit=1000, **kwargs):
+    """
+    Stream the rows of a table across all its scopes with an AsyncChainAPI,
+    like scan_scopes. The scopes are listed before the first one is read.
+
+    :param chain_api: AsyncChainAPI object
+    :param code: (str) account of the contract
+    :param table: (str) name of the table
+    :param concurrency: (int) number of scopes scanned concurrently
+    :param limit: (int) number of rows requested per page
+    :param kwargs: other get_table_rows arguments
+    :return: async generator of (scope, row) tuples
+    """
+    async def scan(scope):
+        async for page in TableScanner(chain_api, code, scope, table, limit=limit,
+                                       **kwargs).async_iter_pages():
+            yield [(scope, row) for row in page]
+
+    scopes = [entry['scope'] async for entry in async_iter_table_scopes(chain_api, code, table)]
+    async for item in async_read_ordered(scan, scopes, concurrency):
+        yield item
+
+
+def _page(response):
+    """
+    Decode a page of get_table_rows or get_table_by_scope.
+
+    :return: tuple: (list of rows, lower bound of the next page or None)
+    """
+    response.raise_for_status()
+    result = decode_response(response)
+    return result['rows'], next_page_bound(result)
+
+
+def next_page_bound(result):
+    """
+    Get the lower bound of the next page from a paginated response.
+
+    :param result: json: decoded get_table_rows or get_table_by_scope response
+    :return: the next lower bound, None if it was the last page
+    """
+    more = result.get('more')
+    if not more:
+        return None
+    if result.get('next_key'):
+        return result['next_key']
+    if isinstance(more, str):
+        return more
+    raise ValueError('the node reported more rows without a next_key, '
+                     'upgrade it or page with lower_bound manually')
+
+
+def split_key_range(lower_bound, upper_bound, partitions):
+    """
+    Split a uint64 key range in contiguous, inclusive sub-ranges.
+
+    :param lower_bound: (int or str) lowest key, a number, a decimal string
+    or a name, defaults to 0
+    :param upper_bound: (int or str) highest key, defaults to 2^64-1
+    :param partitions: (int) number of sub-ranges
+    :return: list of (lower, upper) tuples of int
+    """
+    lower = 0 if lower_bound is None else key_value(lower_bound)
+    upper = UINT64_MAX if upper_bound is None else key_value(upper_bound)
+    partitions = max(1, min(partitions, upper - lower + 1))
+    step = (upper - lower + 1) // partitions
+    bounds = [lower + i * step for i in range(partitions)] + [upper + 1]
+    return [(bounds[i], bounds[i + 1] - 1) for i in range(partitions)]
+
+
+def read_ordered(read, items, concurrency, max_buffered=None, limiter=None):
+    """
+    Read the pages of every item on a pool of threads through map_ordered,
+    yielding the rows of one item after the other, in the order of
+    `items`. The rows of an item are held until it is consumed. Once the
+    generator is closed, the reads in flight stop at their next page.
+
+    :param read: callable taking an item, returning a generator of pages
+    :param items: iterable of items, eg. key ranges or scopes
+    :param concurrency: (int) number of worker threads
+    :param max_buffered: (int) items read ahead of the one being consumed,
+    defaults to twice the concurrency
+    :param limiter: AdaptiveLimiter object of the connection
+    :return: generator of rows
+    """
+    stop = threading.Event()
+
+    def read_all(item):
+        rows = []
+        for page in read(item):
+            rows.extend(page)
+            if stop.is_set():
+                break
+        return rows
+
+    results = map_ordered(read_all, items, concurrency, max_buffered, limiter=limiter)
+    try:
+        for rows in results:
+            for row in rows:
+                yield row
+    finally:
+        stop.set()
+        results.close()
+
+
+async def async_read_ordered(read, items, concurrency, max_buffered=None):
+    """
+    Read the pages of every item with up to `concurrency` items in flight,
+    the asyncio counterpart of read_ordered. Closing the generator cancels
+    the reads in flight.
+
+    :param read: callable taking an item, returning an async generator of pages
+    :param items: iterable of items, eg. key ranges or scopes
+    :param concurrency: (int) number of items read concurrently
+    :param max_buffered: (int) items read ahead of the one being consumed,
+    defaults to twice the concurrency
+    :return: async generator of rows
+    """
+    async def read_all(item):
+        rows = []
+        async for page in read(item):
+            rows.extend(page)
+        return rows
+
+    results = async_map_ordered(read_all, items, concurrency, max_buffered)
+    try:
+        async for rows in results:
+            for row in rows:
+                yield row
+    finally:
+        await results.aclose()
@@ -0,0 +1,219 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+.. module:: Transaction
+   :synopsis: Build transactions locally: pack them in the wire format,
+              compute their id and emit the packed_trx push format.
+.. author:: Merouane Benthameur <merouane.benth@gmail.com>
+"""
+
+import hashlib
+
+from pyeos_client.AbiSerializer import TRANSACTION_ABI, AbiSerializer, Writer
+
+_TRANSACTION_SERIALIZER = AbiSerializer(TRANSACTION_ABI)
+
+# id given by push_transactions to the transactions it failed to push.
+NULL_TRANSACTION_ID = '0' * 64
+
+
+def transaction_id(packed_trx):
+    """
+    Compute the id of a packed transaction.
+
+    :param packed_trx: (bytes or str) packed transaction, raw or hex encoded
+    :return: str: hex transaction id
+    """
+    if isinstance(packed_trx, str):
+        packed_trx = bytes.fromhex(packed_trx)
+    return hashlib.sha256(packed_trx).hexdigest()
+
+
+def push_result_error(result):
+    """
+    Get the error of one result of push_transactions. nodeos reports a
+    failed transaction as {"transaction_id": "000...0", "processed":
+    {"error": "3040008 tx_duplicate: Duplicate transaction ..."}}.
+
+    :param result: (dict) item of the answer of push_transactions
+    :return: the error, usually a str, None when the transaction was pushed
+    """
+    if not isinstance(result, dict):
+        return 'unexpected result %r' % (result,)
+    processed = result.get('processed')
+    if isinstance(processed, dict) and processed.get('error') is not None:
+        return processed['error']
+    if result.get('transaction_id') == NULL_TRANSACTION_ID:
+        return processed if processed is not None else result
+    return None
+
+
+class PackedAction:
+    """ an action packed once, to be reused by many transactions"""
+
+    __slots__ = ('account', 'name', 'authorization', 'data', 'packed')
+
+    def __init__(self, account, name, authorization, data):
+        """
+        constructor of the PackedAction
+
+        :param account: (str) account of the contract
+        :param name: (str) name of the action
+        :param authorization: list of {"actor": .., "permission": ..} dicts
+        :param data: (bytes or str) packed action data, raw or hex encoded
+        """
+        if isinstance(data, str):
+            data = bytes.fromhex(data)
+        self.account = account
+        self.name = name
+        self.authorization = authorization
+        self.data = data
+        self.packed = _TRANSACTION_SERIALIZER.pack('action', self.as_dict())
+
+    @classmethod
+    def from_args(cls, serializer, account, name, authorization, args):
+        """
+        Pack an action from its json arguments.
+
+        :param serializer: AbiSerializer of the contract
+        :param account: (str) account of the contract
+        :param name: (str) name of the action
+        :param authorization: list of {"actor": .., "permission": ..} dicts
+        :param args: json: arguments of the action
+        :return: PackedAction object
+        """
+        return cls(account, name, authorization, serializer.pack(serializer.action_type(name), args))
+
+    def as_dict(self):
+        """
+        Get the json form of the action, with hex encoded data.
+        """
+        return {'account': self.account, 'name': self.name,
+                'authorization': self.authorization, 'data': self.data.hex()}
+
+
+class Transaction:
+    """ a transaction packed in the wire format"""
+
+    __slots__ = ('header', 'context_free_actions', 'actions', 'packed_trx', 'id')
+
+    def __init__(self, expiration, ref_block_num, ref_block_prefix, actions,
+                 context_free_actions=(), max_net_usage_words=0,
+                 max_cpu_usage_ms=0, delay_sec=0):
+        """
+        constructor of the Transaction
+
+        :param expiration: (str) expiration time, eg. 2018-06-01T12:00:30
+        :param ref_block_num: (int) TAPOS block number
+        :param ref_block_prefix: (int) TAPOS block prefix
+        :param actions: list of PackedAction objects
+        :param context_free_actions: list of PackedAction objects
+        :param max_net_usage_words: (int) net usage limit, 0 for none
+        :param max_cpu_usage_ms: (int) cpu usage limit, 0 for none
+        :param delay_sec: (int) delay of the transaction
+        """
+        self.header = {
+            'expiration': expiration,
+            'ref_block_num': ref_block_num & 0xffff,
+            'ref_block_prefix': ref_block_prefix,
+            'max_net_usage_words': max_net_usage_words,
+            'max_cpu_usage_ms': max_cpu_usage_ms,
+            'delay_sec': delay_sec,
+        }
+        self.context_free_actions = list(context_free_actions)
+        self.actions = list(actions)
+        self.packed_trx = self._pack()
+        self.id = transaction_id(self.packed_trx)
+
+    def _pack(self):
+        # the same layout as pack_transaction, with the actions packed once.
+        writer = Writer()
+        writer.write(_TRANSACTION_SERIALIZER.pack('transaction_header', self.header))
+        for actions in (self.context_free_actions, self.actions):
+            writer.write_varuint32(len(actions))
+            for action in actions:
+                writer.write(action.packed)
+        # no transaction extensions.
+        writer.write_varuint32(0)
+        return writer.getvalue()
+
+    def as_dict(self):
+        """
+        Get the json form of the transaction, as taken by get_required_keys
+        and wallet_sign_trx.
+        """
+        transaction = dict(self.header)
+        transaction['context_free_actions'] = [action.as_dict() for action in self.context_free_actions]
+        transaction['actions'] = [action.as_dict() for action in self.actions]
+        transaction['transaction_extensions'] = []
+        return transaction
+
+    def push_format(self, signatures):
+        """
+        Get the body of push_transaction for this transaction.
+
+        :param signatures: list of SIG_K1_ signatures
+        :return: dict: packed transaction with its signatures
+        """
+        return {
+            'signatures': list(signatures),
+            'compression': 'none',
+            'packed_context_free_data': '',
+            'packed_trx': self.packed_trx.hex(),
+        }
+
+    def sign(self, signer, public_keys, chain_id):
+        """
+        Sign the transaction and get its push format.
+
+        :param signer: LocalSigner object
+        :param public_keys: list of public keys to sign with
+        :param chain_id: (str) hex chain id
+        :return: dict: push format of the signed transaction
+        """
+        return self.push_format(signer.sign_packed_transaction(self.packed_trx, public_keys, chain_id))
+
+
+class TransactionBuilder:
+    """ a factory of transactions sharing their TAPOS reference and lifetime"""
+
+    def __init__(self, chain_state=None, expire_seconds=30):
+        """
+        constructor of the TransactionBuilder
+
+        :param chain_state: ChainStateCache object providing the TAPOS
+        reference and the head block time, without I/O
+        :param expire_seconds: (int) lifetime of the transactions
+        """
+        self.chain_state = chain_state
+        self.expire_seconds = expire_seconds
+
+    def build(self, actions, context_free_actions=(), expiration=None, tapos=None, **kwargs):
+        """
+        Build a transaction.
+
+        :param actions: list of PackedAction objects
+        :param context_free_actions: list of PackedAction objects
+        :param expiration: (str) expiration time, defaults to the head block
+        time of the chain state plus expire_seconds
+        :param tapos: dict: ref_block_num and ref_block_prefix, defaults to
+        the reference of the chain state
+        :param kwargs: other header fields (max_net_usage_words ..etc.)
+        :return: Transaction object
+
+        :Example:
+
+        >>> transfer = PackedAction.from_args(serializer, "eosio.token", "transfer",
+        ...     [{"actor": "inita", "permission": "active"}],
+        ...     {"from": "inita", "to": "initb", "quantity": "1.0000 EOS", "memo": ""})
+        >>> trx = TransactionBuilder(chain_state).build([transfer])
+        >>> ChainAPI.push_transaction(json.dumps(trx.sign(signer, keys, chain_state.chain_id)))
+
+        """
+        if tapos is None:
+            tapos = self.chain_state.get_tapos()
+        if expiration is None:
+            expiration = self.chain_state.expiration(self.expire_seconds)
+        return Transaction(expiration, tapos['ref_block_num'], tapos['ref_block_prefix'],
+                           actions, context_free_actions, **kwargs)
@@ -1,6 +1,9 @@
-__all__ = ['NodeosConnect', 'EOSChainApi', 'EOSWalletApi']
+__all__ = ['NodeosConnect', 'AsyncNodeosConnect', 'EOSChainApi', 'EOSWalletApi', 'BlockFollower', 'TableScanner', 'AbiSerializer', 'AbiCache', 'ChainState', 'NodePool', 'SingleFlight', 'LocalSigner', 'Transaction', 'RequiredKeysCache', 'FastJson', 'ChainTypes', 'JsonStream', 'BlockStore', 'ColumnarExport', 'Codec', 'Instrumentation', 'FakeNodeos', 'FlowControl', 'Retry']
 
 # deprecated to keep older pyeos_client who import this from breaking
 from pyeos_client.NodeosConnect import RequestHandlerAPI
-from pyeos_client.EOSChainApi import ChainAPI
-from pyeos_client.EOSWalletApi import WalletAPI
+from pyeos_client.AsyncNodeosConnect import AsyncRequestHandlerAPI
+from pyeos_client.NodePool import NodePoolRequestHandlerAPI
+from pyeos_client.EOSChainApi import ChainAPI, AsyncChainAPI
+from pyeos_client.EOSWalletApi import WalletAPI, AsyncWalletAPI
+from pyeos_client.LocalSigner import LocalSigner
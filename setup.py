@@ -22,6 +22,12 @@ setup(
     url='https://github.com/EvaCoop/pyeos_client.git',
     packages=find_packages(exclude=('tests', 'docs')),
     install_requires=['requests'],
+    extras_require={
+        'async': ['aiohttp'],
+        'fast': ['orjson'],
+        'numpy': ['numpy'],
+        'signing': ['coincurve'],
+    },
     python_requires='>=3',
     classifiers=(
             "Programming Language :: Python :: 3",
@@ -0,0 +1,65 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import socket
+
+import pytest
+
+from pyeos_client.FakeNodeos import FakeNodeos, SyntheticChain
+
+
+class ScriptedNode(FakeNodeos):
+    """ a FakeNodeos answering the next requests of a path with scripted
+    statuses before serving it normally
+
+    A script entry is a (status, body) tuple, None to serve the request
+    normally, or 'process' to handle the request and then drop the
+    connection without answering.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.scripts = {}
+        self.calls = {}
+
+    def script(self, path, *answers):
+        self.scripts.setdefault(path, []).extend(answers)
+
+    def handle(self, path, body):
+        self.calls[path] = self.calls.get(path, 0) + 1
+        answers = self.scripts.get(path)
+        if answers:
+            answer = answers.pop(0)
+            if answer is None:
+                return super().handle(path, body)
+            if answer == 'process':
+                super().handle(path, body)
+                raise ConnectionAbortedError(path)
+            return answer
+        return super().handle(path, body)
+
+
+@pytest.fixture
+def node():
+    with ScriptedNode(SyntheticChain(head_block_num=2000, transactions_per_block=3)) as node:
+        yield node
+
+
+@pytest.fixture
+def closed_url():
+    # a port nothing listens on, connections to it are refused.
+    sock = socket.socket()
+    sock.bind(('127.0.0.1', 0))
+    port = sock.getsockname()[1]
+    sock.close()
+    return 'http://127.0.0.1:%d' % port
+
+
+def packed_transactions(count, seed=0):
+    """
+    Build transactions in the push format, the fake node only hashes their
+    packed_trx.
+    """
+    return [{'signatures': [], 'compression': 'none', 'packed_context_free_data': '',
+             'packed_trx': '%08x%08x' % (seed, i) + '00' * 40}
+            for i in range(count)]
@@ -0,0 +1,38 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+from pyeos_client.AbiCache import AbiCache
+from pyeos_client.EOSChainApi import ChainAPI
+from pyeos_client.FakeNodeos import TOKEN_ABI
+from pyeos_client.NodeosConnect import RequestHandlerAPI
+
+
+def test_redeployed_contract_is_fetched_again(node):
+    cache = AbiCache(check_interval=0)
+    chain_api = ChainAPI(RequestHandlerAPI(node.url))
+    assert 'transfer' in cache.get_serializer(chain_api, 'eosio.token').actions
+    assert cache.get_serializer(chain_api, 'eosio.token') is cache.get_serializer(chain_api, 'eosio.token')
+    assert node.calls['/v1/chain/get_code'] == 1
+    node.chain.contracts['eosio.token'] = dict(TOKEN_ABI, structs=TOKEN_ABI['structs'][:1],
+                                               actions=TOKEN_ABI['actions'][:1])
+    assert len(cache.get_abi(chain_api, 'eosio.token')['actions']) == 1
+    assert node.calls['/v1/chain/get_code'] == 2
+
+
+def test_concurrent_misses_save_the_cache(node, tmp_path):
+    names = ['token' + a + b for a in 'abcde' for b in 'abcdefgh']
+    for name in names:
+        node.chain.contracts[name] = TOKEN_ABI
+    path = str(tmp_path / 'abis.json')
+    cache = AbiCache(path=path)
+    chain_api = ChainAPI(RequestHandlerAPI(node.url, pool_maxsize=8))
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        serializers = list(executor.map(lambda name: cache.get_serializer(chain_api, name), names))
+    assert all('transfer' in serializer.actions for serializer in serializers)
+    with open(path) as f:
+        assert sorted(json.load(f)) == sorted(names)
+    assert [p.name for p in tmp_path.iterdir()] == ['abis.json']
+    assert AbiCache(path=path).entries.keys() == set(names)
@@ -0,0 +1,75 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+
+from pyeos_client.BlockStore import INDEX_ENTRY, BlockStore
+from pyeos_client.EOSChainApi import ChainAPI
+from pyeos_client.NodeosConnect import RequestHandlerAPI
+
+
+def store_blocks(node, path, block_nums):
+    with BlockStore(path) as store:
+        chain_api = ChainAPI(RequestHandlerAPI(node.url), block_store=store)
+        for block_num in block_nums:
+            chain_api.get_block(block_num)
+        return dict(store.index)
+
+
+def test_only_irreversible_blocks_are_stored(node, tmp_path):
+    lib = node.chain.get_info()['last_irreversible_block_num']
+    with BlockStore(str(tmp_path)) as store:
+        chain_api = ChainAPI(RequestHandlerAPI(node.url), block_store=store)
+        assert chain_api.get_block(lib).json()['block_num'] == lib
+        assert chain_api.get_block(lib + 1).json()['block_num'] == lib + 1
+        assert lib in store and lib + 1 not in store
+        calls = node.calls['/v1/chain/get_block']
+        assert chain_api.get_block(lib).json() == node.chain.block(lib)
+        assert node.calls['/v1/chain/get_block'] == calls
+
+
+def test_failed_get_info_does_not_fail_get_block(node, tmp_path):
+    node.script('/v1/chain/get_info', (500, b'{"code":500}'))
+    with BlockStore(str(tmp_path)) as store:
+        chain_api = ChainAPI(RequestHandlerAPI(node.url), block_store=store)
+        assert chain_api.get_block(5).json()['block_num'] == 5
+        assert 5 not in store
+
+
+def test_index_is_reloaded(node, tmp_path):
+    index = store_blocks(node, str(tmp_path), range(1, 11))
+    calls = node.calls['/v1/chain/get_block']
+    with BlockStore(str(tmp_path)) as store:
+        assert store.index == index
+        assert [store.get(num) for num in range(1, 11)] == [node.chain.block(num) for num in range(1, 11)]
+    assert node.calls['/v1/chain/get_block'] == calls
+
+
+def test_truncated_index_entry_is_dropped(node, tmp_path):
+    store_blocks(node, str(tmp_path), range(1, 6))
+    index_path = str(tmp_path / 'blocks.index')
+    with open(index_path, 'r+b') as f:
+        f.truncate(5 * INDEX_ENTRY.size - 3)
+    with BlockStore(str(tmp_path)) as store:
+        assert sorted(store.index) == [1, 2, 3, 4]
+        # the block without its entry is dropped from the segment.
+        assert os.path.getsize(str(tmp_path / 'blocks.log')) == sum(store.index[4])
+    assert os.path.getsize(index_path) == 4 * INDEX_ENTRY.size
+    store_blocks(node, str(tmp_path), [5, 6])
+    with BlockStore(str(tmp_path)) as store:
+        assert [store.get(num) for num in range(1, 7)] == [node.chain.block(num) for num in range(1, 7)]
+
+
+def test_torn_segment_tail_is_recovered(node, tmp_path):
+    index = store_blocks(node, str(tmp_path), range(1, 6))
+    # the last block only partly reached the disk.
+    with open(str(tmp_path / 'blocks.log'), 'r+b') as f:
+        f.truncate(index[5][0] + index[5][1] // 2)
+    with BlockStore(str(tmp_path)) as store:
+        assert sorted(store.index) == [1, 2, 3, 4]
+    # blocks appended after the recovery are not shadowed by the torn entry.
+    store_blocks(node, str(tmp_path), [6, 7, 8])
+    with BlockStore(str(tmp_path)) as store:
+        assert 5 not in store
+        assert [store.get(num) for num in (1, 2, 3, 4, 6, 7, 8)] == \
+            [node.chain.block(num) for num in (1, 2, 3, 4, 6, 7, 8)]
@@ -0,0 +1,40 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from pyeos_client.ChainState import ChainStateCache, tapos_from_block_id
+from pyeos_client.EOSChainApi import ChainAPI
+from pyeos_client.NodeosConnect import RequestHandlerAPI
+from pyeos_client.Transaction import TransactionBuilder
+
+# block 0x12345, whose bytes 8 to 11 are the little endian 0xdeadbeef.
+BLOCK_ID = '00012345' + '0badf00d' + 'efbeadde' + '42' * 20
+
+
+def test_tapos_of_a_known_block_id():
+    assert tapos_from_block_id(BLOCK_ID) == {'ref_block_num': 0x2345, 'ref_block_prefix': 0xdeadbeef}
+
+
+def test_cached_tapos_references_the_head_block(node):
+    now = [0.0]
+    state = ChainStateCache(ChainAPI(RequestHandlerAPI(node.url)), refresh_interval=1,
+                            clock=lambda: now[0])
+    head_id = node.chain.block_id(2000)
+    assert state.get_tapos() == tapos_from_block_id(head_id)
+    assert state.get_tapos()['ref_block_num'] == 2000
+    assert state.chain_id == node.chain.get_info()['chain_id']
+    assert node.calls['/v1/chain/get_info'] == 1
+    # older than max_age, the state is fetched again.
+    node.chain.initial_head = 70000
+    now[0] = 10.5
+    assert state.get_tapos()['ref_block_num'] == 70000 & 0xffff
+    assert node.calls['/v1/chain/get_info'] == 2
+
+    trx = TransactionBuilder(state, expire_seconds=60).build([])
+    assert trx.header['ref_block_prefix'] == tapos_from_block_id(node.chain.block_id(70000))['ref_block_prefix']
+    assert trx.header['expiration'] == state.expiration(60)
+
+
+def test_irreversible_tapos(node):
+    state = ChainStateCache(ChainAPI(RequestHandlerAPI(node.url)), irreversible=True)
+    lib = node.chain.get_info()['last_irreversible_block_num']
+    assert state.get_tapos() == tapos_from_block_id(node.chain.block_id(lib))
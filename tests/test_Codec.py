@@ -0,0 +1,64 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import random
+
+import pytest
+
+from pyeos_client.Codec import (
+    NAME_CHARMAP, AbiError, asset_to_string, decode_assets, decode_names, encode_assets,
+    encode_names, name_to_string, string_to_asset, string_to_name)
+
+numpy = pytest.importorskip('numpy')
+
+
+def random_names(count, seed=0):
+    rand = random.Random(seed)
+    names = ['', 'a', 'eosio', 'eosio.token', 'zzzzzzzzzzzzj', '111111111111', 'a.b.c']
+    while len(names) < count:
+        length = rand.randrange(1, 14)
+        name = ''.join(rand.choice(NAME_CHARMAP[1:]) for _ in range(length))
+        if length == 13:
+            # the 13th character only has 4 bits.
+            name = name[:12] + rand.choice(NAME_CHARMAP[:16])
+        names.append(name.rstrip('.'))
+    return names
+
+
+def test_encode_names_matches_string_to_name():
+    names = random_names(2000)
+    expected = [string_to_name(name) for name in names]
+    assert list(encode_names(names)) == expected
+    assert encode_names(numpy.array(names)).tolist() == expected
+    assert encode_names(numpy.array(names, dtype='S13')).tolist() == expected
+    assert encode_names(numpy.array(names).reshape(40, 50)).tolist() == numpy.array(
+        expected, dtype=numpy.uint64).reshape(40, 50).tolist()
+
+
+def test_decode_names_matches_name_to_string():
+    rand = random.Random(1)
+    values = [string_to_name(name) for name in random_names(1000)]
+    values += [rand.getrandbits(64) for _ in range(1000)]
+    expected = [name_to_string(value) for value in values]
+    assert decode_names(values) == expected
+    assert decode_names(numpy.array(values, dtype=numpy.uint64)).tolist() == expected
+
+
+@pytest.mark.parametrize('name', ['EOSIO', 'eosio6', 'eosio-token', 'aaaaaaaaaaaaaa', 'aaaaaaaaaaaaz'])
+def test_invalid_names_are_rejected_by_both(name):
+    with pytest.raises(AbiError):
+        string_to_name(name)
+    with pytest.raises(AbiError):
+        encode_names(numpy.array(['eosio', name]))
+
+
+def test_assets_match_the_scalar_functions():
+    rand = random.Random(2)
+    assets = ['0.0000 EOS', '-1.5000 EOS', '10 SYS', '0.00000001 BTC', '123.45 USD']
+    assets += ['%d.%04d EOS' % (rand.randrange(10 ** 9), rand.randrange(10 ** 4)) for _ in range(500)]
+    expected = [string_to_asset(asset) for asset in assets]
+    amounts, symbols = encode_assets(numpy.array(assets))
+    assert amounts.dtype == numpy.int64 and symbols.dtype == numpy.uint64
+    assert list(zip(amounts.tolist(), symbols.tolist())) == expected
+    assert list(zip(*encode_assets(assets))) == expected
+    assert decode_assets(amounts, symbols) == [asset_to_string(*value) for value in expected] == assets
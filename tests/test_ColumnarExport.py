@@ -0,0 +1,63 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import sys
+
+import pytest
+
+from pyeos_client.Codec import (
+    string_to_asset, string_to_name, string_to_time_point, time_point_to_string)
+from pyeos_client.ColumnarExport import ActionColumns, load_columns
+from pyeos_client.EOSChainApi import ChainAPI
+from pyeos_client.NodeosConnect import RequestHandlerAPI
+
+export_module = sys.modules['pyeos_client.ColumnarExport']
+
+
+def expected_rows(chain_api, start, end):
+    rows = []
+    for block_num in range(start, end + 1):
+        block = chain_api.get_block(block_num).json()
+        timestamp = string_to_time_point(block['timestamp']) // 1000
+        for receipt in block['transactions']:
+            for action in receipt['trx']['transaction']['actions']:
+                data = action['data']
+                rows.append((block_num, timestamp, string_to_name(action['account']),
+                             string_to_name(action['name']),
+                             string_to_name(action['authorization'][0]['actor']),
+                             string_to_name(data['from']), string_to_name(data['to']))
+                            + string_to_asset(data['quantity']))
+    return rows
+
+
+def test_time_points():
+    assert string_to_time_point('2018-06-01T12:00:30') == 1527854430 * 1000000
+    assert string_to_time_point('2018-06-01T12:00:30.5Z') == 1527854430 * 1000000 + 500000
+    assert time_point_to_string(1527854430 * 1000000 + 500000) == '2018-06-01T12:00:30.500'
+    assert time_point_to_string(1527854430 * 1000000, with_millis=False) == '2018-06-01T12:00:30'
+
+
+def test_export_memory_maps_back(node, tmp_path):
+    numpy = pytest.importorskip('numpy')
+    chain_api = ChainAPI(RequestHandlerAPI(node.url))
+    columns = chain_api.extract_actions(1, 30, concurrency=4)
+    columns.save(str(tmp_path))
+    loaded = load_columns(str(tmp_path))
+    assert all(isinstance(column, numpy.memmap) for column in loaded.values())
+    assert list(zip(*(column.tolist() for column in loaded.values()))) == expected_rows(chain_api, 1, 30)
+    for name, column in columns.to_numpy().items():
+        assert loaded[name].dtype == column.dtype
+        assert numpy.array_equal(loaded[name], column)
+
+
+def test_export_reads_back_without_numpy(node, tmp_path, monkeypatch):
+    chain_api = ChainAPI(RequestHandlerAPI(node.url))
+    columns = chain_api.extract_actions(1, 10)
+    columns.save(str(tmp_path))
+    monkeypatch.setattr(export_module, 'numpy', None)
+    loaded = load_columns(str(tmp_path))
+    assert loaded == columns.columns
+    assert len(loaded['block_num']) == len(columns) == 10 * 3
+    empty = ActionColumns()
+    empty.save(str(tmp_path / 'empty'))
+    assert all(len(column) == 0 for column in load_columns(str(tmp_path / 'empty')).values())
@@ -0,0 +1,348 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import asyncio
+import json
+
+import pytest
+import requests
+
+from pyeos_client.AbiCache import AbiCache
+from pyeos_client.BlockFollower import BLOCK, ROLLBACK
+from pyeos_client.BlockStore import BlockStore
+from pyeos_client.ChainTypes import Account, Block, ChainInfo, TableRows
+from pyeos_client.EOSChainApi import AsyncChainAPI, ChainAPI
+from pyeos_client.FakeNodeos import FakeNodeos, SyntheticChain
+from pyeos_client.JsonStream import JsonArrayStream
+from pyeos_client.NodeosConnect import RequestHandlerAPI
+from pyeos_client.Transaction import transaction_id
+
+from .conftest import packed_transactions
+
+
+def chunked(data, size):
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+def test_get_blocks_in_order(node):
+    blocks = list(ChainAPI(RequestHandlerAPI(node.url)).get_blocks(10, 60, concurrency=4))
+    assert [block['block_num'] for block in blocks] == list(range(10, 61))
+
+
+def test_submit_transactions_in_batches(node):
+    transactions = packed_transactions(25)
+    results = ChainAPI(RequestHandlerAPI(node.url)).submit_transactions(transactions, batch_size=10)
+    assert [result.error for result in results] == [None] * 25
+    assert [result.transaction_id for result in results] == \
+        [transaction_id(trx['packed_trx']) for trx in transactions]
+    assert node.calls['/v1/chain/push_transactions'] == 3
+    assert '/v1/chain/push_transaction' not in node.calls
+
+
+def test_submit_transactions_without_push_transactions(node):
+    with FakeNodeos(node.chain, push_transactions=False) as old_node:
+        chain_api = ChainAPI(RequestHandlerAPI(old_node.url))
+        results = chain_api.submit_transactions(packed_transactions(5), batch_size=2)
+        assert [result.error for result in results] == [None] * 5
+        # later calls go straight to push_transaction.
+        results = chain_api.submit_transactions(packed_transactions(3, seed=1), batch_size=2)
+        assert [result.error for result in results] == [None] * 3
+        assert len(node.chain.pushed) == 8
+
+
+def test_submit_transactions_reports_duplicates(node):
+    chain_api = ChainAPI(RequestHandlerAPI(node.url))
+    transactions = packed_transactions(4)
+    chain_api.submit_transactions(transactions[:1], batch_size=None)
+    results = chain_api.submit_transactions(transactions, batch_size=4)
+    assert 'tx_duplicate' in results[0].error
+    assert results[0].result is None
+    assert results[0].transaction_id == transaction_id(transactions[0]['packed_trx'])
+    assert [result.error for result in results[1:]] == [None] * 3
+
+
+def test_submit_transactions_null_id_is_a_failure(node):
+    node.script('/v1/chain/push_transactions',
+                (200, json.dumps([{'transaction_id': '0' * 64, 'processed': None}]).encode()))
+    results = ChainAPI(RequestHandlerAPI(node.url)).submit_transactions(packed_transactions(1))
+    assert results[0].error is not None
+
+
+def test_submit_transactions_falls_back_for_refused_chunks_only(node):
+    # the first chunk is accepted before the node starts refusing.
+    node.script('/v1/chain/push_transactions', None, (404, b'{"code":404}'))
+    chain_api = ChainAPI(RequestHandlerAPI(node.url))
+    transactions = packed_transactions(6)
+    results = chain_api.submit_transactions(transactions, concurrency=1, batch_size=3)
+    assert [result.error for result in results] == [None] * 6
+    assert [result.transaction_id for result in results] == \
+        [transaction_id(trx['packed_trx']) for trx in transactions]
+    assert node.calls['/v1/chain/push_transaction'] == 3
+
+
+def test_follow_blocks_rolls_back_a_fork(node):
+    # the other branch forks after block 8.
+    fork = SyntheticChain(head_block_num=2000, seed=1)
+    fork_blocks = dict((num, fork.block(num)) for num in (9, 10, 11))
+    fork_blocks[9]['previous'] = node.chain.block_id(8)
+    answers = dict((num, (200, json.dumps(block).encode())) for num, block in fork_blocks.items())
+    node.script('/v1/chain/get_block', None, None, None,
+                answers[11], answers[10], answers[9], answers[9], answers[10], answers[11])
+    chain_api = ChainAPI(RequestHandlerAPI(node.url))
+    events = list(chain_api.follow_blocks(start=8, end=11, prefetch_threshold=100))
+    assert [(event.action, event.block_num) for event in events] == [
+        (BLOCK, 8), (BLOCK, 9), (BLOCK, 10), (ROLLBACK, 10), (ROLLBACK, 9),
+        (BLOCK, 9), (BLOCK, 10), (BLOCK, 11)]
+    assert events[3].block_id == node.chain.block_id(10)
+    assert events[3].block is None
+    assert [event.block_id for event in events[5:]] == [fork_blocks[num]['id'] for num in (9, 10, 11)]
+
+
+def test_follow_blocks_irreversible_waits_for_the_last_irreversible_block(node):
+    lib = node.chain.get_info()['last_irreversible_block_num']
+    assert lib < node.chain.head_block_num
+
+    class CaughtUp(Exception):
+        pass
+
+    def sleep(seconds):
+        raise CaughtUp
+
+    chain_api = ChainAPI(RequestHandlerAPI(node.url))
+    follower = chain_api.follow_blocks(start=lib - 20, end=lib + 20, irreversible=True, sleep=sleep)
+    block_nums = []
+    with pytest.raises(CaughtUp):
+        # the follower catches up with concurrent fetches, then polls.
+        for event in follower:
+            assert event.action == BLOCK
+            block_nums.append(event.block_num)
+    assert block_nums == list(range(lib - 20, lib + 1))
+
+
+@pytest.mark.parametrize('abi_cache', [None, AbiCache(check_interval=0)])
+def test_get_abi_serializer(node, abi_cache):
+    chain_api = ChainAPI(RequestHandlerAPI(node.url), abi_cache=abi_cache)
+    transfer = {'from': 'alice', 'to': 'bob', 'quantity': '1.0000 EOS', 'memo': 'hi'}
+    for _ in range(2):
+        serializer = chain_api.get_abi_serializer('eosio.token')
+        data = serializer.pack_action_data('transfer', transfer)
+        assert serializer.unpack_action_data('transfer', data) == transfer
+    assert node.calls['/v1/chain/get_code'] == (2 if abi_cache is None else 1)
+    if abi_cache is not None:
+        assert node.calls['/v1/chain/get_code_hash'] == 1
+
+
+@pytest.mark.parametrize('size', [1, 2, 7, 64, 100000])
+def test_json_array_stream_any_chunking(size):
+    document = {'rows': [{'a': 1, 'b': 'x[]{}",\\"y', 'c': [1, [2, {'d': None}]]},
+                         {'e': 'é中'}, [], 3, 'str', None],
+                'more': True, 'next_key': '"rows": ['}
+    data = json.dumps(document, ensure_ascii=False).encode()
+    stream = JsonArrayStream(chunked(data, size), 'rows')
+    assert list(stream) == document['rows']
+    assert stream.rest == dict(document, rows=[])
+
+
+def test_json_array_stream_nested_key_is_ignored():
+    data = b'{"other": {"rows": [1, 2]}, "rows": [3], "x": "rows"}'
+    stream = JsonArrayStream(chunked(data, 5), 'rows')
+    assert list(stream) == [3]
+    assert stream.rest == {'other': {'rows': [1, 2]}, 'rows': [], 'x': 'rows'}
+
+
+def test_json_array_stream_truncated():
+    with pytest.raises(ValueError):
+        list(JsonArrayStream([b'{"rows": [1, 2'], 'rows'))
+
+
+def test_stream_block_transactions(node):
+    chain_api = ChainAPI(RequestHandlerAPI(node.url))
+    block = chain_api.get_block(42).json()
+    stream = chain_api.stream_block_transactions(42, chunk_size=97)
+    assert list(stream) == block['transactions']
+    assert stream.rest == dict(block, transactions=[])
+
+
+def test_stream_table_rows(node):
+    chain_api = ChainAPI(RequestHandlerAPI(node.url))
+    query = dict(code='eosio.token', scope='eosio.token', table='accounts', limit=50)
+    page = chain_api.get_table_rows(**query).json()
+    stream = chain_api.stream_table_rows(chunk_size=33, **query)
+    assert list(stream) == page['rows']
+    assert stream.rest['more'] == page['more']
+
+
+def test_table_rows_merge_keywords_into_account_details(node):
+    chain_api = ChainAPI(RequestHandlerAPI(node.url))
+    details = {'code': 'eosio.token', 'scope': 'eosio.token', 'table': 'accounts', 'json': True, 'limit': 50}
+    page = chain_api.get_table_rows(details, limit=7).json()
+    assert len(page['rows']) == 7
+    assert details['limit'] == 50
+    assert list(chain_api.stream_table_rows(details, limit=7)) == page['rows']
+    with pytest.raises(ValueError):
+        chain_api.get_table_rows(json.dumps(details), limit=7)
+    with pytest.raises(ValueError):
+        chain_api.stream_table_rows(json.dumps(details), limit=7)
+    assert chain_api.get_table_rows(json.dumps(details)).json() == chain_api.get_table_rows(details).json()
+
+
+def run_async(node, coroutine_function, **kwargs):
+    pytest.importorskip('aiohttp')
+    from pyeos_client.AsyncNodeosConnect import AsyncRequestHandlerAPI
+
+    async def main():
+        async with AsyncRequestHandlerAPI(base_url=node.url) as connection:
+            return await coroutine_function(AsyncChainAPI(connection, **kwargs))
+
+    return asyncio.run(main())
+
+
+def test_async_get_blocks(node):
+    async def fetch(chain_api):
+        return [block['block_num'] async for block in chain_api.get_blocks(1, 30, concurrency=4)]
+
+    assert run_async(node, fetch) == list(range(1, 31))
+
+
+def test_async_get_abi_serializer(node):
+    async def fetch(chain_api):
+        return await chain_api.get_abi_serializer('eosio.token')
+
+    assert 'transfer' in run_async(node, fetch).actions
+
+
+def test_async_submit_transactions(node):
+    node.script('/v1/chain/push_transactions', None, (404, b'{"code":404}'))
+    transactions = packed_transactions(7)
+
+    async def submit(chain_api):
+        return await chain_api.submit_transactions(transactions, concurrency=1, batch_size=3)
+
+    results = run_async(node, submit)
+    assert [result.error for result in results] == [None] * 7
+    assert [result.transaction_id for result in results] == \
+        [transaction_id(trx['packed_trx']) for trx in transactions]
+
+
+def test_async_follow_blocks_rolls_back_a_fork(node):
+    fork = SyntheticChain(head_block_num=2000, seed=1)
+    fork_blocks = dict((num, fork.block(num)) for num in (9, 10, 11))
+    fork_blocks[9]['previous'] = node.chain.block_id(8)
+    answers = dict((num, (200, json.dumps(block).encode())) for num, block in fork_blocks.items())
+    node.script('/v1/chain/get_block', None, None, None,
+                answers[11], answers[10], answers[9], answers[9], answers[10], answers[11])
+
+    async def follow(chain_api):
+        return [(event.action, event.block_num)
+                async for event in chain_api.follow_blocks(start=8, end=11, prefetch_threshold=100)]
+
+    assert run_async(node, follow) == [
+        (BLOCK, 8), (BLOCK, 9), (BLOCK, 10), (ROLLBACK, 10), (ROLLBACK, 9),
+        (BLOCK, 9), (BLOCK, 10), (BLOCK, 11)]
+
+
+def test_async_follow_blocks_catches_up(node):
+    async def follow(chain_api):
+        return [event.block_num async for event in chain_api.follow_blocks(start=1950, end=2000)]
+
+    assert run_async(node, follow) == list(range(1950, 2001))
+
+
+def test_async_scan_table_rows(node):
+    query = ('eosio.token', 'eosio.token', 'accounts')
+    expected = list(ChainAPI(RequestHandlerAPI(node.url)).scan_table_rows(*query, limit=1000))
+
+    async def scan(chain_api):
+        return [row async for row in chain_api.scan_table_rows(*query, partitions=4, limit=300)]
+
+    assert run_async(node, scan) == expected
+
+
+def test_async_scan_table_rows_of_every_scope(node):
+    expected = list(ChainAPI(RequestHandlerAPI(node.url)).scan_table_rows('eosio.token', None, 'accounts'))
+
+    async def scan(chain_api):
+        return [item async for item in chain_api.scan_table_rows('eosio.token', None, 'accounts',
+                                                                 partitions=2, limit=700)]
+
+    assert run_async(node, scan) == expected
+
+
+def test_async_extract_actions(node):
+    expected = ChainAPI(RequestHandlerAPI(node.url)).extract_actions(1, 40)
+
+    async def extract(chain_api):
+        return await chain_api.extract_actions(1, 40, concurrency=4)
+
+    assert run_async(node, extract).columns == expected.columns
+
+
+def test_async_streams(node):
+    chain_api = ChainAPI(RequestHandlerAPI(node.url))
+    block = chain_api.get_block(42).json()
+    page = chain_api.get_table_rows(code='eosio.token', scope='eosio.token', table='accounts',
+                                    limit=50).json()
+
+    async def stream(chain_api):
+        transactions = await chain_api.stream_block_transactions(42, chunk_size=97)
+        rows = await chain_api.stream_table_rows(code='eosio.token', scope='eosio.token',
+                                                 table='accounts', limit=50, chunk_size=33)
+        return ([trx async for trx in transactions], transactions.rest,
+                [row async for row in rows], rows.rest)
+
+    transactions, block_rest, rows, page_rest = run_async(node, stream)
+    assert transactions == block['transactions']
+    assert block_rest == dict(block, transactions=[])
+    assert rows == page['rows']
+    assert page_rest['more'] == page['more']
+
+
+def test_async_abi_cache_and_block_store(node, tmp_path):
+    abi_cache = AbiCache(check_interval=0)
+    lib = node.chain.get_info()['last_irreversible_block_num']
+
+    async def fetch(chain_api):
+        serializers = [await chain_api.get_abi_serializer('eosio.token') for _ in range(2)]
+        blocks = [(await chain_api.get_block(num)).json() for num in (lib, lib, lib + 1)]
+        return serializers, blocks
+
+    with BlockStore(str(tmp_path)) as store:
+        serializers, blocks = run_async(node, fetch, abi_cache=abi_cache, block_store=store)
+        assert serializers[0] is serializers[1]
+        assert [block['block_num'] for block in blocks] == [lib, lib, lib + 1]
+        assert lib in store and lib + 1 not in store
+    assert node.calls['/v1/chain/get_code'] == 1
+    assert node.calls['/v1/chain/get_block'] == 2
+
+
+def test_typed_results(node):
+    chain_api = ChainAPI(RequestHandlerAPI(node.url))
+    info = chain_api.get_info(typed=True)
+    assert isinstance(info, ChainInfo)
+    assert info.head_block_num == 2000
+    block = chain_api.get_block(10, typed=True)
+    assert isinstance(block, Block)
+    assert block.block_num == 10
+    assert len(block.transactions) == 3
+    assert [action.name for _, action in block.iter_actions()] == ['transfer'] * 3
+    account = chain_api.get_account(block.transactions[0].actions[0].data['from'], typed=True)
+    assert isinstance(account, Account)
+    rows = chain_api.get_table_rows(code='eosio.token', scope='eosio.token', table='accounts',
+                                    limit=5, typed=True)
+    assert isinstance(rows, TableRows)
+    assert len(rows) == 5
+    assert rows.more
+    # untyped calls still return the response.
+    assert chain_api.get_info().json() == info.raw
+
+
+def test_typed_result_raises_on_http_error(node):
+    with pytest.raises(requests.exceptions.HTTPError):
+        ChainAPI(RequestHandlerAPI(node.url)).get_block(10 ** 9, typed=True)
+
+
+def test_async_typed_result(node):
+    async def fetch(chain_api):
+        return await chain_api.get_info(typed=True)
+
+    assert run_async(node, fetch).head_block_num == 2000
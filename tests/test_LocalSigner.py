@@ -0,0 +1,71 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import hashlib
+import sys
+
+import pytest
+
+from pyeos_client.AbiSerializer import string_to_key
+from pyeos_client.LocalSigner import (
+    N, LocalSigner, compress_point, point_mul_g, private_key_to_wif, sign_digest)
+
+signer_module = sys.modules['pyeos_client.LocalSigner']
+
+DEV_KEY = '5KQwrPbwdL6PhXujxW37FSSQZ1JiwsST4cqQzDeyXtP79zkvFD3'
+DEV_PUBLIC_KEY = 'EOS6MRyAjQq8ud7hVNYcfnVPJqcVpscN5So8BhtHuGYqET5GDW5CV'
+SCALARS = [1, 2, 15, 16, 17, 255, 256, int('1' * 64, 16), 2 ** 252, N - 16, N - 1]
+
+
+def test_public_key_of_the_development_key():
+    assert LocalSigner([DEV_KEY]).wallet_get_public_keys().json() == [DEV_PUBLIC_KEY]
+
+
+def test_point_mul_g_python_matches_double_and_add(monkeypatch):
+    monkeypatch.setattr(signer_module, 'coincurve', None)
+    g = point_mul_g(1)
+    acc = g
+    for k in range(2, 40):
+        acc = signer_module._to_affine(signer_module._jacobian_add_affine((acc[0], acc[1], 1), g))
+        assert point_mul_g(k) == acc
+    assert point_mul_g(N - 1) == (g[0], signer_module.P - g[1])
+
+
+def test_point_mul_g_coincurve_matches_python(monkeypatch):
+    pytest.importorskip('coincurve')
+    points = [point_mul_g(k) for k in SCALARS]
+    monkeypatch.setattr(signer_module, 'coincurve', None)
+    assert [point_mul_g(k) for k in SCALARS] == points
+
+
+def test_signatures_are_deterministic_and_canonical(monkeypatch):
+    secret = signer_module.private_key_from_string(DEV_KEY)
+    digests = [hashlib.sha256(b'%d' % i).digest() for i in range(8)]
+    signatures = [sign_digest(secret, digest) for digest in digests]
+    monkeypatch.setattr(signer_module, 'coincurve', None)
+    assert [sign_digest(secret, digest) for digest in digests] == signatures
+    assert signatures[0] == ('SIG_K1_KZyyCnvfgqBLfXUWoMcWX3WDSay1iAPd6FfJ3uFfftsuuRJhYeG2fF7z9'
+                             'uHrYLnLQ3FvBoQQDU8bYSzXjSjV3m8JyQ7GFv')
+
+
+def test_coincurve_signatures_match_python(monkeypatch):
+    coincurve = pytest.importorskip('coincurve')
+    secret = signer_module.private_key_from_string(DEV_KEY)
+    public_key = compress_point(point_mul_g(secret))
+    digests = [hashlib.sha256(b'digest %d' % i).digest() for i in range(16)]
+    signatures = [sign_digest(secret, digest) for digest in digests]
+    monkeypatch.setattr(signer_module, 'coincurve', None)
+    assert [sign_digest(secret, digest) for digest in digests] == signatures
+    for digest, signature in zip(digests, signatures):
+        data = string_to_key(signature)[1]
+        recid = data[0] - 27 - 4
+        # libsecp256k1 recovers the signing key from r, s and the recovery id.
+        recovered = coincurve.PublicKey.from_signature_and_message(
+            data[1:] + bytes([recid]), digest, hasher=None)
+        assert recovered.format(compressed=True) == public_key
+
+
+def test_wif_round_trip():
+    signer = LocalSigner()
+    public_key = signer.import_key(private_key_to_wif(2 ** 200 + 12345))
+    assert signer.wallet_list_keys().json() == [[public_key, private_key_to_wif(2 ** 200 + 12345)]]
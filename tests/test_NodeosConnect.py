@@ -1 +1,322 @@
-#TODO unittest
\ No newline at end of file
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import time
+
+import pytest
+import requests
+
+from pyeos_client.EOSChainApi import ChainAPI
+from pyeos_client.FakeNodeos import LatencyProfile, SyntheticChain
+from pyeos_client.FlowControl import AdaptiveLimiter, FlowControl, TokenBucket
+from pyeos_client.Instrumentation import Instrumentation
+import pyeos_client.NodePool
+from pyeos_client.NodePool import NodePoolRequestHandlerAPI
+import pyeos_client.NodeosConnect
+from pyeos_client.NodeosConnect import BufferedResponse, RequestHandlerAPI
+from pyeos_client.Retry import RetryBudget, RetryEngine, RetryPolicy
+from pyeos_client.Transaction import transaction_id
+
+from .conftest import ScriptedNode, packed_transactions
+
+UNAVAILABLE = (503, b'{"code":503,"message":"Service Unavailable"}')
+
+
+class FakeClock:
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+def test_get_and_post(node):
+    connection = RequestHandlerAPI(node.url)
+    assert connection.get('/v1/chain/get_info').json()['head_block_num'] == 2000
+    block = connection.post('/v1/chain/get_block', data={'block_num_or_id': 5}).json()
+    assert block['block_num'] == 5
+    assert connection.post('/v1/chain/get_block', data='{"block_num_or_id": 5}').json() == block
+
+
+def test_shared_handler_rejects_other_arguments(node, monkeypatch):
+    monkeypatch.setattr(pyeos_client.NodeosConnect, '_shared_handlers', {})
+    handler = RequestHandlerAPI.shared(node.url, pool_maxsize=4)
+    assert RequestHandlerAPI.shared(node.url) is handler
+    assert RequestHandlerAPI.shared(node.url, pool_maxsize=4) is handler
+    with pytest.raises(ValueError):
+        RequestHandlerAPI.shared(node.url, pool_maxsize=8)
+
+
+def open_connections(connection):
+    request = requests.Request('GET', connection.base_url).prepare()
+    pool = connection.session.get_adapter(connection.base_url).get_connection_with_tls_context(request, False)
+    return sum(conn is not None and conn.sock is not None for conn in list(pool.pool.queue))
+
+
+def test_prewarm_opens_connections(node):
+    connection = RequestHandlerAPI(node.url, pool_maxsize=4)
+    assert connection.prewarm(3) == 3
+    assert open_connections(connection) == 3
+    assert connection.get('/v1/chain/get_info').status_code == 200
+
+
+def test_prewarm_without_pool_internals(node, monkeypatch):
+    monkeypatch.setattr(pyeos_client.NodeosConnect, '_POOL_METHODS', ('_get_conn', '_missing'))
+    connection = RequestHandlerAPI(node.url, pool_maxsize=4)
+    assert connection.prewarm(3) == 3
+    assert node.calls['/v1/chain/get_info'] == 3
+    assert open_connections(connection) >= 1
+
+
+def test_instrumentation_counts_bytes_sent(node):
+    samples = []
+    connection = RequestHandlerAPI(node.url, instrumentation=Instrumentation(callbacks=[samples.append]))
+    body = '{"block_num_or_id": 5, "memo": "é中"}'
+    assert connection.post('/v1/chain/get_block', data=body).json()['block_num'] == 5
+    assert samples[0].bytes_sent == len(body.encode('utf-8'))
+    assert samples[0].bytes_received == len(connection.post('/v1/chain/get_block', data=body).content)
+
+
+def test_retry_read_until_success(node):
+    node.script('/v1/chain/get_info', UNAVAILABLE, UNAVAILABLE)
+    retry = RetryEngine(read_policy=RetryPolicy(base_delay=0.001))
+    response = RequestHandlerAPI(node.url, retry=retry).get('/v1/chain/get_info')
+    assert response.status_code == 200
+    assert retry.get_stats()['retries'] == 2
+    assert node.calls['/v1/chain/get_info'] == 3
+
+
+def test_retry_gives_up_after_max_attempts(node):
+    node.script('/v1/chain/get_info', *[UNAVAILABLE] * 5)
+    retry = RetryEngine(read_policy=RetryPolicy(max_attempts=3, base_delay=0.001))
+    response = RequestHandlerAPI(node.url, retry=retry).get('/v1/chain/get_info')
+    assert response.status_code == 503
+    assert node.calls['/v1/chain/get_info'] == 3
+
+
+def test_retry_budget_refuses_retries():
+    clock = FakeClock()
+    budget = RetryBudget(ratio=0.5, min_per_second=0.0, capacity=1.0, clock=clock)
+    assert budget.withdraw()
+    assert not budget.withdraw()
+    budget.record_call()
+    budget.record_call()
+    assert budget.withdraw()
+
+
+def test_retry_does_not_resend_unsafe_write(node):
+    node.script('/v1/wallet/create', (502, b'{"code":502}'))
+    retry = RetryEngine(write_policy=RetryPolicy(idempotent=False, base_delay=0.001))
+    response = RequestHandlerAPI(node.url, retry=retry).post('/v1/wallet/create', data='"default"')
+    assert response.status_code == 502
+    assert node.calls['/v1/wallet/create'] == 1
+
+
+def test_retry_push_after_delivery_answers_duplicate_as_success(node):
+    node.script('/v1/chain/push_transaction', 'process')
+    retry = RetryEngine(write_policy=RetryPolicy(idempotent=False, base_delay=0.001))
+    transaction = packed_transactions(1)[0]
+    response = RequestHandlerAPI(node.url, retry=retry).post('/v1/chain/push_transaction',
+                                                             data=transaction)
+    assert response.status_code == 200
+    assert response.json()['duplicate'] is True
+    assert retry.get_stats()['duplicates'] == 1
+
+
+def test_retry_push_transactions_after_delivery(node):
+    transactions = packed_transactions(3)
+    node.script('/v1/chain/push_transactions', 'process')
+    retry = RetryEngine(write_policy=RetryPolicy(idempotent=False, base_delay=0.001))
+    response = RequestHandlerAPI(node.url, retry=retry).post('/v1/chain/push_transactions',
+                                                             data=transactions)
+    results = response.json()
+    assert [result.get('duplicate') for result in results] == [True, True, True]
+    assert [result['transaction_id'] for result in results] == \
+        [transaction_id(trx['packed_trx']) for trx in transactions]
+    assert retry.get_stats()['duplicates'] == 1
+
+
+def test_token_bucket_spaces_requests():
+    clock = FakeClock()
+    bucket = TokenBucket(rate=10, burst=2, clock=clock, sleep=clock.sleep)
+    waits = [bucket.acquire() for _ in range(4)]
+    assert waits[:2] == [0.0, 0.0]
+    assert waits[2] == pytest.approx(0.1)
+    assert clock.now == pytest.approx(0.2)
+
+
+def test_limiter_backs_off_once_per_round_trip():
+    clock = FakeClock()
+    limiter = AdaptiveLimiter(initial=16, latency_tolerance=None, clock=clock)
+    started = [limiter.acquire() for _ in range(4)]
+    clock.now += 0.01
+    for start in started:
+        limiter.release(start, overloaded=True)
+    assert limiter.limit == 8
+    assert limiter.decreases == 1
+    limiter.release(limiter.acquire(), overloaded=True)
+    assert limiter.limit == 4
+
+
+def test_limiter_grows_while_saturated():
+    clock = FakeClock()
+    limiter = AdaptiveLimiter(initial=2, latency_tolerance=None, clock=clock)
+    for _ in range(4):
+        started = [limiter.acquire(), limiter.acquire()]
+        for start in started:
+            limiter.release(start)
+    assert limiter.limit >= 3
+
+
+def test_limiter_compares_latencies_per_path():
+    clock = FakeClock()
+    limiter = AdaptiveLimiter(initial=16, latency_tolerance=3.0, clock=clock)
+
+    def call(path, latency):
+        started = limiter.acquire()
+        clock.now += latency
+        limiter.release(started, path=path)
+
+    call('/v1/chain/get_info', 0.001)
+    for _ in range(50):
+        call('/v1/chain/get_block', 0.02)
+    assert limiter.decreases == 0
+    assert limiter.limit == 16
+    # a path slowing down against its own baseline still backs off.
+    for _ in range(5):
+        call('/v1/chain/get_block', 0.2)
+    assert limiter.decreases > 0
+    assert limiter.limit < 16
+
+
+def test_limiter_ignores_latency_by_default(node):
+    node.latencies['/v1/chain/get_block'] = LatencyProfile(latency=0.02)
+    flow_control = FlowControl(AdaptiveLimiter(initial=16))
+    chain_api = ChainAPI(RequestHandlerAPI(node.url, flow_control=flow_control))
+    chain_api.get_info()
+    assert len(list(chain_api.get_blocks(1, 100, concurrency=16))) == 100
+    assert flow_control.get_stats()['decreases'] == 0
+
+
+def test_flow_control_honours_retry_after():
+    clock = FakeClock()
+    flow_control = FlowControl(AdaptiveLimiter(initial=8, latency_tolerance=None, clock=clock),
+                               clock=clock, sleep=clock.sleep)
+    overloaded = BufferedResponse(429, b'{"code":429}', headers={'Retry-After': '2'})
+    assert flow_control.request(lambda: overloaded, '/v1/chain/get_info') is overloaded
+    assert flow_control.get_stats()['limit'] == 4
+    ok = BufferedResponse(200, b'{}')
+    assert flow_control.request(lambda: ok, '/v1/chain/get_block') is ok
+    assert clock.now == pytest.approx(2.0)
+
+
+def test_flow_control_rate_limits_each_path(node):
+    clock = FakeClock()
+    flow_control = FlowControl(AdaptiveLimiter(latency_tolerance=None), rates={'/v1/chain/get_info': 5},
+                               burst=1, clock=clock, sleep=clock.sleep)
+    connection = RequestHandlerAPI(node.url, flow_control=flow_control)
+    for _ in range(3):
+        connection.get('/v1/chain/get_info')
+    connection.post('/v1/chain/get_block', data={'block_num_or_id': 1})
+    # the first call uses the burst, the two others wait 0.2 s each.
+    assert clock.now == pytest.approx(0.4, abs=0.05)
+
+
+def test_pool_fails_over_to_a_live_node(node, closed_url):
+    pool = NodePoolRequestHandlerAPI([closed_url, node.url], clock=lambda: 0.0)
+    try:
+        for _ in range(3):
+            assert pool.get('/v1/chain/get_info').json()['head_block_num'] == 2000
+        stats = pool.get_stats()
+        assert stats[closed_url]['error_rate'] > 0
+        assert pool.ranked_nodes()[0].base_url == node.url
+    finally:
+        pool.close()
+
+
+def test_pool_fails_over_on_unavailable_node(node):
+    with ScriptedNode(node.chain) as other:
+        node.script('/v1/chain/get_block', UNAVAILABLE)
+        other.script('/v1/chain/get_block', UNAVAILABLE)
+        pool = NodePoolRequestHandlerAPI([node.url, other.url])
+        try:
+            response = pool.post('/v1/chain/get_block', data={'block_num_or_id': 7})
+            assert response.status_code == 503
+            response = pool.post('/v1/chain/get_block', data={'block_num_or_id': 7})
+            assert response.json()['block_num'] == 7
+            assert node.calls['/v1/chain/get_block'] + other.calls['/v1/chain/get_block'] == 3
+        finally:
+            pool.close()
+
+
+def test_pool_does_not_resend_delivered_push(node):
+    with ScriptedNode(node.chain) as other:
+        node.script('/v1/chain/push_transaction', 'process')
+        other.script('/v1/chain/push_transaction', 'process')
+        pool = NodePoolRequestHandlerAPI([node.url, other.url])
+        try:
+            with pytest.raises(requests.exceptions.ConnectionError):
+                pool.post('/v1/chain/push_transaction', data=packed_transactions(1)[0])
+            assert sum(n.calls.get('/v1/chain/push_transaction', 0) for n in (node, other)) == 1
+        finally:
+            pool.close()
+
+
+def test_hedged_pool_fails_over_to_the_second_node(node, closed_url):
+    pool = NodePoolRequestHandlerAPI([closed_url, node.url], hedge_percentile=0.95)
+    try:
+        # too few latencies for a hedge, only the first node is contacted.
+        assert pool.get('/v1/chain/get_info').json()['head_block_num'] == 2000
+        assert pool.get_hedge_stats()['fired'] == 0
+    finally:
+        pool.close()
+
+
+def test_hedged_pool_answers_from_the_fast_node(node, monkeypatch):
+    discarded = []
+    discard = pyeos_client.NodePool._discard
+    monkeypatch.setattr(pyeos_client.NodePool, '_discard',
+                        lambda future: discarded.append(future) or discard(future))
+    with ScriptedNode(node.chain) as other:
+        pool = NodePoolRequestHandlerAPI([node.url, other.url], hedge_percentile=0.95,
+                                         hedge_min_samples=5)
+        try:
+            for _ in range(5):
+                assert pool.hedge_delay('/v1/chain/get_info') is None
+                pool.get('/v1/chain/get_info')
+            delay = pool.hedge_delay('/v1/chain/get_info')
+            assert delay == max(pool.latencies['/v1/chain/get_info'])
+            assert pool.get_hedge_stats() == {'fired': 0, 'won': 0}
+
+            slow = pool.ranked_nodes()[0]
+            slow_node = node if slow.base_url == node.url else other
+            slow_node.latencies['/v1/chain/get_info'] = LatencyProfile(latency=0.5)
+            start = time.monotonic()
+            assert pool.get('/v1/chain/get_info').json()['head_block_num'] == 2000
+            assert time.monotonic() - start < 0.4
+            assert pool.get_hedge_stats() == {'fired': 1, 'won': 1}
+
+            # the slow call is released once it answers, not waited for.
+            assert len(discarded) == 1
+            response, error = discarded[0].result(timeout=5)
+            assert error is None and response.status_code == 200
+        finally:
+            pool.close()
+
+
+def test_pool_health_checks_route_around_a_lagging_node(node):
+    with ScriptedNode(SyntheticChain(head_block_num=1900)) as behind:
+        pool = NodePoolRequestHandlerAPI([behind.url, node.url], max_lag=10, health_interval=0.05)
+        try:
+            deadline = time.monotonic() + 5
+            while pool.get_stats()[behind.url]['lag'] == 0 and time.monotonic() < deadline:
+                time.sleep(0.01)
+            assert pool.get_stats()[behind.url]['lag'] == 100
+            assert pool.ranked_nodes()[0].base_url == node.url
+            assert pool.get('/v1/chain/get_info').json()['head_block_num'] == 2000
+        finally:
+            pool.close()
@@ -0,0 +1,66 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import copy
+
+from pyeos_client.EOSChainApi import ChainAPI
+from pyeos_client.NodeosConnect import RequestHandlerAPI
+from pyeos_client.RequiredKeysCache import RequiredKeysCache
+
+from .test_LocalSigner import DEV_PUBLIC_KEY
+
+OTHER_KEY = 'EOS8Znrtgwt8TfpmbVpTKvA2oB8Nqey625CLN8bCN3TEbgx86Dsvr'
+
+
+def transfer(actor, memo=''):
+    return {'expiration': '2018-06-01T12:00:30', 'ref_block_num': 1, 'ref_block_prefix': 2,
+            'actions': [{'account': 'eosio.token', 'name': 'transfer',
+                         'authorization': [{'actor': actor, 'permission': 'active'}],
+                         'data': memo.encode().hex()}]}
+
+
+def test_answers_are_cached_by_authorizations_and_keys(node):
+    now = [0.0]
+    cache = RequiredKeysCache(ChainAPI(RequestHandlerAPI(node.url)), ttl=60, check_interval=None,
+                              clock=lambda: now[0])
+    keys = [DEV_PUBLIC_KEY, OTHER_KEY]
+    assert cache.get_required_keys(transfer('inita'), keys) == [DEV_PUBLIC_KEY]
+    # the action data does not take part in the key.
+    assert cache.get_required_keys(transfer('inita', 'other'), keys) == [DEV_PUBLIC_KEY]
+    assert node.calls['/v1/chain/get_required_keys'] == 1
+    cache.get_required_keys(transfer('inita'), [OTHER_KEY])
+    cache.get_required_keys(transfer('initb'), keys)
+    assert node.calls['/v1/chain/get_required_keys'] == 3
+    assert (cache.hits, cache.misses) == (1, 3)
+    now[0] = 60
+    cache.get_required_keys(transfer('inita'), keys)
+    assert node.calls['/v1/chain/get_required_keys'] == 4
+
+
+def test_permission_change_invalidates_the_actor(node):
+    now = [0.0]
+    chain_api = ChainAPI(RequestHandlerAPI(node.url))
+    cache = RequiredKeysCache(chain_api, check_interval=30, clock=lambda: now[0])
+    keys = [DEV_PUBLIC_KEY]
+    cache.get_required_keys(transfer('inita'), keys)
+    cache.get_required_keys(transfer('initb'), keys)
+    cache.get_required_keys(transfer('inita'), keys)
+    assert node.calls['/v1/chain/get_account'] == 2
+    assert node.calls['/v1/chain/get_required_keys'] == 2
+    # past check_interval the permissions are fetched again, unchanged.
+    now[0] = 31
+    cache.get_required_keys(transfer('inita'), keys)
+    assert node.calls['/v1/chain/get_account'] == 3
+    assert node.calls['/v1/chain/get_required_keys'] == 2
+
+    account = copy.deepcopy(chain_api.get_account('inita').json())
+    account['permissions'][0]['required_auth']['keys'][0]['key'] = OTHER_KEY
+    cache.observe_account(account)
+    cache.get_required_keys(transfer('initb'), keys)
+    assert node.calls['/v1/chain/get_required_keys'] == 2
+    cache.get_required_keys(transfer('inita'), keys)
+    assert node.calls['/v1/chain/get_required_keys'] == 3
+
+    cache.invalidate()
+    cache.get_required_keys(transfer('initb'), keys)
+    assert node.calls['/v1/chain/get_required_keys'] == 4
@@ -0,0 +1,73 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from pyeos_client.EOSChainApi import ChainAPI
+from pyeos_client.FakeNodeos import LatencyProfile
+from pyeos_client.NodeosConnect import RequestHandlerAPI
+from pyeos_client.SingleFlight import CoalescingRequestHandlerAPI
+
+
+def concurrent_calls(call, count):
+    barrier = threading.Barrier(count)
+
+    def run(_):
+        barrier.wait()
+        try:
+            return call()
+        except requests.exceptions.RequestException as e:
+            return e
+
+    with ThreadPoolExecutor(max_workers=count) as executor:
+        return list(executor.map(run, range(count)))
+
+
+def test_concurrent_reads_share_one_call(node):
+    node.latencies['/v1/chain/get_account'] = LatencyProfile(latency=0.3)
+    handler = CoalescingRequestHandlerAPI(RequestHandlerAPI(node.url, pool_maxsize=20))
+    chain_api = ChainAPI(handler)
+    responses = concurrent_calls(lambda: chain_api.get_account('eosio.token'), 20)
+    assert node.calls['/v1/chain/get_account'] == 1
+    assert all(response.json()['account_name'] == 'eosio.token' for response in responses)
+    assert handler.get_stats() == {'requests': 20, 'coalesced': 19, 'cache_hits': 0}
+    # once answered, the next call goes to the node again.
+    chain_api.get_account('eosio.token')
+    assert node.calls['/v1/chain/get_account'] == 2
+
+
+def test_cached_response_until_it_expires(node):
+    now = [0.0]
+    handler = CoalescingRequestHandlerAPI(RequestHandlerAPI(node.url),
+                                          ttl={'/v1/chain/get_info': 0.5}, clock=lambda: now[0])
+    chain_api = ChainAPI(handler)
+    first = chain_api.get_info()
+    now[0] = 0.4
+    assert chain_api.get_info() is first
+    assert node.calls['/v1/chain/get_info'] == 1
+    now[0] = 0.5
+    assert chain_api.get_info() is not first
+    assert node.calls['/v1/chain/get_info'] == 2
+    # paths without a ttl are never cached.
+    chain_api.get_account('eosio.token')
+    chain_api.get_account('eosio.token')
+    assert node.calls['/v1/chain/get_account'] == 2
+    assert handler.get_stats()['cache_hits'] == 1
+
+
+def test_upstream_error_reaches_every_waiter(node):
+    node.latencies['/v1/chain/get_account'] = LatencyProfile(latency=0.3)
+    node.script('/v1/chain/get_account', 'process')
+    handler = CoalescingRequestHandlerAPI(RequestHandlerAPI(node.url, pool_maxsize=20),
+                                          ttl={'/v1/chain/get_account': 10})
+    chain_api = ChainAPI(handler)
+    errors = concurrent_calls(lambda: chain_api.get_account('eosio.token'), 20)
+    assert node.calls['/v1/chain/get_account'] == 1
+    assert all(isinstance(error, requests.exceptions.ConnectionError) for error in errors)
+    assert len(set(map(id, errors))) == 1
+    # failures are not cached.
+    assert chain_api.get_account('eosio.token').json()['account_name'] == 'eosio.token'
+    assert handler.in_flight == {}
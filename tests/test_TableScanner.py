@@ -0,0 +1,68 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from itertools import islice
+
+import pytest
+
+from pyeos_client.EOSChainApi import ChainAPI
+from pyeos_client.FakeNodeos import SyntheticChain
+from pyeos_client.NodeosConnect import RequestHandlerAPI
+from pyeos_client.TableScanner import split_key_range
+
+from .conftest import ScriptedNode
+
+ACCOUNTS = ('eosio.token', 'eosio.token', 'accounts')
+
+
+@pytest.fixture
+def table_node():
+    tables = {ACCOUNTS: 2500}
+    for scope, count in (('carol', 3), ('alice', 250), ('bob', 0), ('dave', 40)):
+        tables[('eosio.token', scope, 'stat')] = [{'scope': scope, 'n': i} for i in range(count)]
+    with ScriptedNode(SyntheticChain(head_block_num=100, tables=tables)) as node:
+        yield node
+
+
+def test_partitioned_scan_returns_every_row_once_in_order(table_node):
+    chain_api = ChainAPI(RequestHandlerAPI(table_node.url, pool_maxsize=8))
+    rows = list(chain_api.scan_table_rows(*ACCOUNTS, partitions=8, limit=100))
+    assert len(rows) == 2500
+    assert [row['id'] for row in rows] == sorted(set(row['id'] for row in rows))
+    assert rows == list(chain_api.scan_table_rows(*ACCOUNTS, limit=1000))
+
+
+def test_partitioned_scan_within_bounds(table_node):
+    table = table_node.chain.tables[ACCOUNTS]
+    lower, upper = table.keys[100], table.keys[1234]
+    chain_api = ChainAPI(RequestHandlerAPI(table_node.url))
+    rows = list(chain_api.scan_table_rows(*ACCOUNTS, partitions=4, lower_bound=lower,
+                                          upper_bound=upper, limit=64))
+    assert [row['id'] for row in rows] == list(table.keys[100:1235])
+
+
+def test_split_key_range_covers_the_range():
+    ranges = split_key_range(10, 109, 8)
+    assert ranges[0][0] == 10 and ranges[-1][1] == 109
+    assert all(ranges[i][1] + 1 == ranges[i + 1][0] for i in range(len(ranges) - 1))
+    assert split_key_range(5, 7, 8) == [(5, 5), (6, 6), (7, 7)]
+
+
+def test_scan_scopes_in_scope_order(table_node):
+    chain_api = ChainAPI(RequestHandlerAPI(table_node.url))
+    rows = list(chain_api.scan_table_rows('eosio.token', None, 'stat', partitions=2, limit=16))
+    expected = [(scope, {'scope': scope, 'n': i})
+                for scope, count in (('alice', 250), ('carol', 3), ('dave', 40)) for i in range(count)]
+    assert rows == expected
+
+
+def test_closing_a_scan_stops_the_reads(table_node):
+    chain_api = ChainAPI(RequestHandlerAPI(table_node.url))
+    scan = chain_api.scan_table_rows(*ACCOUNTS, partitions=8, concurrency=2, limit=25)
+    assert len(list(islice(scan, 10))) == 10
+    scan.close()
+    calls = table_node.calls['/v1/chain/get_table_rows']
+    # a range takes 13 pages, the two first ones are read whole while the
+    # third one stops after its first pages.
+    assert calls < 3 * 13
+    assert table_node.calls['/v1/chain/get_table_rows'] == calls
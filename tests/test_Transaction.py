@@ -0,0 +1,41 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import hashlib
+import struct
+
+from pyeos_client.AbiSerializer import AbiSerializer
+from pyeos_client.EOSChainApi import ChainAPI
+from pyeos_client.FakeNodeos import TOKEN_ABI
+from pyeos_client.LocalSigner import LocalSigner, pack_transaction
+from pyeos_client.NodeosConnect import RequestHandlerAPI
+from pyeos_client.Transaction import PackedAction, Transaction
+
+from .test_LocalSigner import DEV_KEY, DEV_PUBLIC_KEY
+
+
+def transfer(memo):
+    return PackedAction.from_args(AbiSerializer(TOKEN_ABI), 'eosio.token', 'transfer',
+                                  [{'actor': 'inita', 'permission': 'active'}],
+                                  {'from': 'inita', 'to': 'initb', 'quantity': '1.0000 EOS', 'memo': memo})
+
+
+def test_transaction_packs_like_pack_transaction():
+    trx = Transaction('2018-06-01T12:00:30', 70000, 123456789, [transfer('a'), transfer('b')],
+                      context_free_actions=[transfer('c')], max_net_usage_words=300,
+                      max_cpu_usage_ms=5, delay_sec=2)
+    assert trx.packed_trx == pack_transaction(trx.as_dict())
+    assert trx.packed_trx[:10] == struct.pack('<IHI', 1527854430, 70000 & 0xffff, 123456789)
+    assert trx.id == hashlib.sha256(trx.packed_trx).hexdigest()
+
+
+def test_signed_transaction_is_pushed(node):
+    chain_api = ChainAPI(RequestHandlerAPI(node.url))
+    chain_id = chain_api.get_info().json()['chain_id']
+    signer = LocalSigner([DEV_KEY])
+    trx = Transaction('2018-06-01T12:00:30', 1999, 987654321, [transfer('push')])
+    signed = trx.sign(signer, [DEV_PUBLIC_KEY], chain_id)
+    assert signed['packed_trx'] == trx.packed_trx.hex()
+    assert signed['signatures'] == signer.sign_transaction(trx.as_dict(), [DEV_PUBLIC_KEY],
+                                                           chain_id)['signatures']
+    assert chain_api.push_transaction(signed).json()['transaction_id'] == trx.id